@@ -0,0 +1,342 @@
+"""
+Runs the benchmarks against a local StandInServer, with both clients, and writes the
+results as JSON so that they can be compared between versions.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --quick --latency 0.005 --compare results.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from pywebdav import AsyncWebDAVClient, SyncWebDAVClient
+from pywebdav.types import Operation
+from pywebdav.utils import response_to_resources
+
+from .server import LISTING_PREFIX, StandInServer
+
+
+SyncBenchmark = Callable[[SyncWebDAVClient], Any]
+AsyncBenchmark = Callable[[AsyncWebDAVClient], Awaitable[Any]]
+
+SIZES = {
+    "full": {
+        "listing": [10, 1_000, 10_000, 100_000, 500_000],
+        "small_files": 500,
+        "large_file_mb": 256,
+        "tree_files": 1_000,
+    },
+    "quick": {
+        "listing": [10, 1_000, 10_000],
+        "small_files": 100,
+        "large_file_mb": 32,
+        "tree_files": 200,
+    },
+}
+SMALL_FILE_SIZE = 4 * 1024
+TREE_FILE_SIZE = 16 * 1024
+CONCURRENCY = 8
+
+
+@dataclass
+class Result:
+    name: str
+    client: str  # sync or async
+    params: Dict[str, Any]
+    times: List[float]  # seconds, one per repeat
+    ops: int  # entries parsed, or files transferred
+    bytes: int = 0
+    best: float = field(init=False)
+    median: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.best = min(self.times)
+        self.median = statistics.median(self.times)
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.name}[{params}]/{self.client}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **asdict(self),
+            "ops_per_sec": self.ops / self.best,
+            "mb_per_sec": self.bytes / self.best / 1024**2,
+        }
+
+
+class Runner:
+    def __init__(self, server: StandInServer, *, repeat: int) -> None:
+        self.server = server
+        self.repeat = repeat
+        self.results: List[Result] = []
+
+    def sync_client(self) -> SyncWebDAVClient:
+        return SyncWebDAVClient(
+            "127.0.0.1", self.server.port, scheme="http", timeout=300
+        )
+
+    def async_client(self) -> AsyncWebDAVClient:
+        return AsyncWebDAVClient(
+            "127.0.0.1", self.server.port, scheme="http", timeout=300
+        )
+
+    def measure(
+        self,
+        name: str,
+        params: Dict[str, Any],
+        sync_fn: SyncBenchmark,
+        async_fn: AsyncBenchmark,
+        *,
+        ops: int,
+        nbytes: int = 0,
+    ) -> None:
+        """Times sync_fn and async_fn (repeat times each) with a fresh client per run."""
+        sync_times = []
+        for _ in range(self.repeat):
+            with self.sync_client() as client:
+                started = time.perf_counter()
+                sync_fn(client)
+                sync_times.append(time.perf_counter() - started)
+
+        async def run_async() -> float:
+            async with self.async_client() as client:
+                started = time.perf_counter()
+                await async_fn(client)
+                return time.perf_counter() - started
+
+        async_times = [asyncio.run(run_async()) for _ in range(self.repeat)]
+        for client, times in (("sync", sync_times), ("async", async_times)):
+            result = Result(name, client, params, times, ops, nbytes)
+            self.results.append(result)
+            print(
+                f"{result.key:<48} {result.best * 1000:10.1f} ms"
+                f" {result.ops / result.best:12.1f} ops/s",
+                file=sys.stderr,
+            )
+
+
+def bench_listing(runner: Runner, sizes: List[int]) -> None:
+    """PROPFIND (Depth: 1) of a large collection, parsed with response_to_resources."""
+    for n in sizes:
+        path = f"{LISTING_PREFIX}{n}/"
+        runner.server.listing(n)  # generated up front, so that it isn't timed
+
+        def sync_fn(client: SyncWebDAVClient) -> None:
+            res = client.propfind(path)
+            assert len(response_to_resources(res)) == n + 1
+
+        async def async_fn(client: AsyncWebDAVClient) -> None:
+            res = await client.propfind(path)
+            assert len(response_to_resources(res)) == n + 1
+
+        runner.measure("listing", {"entries": n}, sync_fn, async_fn, ops=n)
+
+
+def bench_small_files(runner: Runner, count: int) -> None:
+    """PUT, then GET, many small files, CONCURRENCY at a time."""
+    body = os.urandom(SMALL_FILE_SIZE)
+    for client in ("sync", "async"):
+        (runner.server.root / f"small-{client}").mkdir()
+
+    def puts(client: str) -> List[Operation]:
+        return [
+            Operation("put", (f"/small-{client}/{i}.bin",), {"content": body})
+            for i in range(count)
+        ]
+
+    def gets(client: str) -> List[Operation]:
+        return [Operation("get", (f"/small-{client}/{i}.bin",)) for i in range(count)]
+
+    params = {"files": count, "size": SMALL_FILE_SIZE}
+    nbytes = count * SMALL_FILE_SIZE
+    for name, operations in (("small_put", puts), ("small_get", gets)):
+
+        def sync_fn(client: SyncWebDAVClient) -> None:
+            results = client.run_many(operations("sync"), concurrency=CONCURRENCY)
+            assert all(r.ok and r.result.status_code < 300 for r in results)
+
+        async def async_fn(client: AsyncWebDAVClient) -> None:
+            results = await client.run_many(
+                operations("async"), concurrency=CONCURRENCY
+            )
+            assert all(r.ok and r.result.status_code < 300 for r in results)
+
+        runner.measure(name, params, sync_fn, async_fn, ops=count, nbytes=nbytes)
+
+
+def bench_large_file(runner: Runner, size_mb: int, workdir: Path) -> None:
+    """Streams one large file up (from disk), and back down (to disk)."""
+    source = workdir / "large.bin"
+    with open(source, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    target = workdir / "large-download.bin"
+    nbytes = size_mb * 1024 * 1024
+
+    def sync_put(client: SyncWebDAVClient) -> None:
+        with open(source, "rb") as f:
+            client.put("/large.bin", content=f).raise_for_status()
+
+    async def async_put(client: AsyncWebDAVClient) -> None:
+        with open(source, "rb") as f:
+            (await client.put("/large.bin", content=f)).raise_for_status()
+
+    def sync_get(client: SyncWebDAVClient) -> None:
+        assert client.download_to("/large.bin", target) == nbytes
+
+    async def async_get(client: AsyncWebDAVClient) -> None:
+        assert await client.download_to("/large.bin", target) == nbytes
+
+    params = {"mb": size_mb}
+    runner.measure("large_put", params, sync_put, async_put, ops=1, nbytes=nbytes)
+    runner.measure("large_get", params, sync_get, async_get, ops=1, nbytes=nbytes)
+
+
+def bench_tree(runner: Runner, count: int, workdir: Path) -> None:
+    """upload_tree and download_tree of a directory of count files, in 20 subdirectories."""
+    source = workdir / "tree"
+    for i in range(count):
+        fp = source / f"dir-{i % 20}" / f"{i}.bin"
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        fp.write_bytes(os.urandom(TREE_FILE_SIZE))
+
+    def sync_upload(client: SyncWebDAVClient) -> None:
+        results = client.upload_tree(source, "/tree-sync", concurrency=CONCURRENCY)
+        assert all(r.ok for r in results)
+
+    async def async_upload(client: AsyncWebDAVClient) -> None:
+        results = await client.upload_tree(
+            source, "/tree-async", concurrency=CONCURRENCY
+        )
+        assert all(r.ok for r in results)
+
+    def sync_download(client: SyncWebDAVClient) -> None:
+        results = client.download_tree(
+            "/tree-sync", workdir / "tree-sync", concurrency=CONCURRENCY
+        )
+        assert len(results) == count and all(r.ok for r in results)
+
+    async def async_download(client: AsyncWebDAVClient) -> None:
+        results = await client.download_tree(
+            "/tree-async", workdir / "tree-async", concurrency=CONCURRENCY
+        )
+        assert len(results) == count and all(r.ok for r in results)
+
+    params = {"files": count, "size": TREE_FILE_SIZE}
+    nbytes = count * TREE_FILE_SIZE
+    runner.measure(
+        "upload_tree", params, sync_upload, async_upload, ops=count, nbytes=nbytes
+    )
+    runner.measure(
+        "download_tree",
+        params,
+        sync_download,
+        async_download,
+        ops=count,
+        nbytes=nbytes,
+    )
+
+
+BENCHMARKS = ["listing", "small_files", "large_file", "tree"]
+
+
+def run(
+    *, quick: bool, latency: float, repeat: int, only: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    sizes = SIZES["quick" if quick else "full"]
+    selected = only or BENCHMARKS
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "server"
+        workdir = Path(tmp) / "local"
+        root.mkdir()
+        workdir.mkdir()
+        with StandInServer(root, latency=latency) as server:
+            runner = Runner(server, repeat=repeat)
+            if "listing" in selected:
+                bench_listing(runner, sizes["listing"])
+            if "small_files" in selected:
+                bench_small_files(runner, sizes["small_files"])
+            if "large_file" in selected:
+                bench_large_file(runner, sizes["large_file_mb"], workdir)
+            if "tree" in selected:
+                bench_tree(runner, sizes["tree_files"], workdir)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "httpx": httpx.__version__,
+            "quick": quick,
+            "latency": latency,
+            "repeat": repeat,
+        },
+        "results": [result.as_dict() for result in runner.results],
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Prints the change in the best time of each benchmark, against a baseline run."""
+
+    def key(result: Dict[str, Any]) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+        return f"{result['name']}[{params}]/{result['client']}"
+
+    before = {key(result): result["best"] for result in baseline["results"]}
+    for result in results["results"]:
+        if key(result) in before:
+            change = result["best"] / before[key(result)] - 1
+            print(f"{key(result):<48} {change:+8.1%}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", "-o", type=Path, help="Write the results here")
+    parser.add_argument(
+        "--quick", action="store_true", help="Smaller sizes, for a quick check"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds the server waits before answering each request",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark")
+    parser.add_argument(
+        "--only", action="append", choices=BENCHMARKS, help="Only run these"
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="A previous results file to compare against"
+    )
+    args = parser.parse_args(argv)
+
+    results = run(
+        quick=args.quick, latency=args.latency, repeat=args.repeat, only=args.only
+    )
+    output = json.dumps(results, indent=2)
+    if args.output is not None:
+        args.output.write_text(output)
+    else:
+        print(output)
+    if args.compare is not None:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
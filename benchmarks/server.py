@@ -0,0 +1,283 @@
+"""
+A WebDAV stand-in server for benchmarks: a threaded HTTP/1.1 server over a local directory.
+
+It supports enough of WebDAV for the clients' requests (PROPFIND with Depth: 0/1, GET,
+HEAD, PUT, MKCOL, DELETE, COPY and MOVE), and can add a fixed latency to every request to mimic a
+remote server. Listings of any size can be requested without files on disk, from
+/_listing/<n>/, which has n (synthetic) entries.
+"""
+from __future__ import annotations
+
+import shutil
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote, unquote, urlsplit
+
+
+__all__ = ["StandInServer"]
+
+
+LISTING_PREFIX = "/_listing/"
+_ENTRY = (
+    "<d:response><d:href>{href}</d:href><d:propstat><d:prop>"
+    "<d:getlastmodified>{mtime}</d:getlastmodified>{props}"
+    "</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+)
+_MULTISTATUS = (
+    '<?xml version="1.0"?><d:multistatus xmlns:d="DAV:" '
+    'xmlns:oc="http://owncloud.org/ns">{}</d:multistatus>'
+)
+
+
+class StandInServer:
+    """
+    Serves root over WebDAV on localhost, from a background thread.
+
+    Usage:
+        with StandInServer(Path(tmp), latency=0.01) as server:
+            client = SyncWebDAVClient("127.0.0.1", server.port, scheme="http")
+    """
+
+    def __init__(self, root: Path, *, latency: float = 0.0, port: int = 0) -> None:
+        """
+        Args:
+            root: The directory to serve
+            latency: Seconds to wait before answering each request
+            port: The port to listen on; a free one is picked by default
+        """
+        self.root = root
+        self.latency = latency
+        self.requests = 0
+        self._listings: Dict[int, bytes] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.stand_in = self  # type: ignore
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> StandInServer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def listing(self, n: int) -> bytes:
+        """The multistatus body of a synthetic collection with n files (cached)."""
+        with self._lock:
+            if n not in self._listings:
+                mtime = formatdate(1654941600, usegmt=True)
+                entries = [_collection_entry(f"{LISTING_PREFIX}{n}/", mtime)]
+                entries.extend(
+                    _ENTRY.format(
+                        href=f"{LISTING_PREFIX}{n}/file-{i}.txt",
+                        mtime=mtime,
+                        props=(
+                            f"<d:resourcetype/><d:getcontentlength>{i}</d:getcontentlength>"
+                            f'<d:getetag>"{i}"</d:getetag>'
+                            "<d:getcontenttype>text/plain</d:getcontenttype>"
+                        ),
+                    )
+                    for i in range(n)
+                )
+                self._listings[n] = _MULTISTATUS.format("".join(entries)).encode()
+            return self._listings[n]
+
+
+def _collection_entry(href: str, mtime: str) -> str:
+    return _ENTRY.format(
+        href=href, mtime=mtime, props="<d:resourcetype><d:collection/></d:resourcetype>"
+    )
+
+
+def _file_entry(href: str, fp: Path) -> str:
+    stat = fp.stat()
+    props = (
+        f"<d:resourcetype/><d:getcontentlength>{stat.st_size}</d:getcontentlength>"
+        f'<d:getetag>"{stat.st_mtime_ns:x}-{stat.st_size:x}"</d:getetag>'
+    )
+    mtime = formatdate(stat.st_mtime, usegmt=True)
+    return _ENTRY.format(href=href, mtime=mtime, props=props)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections alive between requests
+    # headers and body are written separately; without this, small responses wait for
+    # the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    @property
+    def stand_in(self) -> StandInServer:
+        return self.server.stand_in  # type: ignore
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def parse_request(self) -> bool:
+        ok = super().parse_request()
+        if ok:
+            with self.stand_in._lock:
+                self.stand_in.requests += 1
+            if self.stand_in.latency:
+                time.sleep(self.stand_in.latency)
+        return ok
+
+    def _path(self) -> str:
+        return unquote(urlsplit(self.path).path)
+
+    def _local(self) -> Path:
+        return self.stand_in.root / self._path().strip("/")
+
+    def _respond(
+        self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_PROPFIND(self) -> None:
+        self._read_body()  # the requested properties are ignored
+        path = self._path()
+        if path.startswith(LISTING_PREFIX):
+            n = int(path[len(LISTING_PREFIX) :].strip("/"))
+            self._respond(207, self.stand_in.listing(n))
+            return
+        fp = self._local()
+        if not fp.exists():
+            self._respond(404)
+            return
+        if fp.is_file():
+            entries = [_file_entry(quote(path), fp)]
+        else:
+            mtime = formatdate(fp.stat().st_mtime, usegmt=True)
+            base = path.rstrip("/") + "/"
+            entries = [_collection_entry(quote(base), mtime)]
+            if self.headers.get("Depth", "1") != "0":
+                for child in sorted(fp.iterdir()):
+                    href = quote(base + child.name)
+                    if child.is_dir():
+                        entries.append(_collection_entry(href + "/", mtime))
+                    else:
+                        entries.append(_file_entry(href, child))
+        body = _MULTISTATUS.format("".join(entries)).encode()
+        self._respond(207, body, {"Content-Type": "application/xml; charset=utf-8"})
+
+    def do_GET(self) -> None:
+        fp = self._local()
+        if not fp.is_file():
+            self._respond(404)
+            return
+        size = fp.stat().st_size
+        self.send_response(200)
+        self.send_header("Content-Length", str(size))
+        self.send_header("Content-Type", "application/octet-stream")
+        self.end_headers()
+        if self.command != "HEAD":
+            with open(fp, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+
+    do_HEAD = do_GET
+
+    def do_PUT(self) -> None:
+        fp = self._local()
+        if not fp.parent.is_dir():
+            self._read_body()
+            self._respond(409)
+            return
+        existed = fp.exists()
+        length = self.headers.get("Content-Length")
+        with open(fp, "wb") as f:
+            if length is not None:
+                remaining = int(length)
+                while remaining:
+                    chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            else:
+                f.write(self._read_body())
+        self._respond(204 if existed else 201)
+
+    def do_MKCOL(self) -> None:
+        fp = self._local()
+        if fp.exists():
+            self._respond(405)
+        elif not fp.parent.is_dir():
+            self._respond(409)
+        else:
+            fp.mkdir()
+            self._respond(201)
+
+    def do_DELETE(self) -> None:
+        fp = self._local()
+        if not fp.exists():
+            self._respond(404)
+            return
+        if fp.is_dir():
+            shutil.rmtree(fp)
+        else:
+            fp.unlink()
+        self._respond(204)
+
+    def do_COPY(self) -> None:
+        self._transfer(move=False)
+
+    def do_MOVE(self) -> None:
+        self._transfer(move=True)
+
+    def _transfer(self, *, move: bool) -> None:
+        src = self._local()
+        destination = unquote(urlsplit(self.headers.get("Destination", "")).path)
+        target = self.stand_in.root / destination.strip("/")
+        if not src.exists():
+            self._respond(404)
+        elif not target.parent.is_dir():
+            self._respond(409)
+        elif target.exists() and self.headers.get("Overwrite", "T") == "F":
+            self._respond(412)
+        else:
+            existed = target.exists()
+            if target.is_dir():
+                shutil.rmtree(target)
+            if move:
+                src.rename(target)
+            elif src.is_dir():
+                shutil.copytree(src, target)
+            else:
+                shutil.copyfile(src, target)
+            self._respond(204 if existed else 201)
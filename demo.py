@@ -1,4 +1,5 @@
 import asyncio
+from pathlib import Path
 
 from pywebdav import AsyncWebDAVClient
 
@@ -25,9 +26,12 @@ async def main() -> None:
     with open("portugal.jpg", "wb") as f:
         f.write(res.read())
 
+    # download_to - stream a (large) file straight to disk, chunk by chunk
+    await client.download_to("/Images/Portugal.jpg", Path("portugal.jpg"))
+
     # put - upload a file
     with open("portugal.jpg", "rb") as f:
-        await client.put("/Documents/portugal.jpg", content=f.read())
+        await client.put("/Documents/portugal.jpg", content=f)  # streamed from disk
 
     await client.close()
     # all the methods have synchronous counterparts that work exactly the same;
@@ -1,2 +1,22 @@
-from ._async import AsyncWebDAVClient as AsyncWebDAVClient
-from ._sync import SyncWebDAVClient as SyncWebDAVClient
+from typing import TYPE_CHECKING, Any
+
+
+__all__ = ["AsyncWebDAVClient", "SyncWebDAVClient"]
+
+if TYPE_CHECKING:
+    from ._async import AsyncWebDAVClient as AsyncWebDAVClient
+    from ._sync import SyncWebDAVClient as SyncWebDAVClient
+
+
+def __getattr__(name: str) -> Any:
+    # the clients (and httpx) are imported on first use, so that importing a submodule
+    # (like the CLI) doesn't pay for them up front
+    if name == "AsyncWebDAVClient":
+        from ._async import AsyncWebDAVClient
+
+        return AsyncWebDAVClient
+    if name == "SyncWebDAVClient":
+        from ._sync import SyncWebDAVClient
+
+        return SyncWebDAVClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
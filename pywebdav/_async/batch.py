@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, List, Optional
+
+from ..types import Operation, OperationResult
+
+if TYPE_CHECKING:
+    from . import AsyncWebDAVClient
+
+
+class AsyncBatch:
+    """
+    Collects operations to run together, with bounded concurrency (see `run_many`).
+
+    Operations are added with the methods named after the client methods, which can be
+    chained, eg: `batch.put("/a.txt", content=b"a").delete("/old.txt")`. They are run by
+    calling `run`, or when the batch is used as a context manager, on leaving the block;
+    the results are then available in `results`.
+    """
+
+    def __init__(self, client: AsyncWebDAVClient, *, concurrency: int = 8) -> None:
+        self.client = client
+        self.concurrency = concurrency
+        self.operations: List[Operation] = []
+        self.results: List[OperationResult] = []
+
+    def add(self, method: str, *args: Any, **kwargs: Any) -> AsyncBatch:
+        """Adds a call to the client method named `method` to the batch."""
+        self.operations.append(Operation(method, args, kwargs))
+        return self
+
+    def get(self, path: str, **kwargs: Any) -> AsyncBatch:
+        return self.add("get", path, **kwargs)
+
+    def put(self, path: str, **kwargs: Any) -> AsyncBatch:
+        return self.add("put", path, **kwargs)
+
+    def propfind(self, path: str, **kwargs: Any) -> AsyncBatch:
+        return self.add("propfind", path, **kwargs)
+
+    def mkcol(self, path: str) -> AsyncBatch:
+        return self.add("mkcol", path)
+
+    def delete(self, path: str) -> AsyncBatch:
+        return self.add("delete", path)
+
+    def move(self, src_path: str, target_path: str) -> AsyncBatch:
+        return self.add("move", src_path, target_path)
+
+    def copy(self, src_path: str, target_path: str) -> AsyncBatch:
+        return self.add("copy", src_path, target_path)
+
+    async def run(self) -> List[OperationResult]:
+        """Runs the operations added so far, returning their results in the same order."""
+        self.results = await self.client.run_many(
+            self.operations, concurrency=self.concurrency
+        )
+        self.operations = []
+        return self.results
+
+    async def __aenter__(self) -> AsyncBatch:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            await self.run()
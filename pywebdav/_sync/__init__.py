@@ -1,22 +1,100 @@
 from __future__ import annotations
 
+import json
+import time
 import xml.etree.ElementTree as ET
+from contextlib import contextmanager
 from logging import getLogger
 from pathlib import Path
 from types import TracebackType
-from typing import Any, List, Literal, Optional
+from typing import (
+    Any,
+    Iterator,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from urllib.parse import quote
+from urllib.parse import quote, urlsplit
 
-from .._unasync_compat import SyncClient
-from ..types import Auth, Cert, DAVResponse, RequestMethodLiteral
-from ..utils import DEFAULT_HEADERS
+from httpx import Limits, Response, Timeout, TransportError
+
+from .._unasync_compat import (
+    SyncBaseTransport,
+    SyncClient,
+    SyncCompletionPool,
+    SyncConcurrencyGate,
+    SyncIterBytes,
+    SyncProgressBody,
+    SyncReadResponse,
+    SyncSingleFlight,
+    SyncSleep,
+    SyncTaskPool,
+    SyncUploadBody,
+)
+from ..cache import ContentCache, MetadataCache
+from ..limiter import AdaptiveLimiter
+from ..metrics import ClientMetrics, Instrument, RequestEvent
+from ..retry import RetryPolicy, is_replayable
+from ..search import search_body
+from ..sync import SyncDirection, SyncPlan, SyncTokenStore
+from ..types import (
+    AnyResource,
+    Auth,
+    Cert,
+    DAVException,
+    DAVResponse,
+    Operation,
+    OperationResult,
+    ProgressCallback,
+    RequestMethodLiteral,
+    Resource,
+    SyncCollectionResult,
+    TransferResult,
+    UploadContent,
+)
+from ..utils import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_HEADERS,
+    DEFAULT_SEGMENT_SIZE,
+    FileChunks,
+    ResourceParser,
+    byte_ranges,
+    content_length,
+    href_to_path,
+    response_to_resources,
+    response_to_sync_result,
+)
+from .batch import SyncBatch
+from .chunked import SyncChunkedUploader
+from .tree import download_tree, sync_tree, upload_tree
 
 
 logger = getLogger(__name__)
 
+# the statuses servers answer a sync-collection REPORT with, when they don't support it
+_SYNC_COLLECTION_UNSUPPORTED = (400, 403, 405, 501)
+# the properties requested for changed members by default
+_SYNC_COLLECTION_PROPERTIES = [
+    "d:getetag",
+    "d:getlastmodified",
+    "d:getcontentlength",
+    "d:getcontenttype",
+    "d:resourcetype",
+]
+# larger uploads aren't sampled for latency (time to the response headers) by the limiter;
+# they take longer because of their size, not because the server is overloaded
+_LATENCY_SAMPLE_MAX_BYTES = 64 * 1024
+# read-only requests; identical ones in flight at the same time share a response
+_COALESCED_METHODS = frozenset({"GET", "HEAD", "PROPFIND"})
+
 
 class SyncWebDAVClient:
+    origin: str
     base_url: str
     _client: SyncClient
 
@@ -29,6 +107,16 @@ class SyncWebDAVClient:
         auth: Optional[Auth] = None,
         cert: Optional[Cert] = None,
         path: Optional[str] = None,
+        limits: Optional[Limits] = None,
+        timeout: Optional[Union[float, Timeout]] = None,
+        http2: bool = False,
+        transport: Optional[SyncBaseTransport] = None,
+        content_cache: Optional[ContentCache] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        retry: Optional[RetryPolicy] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        coalesce: bool = True,
+        instruments: Iterable[Instrument] = (),
     ) -> None:
         """
         Initializes the WebDAV Client.
@@ -41,10 +129,32 @@ class SyncWebDAVClient:
                   [httpx.DigestAuth](https://www.python-httpx.org/quickstart/#authentication) for digest authentication.
             cert: Path to a certicate file, or a tuple of (cert, key)
             path: Any additional path which should be considered as part of the base URL.
+            limits: Connection pool limits; the maximum number of connections, of idle
+                    keep-alive connections, and how long idle connections are kept open.
+                    See [httpx.Limits](https://www.python-httpx.org/advanced/#pool-limit-configuration)
+            timeout: Timeout in seconds for all operations, or an instance of
+                     [httpx.Timeout](https://www.python-httpx.org/advanced/#timeout-configuration)
+                     for separate connect/read/write/pool timeouts.
+            http2: Whether to use HTTP/2 (if the server supports it), which multiplexes
+                   concurrent requests over a single connection. Requires the `h2` package.
+            transport: A custom transport to send requests with (eg: for testing, or to
+                       configure retries/local addresses at the connection level).
+            content_cache: A ContentCache to serve unchanged files from, for GET requests.
+            metadata_cache: A MetadataCache to keep listings from `list_resources` in.
+            retry: When to send failed requests again (eg: 503 responses, connection
+                   resets); requests aren't retried without one. Retries are counted
+                   in `metrics`.
+            limiter: Adapts the number of requests in flight to the server's latency and
+                     errors; requests wait for a free slot. Without one, there's no limit.
+            coalesce: Whether concurrent identical GET, HEAD and PROPFIND requests share
+                      one request to the server (and its response).
+            instruments: Receive an event when each request starts and ends, with its
+                         status, size, latency and retries (eg: a LatencyCollector).
         """
         if not port:
             port = 80 if scheme == "http" else 443
-        self.base_url = f"{scheme}://{host}:{port}"
+        self.origin = f"{scheme}://{host}:{port}"
+        self.base_url = self.origin
 
         if path:
             self.base_url += f"/{path}"
@@ -53,8 +163,25 @@ class SyncWebDAVClient:
 
         if cert is not None:
             args["cert"] = cert
+        if limits is not None:
+            args["limits"] = limits
+        if timeout is not None:
+            args["timeout"] = timeout
+        if http2:
+            args["http2"] = True
+        if transport is not None:
+            args["transport"] = transport
 
         self._client = SyncClient(**args)
+        self.content_cache = content_cache
+        self.metadata_cache = metadata_cache
+        self.retry = retry
+        self.metrics = ClientMetrics()
+        self.limiter = limiter
+        self._gate = SyncConcurrencyGate(limiter) if limiter is not None else None
+        self.coalesce = coalesce
+        self._in_flight = SyncSingleFlight()
+        self.instruments = list(instruments)
 
     def close(self) -> None:
         """Closes the underlying HTTP transports and proxies."""
@@ -78,23 +205,139 @@ class SyncWebDAVClient:
 
         Args:
             method: The request method to be used
-            path: The path to send the request to
+            path: The path to send the request to, relative to the base URL.
+                  Absolute URLs (for resources outside the base URL) are used as is,
+                  and must already be quoted.
 
         Note:
             1) Any extra kwargs passed to this method are directly passed
             unchanged to [`httpx.request`](https://www.python-httpx.org/api/#helper-functions)
             2) If a headers kwarg is passed, it will be merged with the default headers before
             sending the request.
+            3) If the client has a retry policy, failed requests are sent again (see
+            `RetryPolicy`); the returned response is that of the last attempt.
+            4) Unless coalescing is turned off, a GET, HEAD or PROPFIND request identical to
+            one already in flight (same URL, headers and body) isn't sent again; it gets
+            the same response (or exception) as the one in flight. Requests in flight when
+            the client writes to their path (or to a collection around it, or inside it)
+            with put, delete, mkcol, move or copy aren't joined by later ones.
         """
-        req_headers = {**DEFAULT_HEADERS}
-        extra_headers = kwargs.pop("headers", None)
-        if extra_headers is not None:
-            req_headers.update(extra_headers)
+        req_headers = self._build_headers(kwargs.pop("headers", None))
+        url = _quote_url(path)
+        if not self.coalesce or not _is_coalescible(method, kwargs):
+            return DAVResponse(self._send(method, url, req_headers, kwargs))
 
-        res = self._client.request(method, quote(path), headers=req_headers, **kwargs)
-        logger.debug("Headers: %s\n", str(req_headers))
+        key = (method, url, tuple(sorted(req_headers.items())), kwargs.get("content"))
+        if key in self._in_flight:
+            self.metrics.record_coalesced()
+        res = self._in_flight.do(
+            key, lambda: self._send(method, url, req_headers, kwargs)
+        )
         return DAVResponse(res)
 
+    def _send(
+        self,
+        method: RequestMethodLiteral,
+        url: str,
+        req_headers: Dict[str, str],
+        kwargs: Dict[str, Any],
+    ) -> Response:
+        """Sends a request and reads the response body (see `request`)."""
+        with self._open(method, url, req_headers, kwargs, read=True) as res:
+            return res
+
+    @contextmanager
+    def stream(
+        self,
+        method: RequestMethodLiteral,
+        path: str,
+        **kwargs: Any,
+    ) -> Iterator[DAVResponse]:
+        """Run an arbitrary DAV request, without reading the response body up front.
+
+        Args:
+            method: The request method to be used
+            path: The path to send the request to
+
+        Note:
+            This is a context manager; the body can be consumed chunk by chunk through
+            `response.orig` while the context is open. Extra kwargs are treated the same
+            way as in `request`, including retries; only failures before the response is
+            handed over are retried.
+        """
+        req_headers = self._build_headers(kwargs.pop("headers", None))
+        with self._open(method, _quote_url(path), req_headers, kwargs) as res:
+            yield DAVResponse(res)
+
+    @contextmanager
+    def _open(
+        self,
+        method: RequestMethodLiteral,
+        url: str,
+        req_headers: Dict[str, str],
+        kwargs: Dict[str, Any],
+        *,
+        read: bool = False,
+    ) -> Iterator[Response]:
+        """
+        Sends a request, retrying it according to the retry policy, and yields the response
+        once its headers arrive (or once its body has been read, if read is True). The
+        request is reported to the client's instruments when this context exits.
+        """
+        event = RequestEvent(method, url)
+        self._instrument("request_started", event)
+        res: Optional[Response] = None
+        attempt = 0
+        yielded = False
+        try:
+            while True:
+                attempt += 1
+                self.metrics.record_request()
+                self._acquire_slot()
+                started = time.monotonic()
+                released = False
+                try:
+                    with self._client.stream(
+                        method, url, headers=req_headers, **kwargs
+                    ) as res:
+                        event.ttfb = time.monotonic() - started
+                        event.status = res.status_code
+                        # the slot is only held until the headers arrive, so that a caller
+                        # reading the body slowly (or sending other requests) doesn't hold it
+                        released = True
+                        self._release_slot(started, kwargs, status=res.status_code)
+                        logger.debug("Headers: %s\n", str(req_headers))
+                        delay = self._retry_delay(
+                            method, url, attempt, kwargs, response=res
+                        )
+                        if delay is None:
+                            if read:
+                                SyncReadResponse(res)
+                            yielded = True
+                            yield res
+                            return
+                except BaseException as err:
+                    if not released:
+                        self._release_slot(started, kwargs, error=err)
+                    # errors raised while the caller was reading the response aren't retried
+                    if yielded or not isinstance(err, TransportError):
+                        raise
+                    delay = self._retry_delay(method, url, attempt, kwargs, error=err)
+                    if delay is None:
+                        raise
+                SyncSleep(delay)
+        except BaseException as err:
+            if not yielded:
+                event.error = err
+            raise
+        finally:
+            event.duration = time.monotonic() - event.started
+            event.retries = attempt - 1
+            if res is not None:
+                event.bytes_sent = int(res.request.headers.get("Content-Length", 0))
+                event.bytes_received = res.num_bytes_downloaded
+            self._instrument("request_finished", event)
+
     def propfind(
         self,
         path: str,
@@ -114,22 +357,308 @@ class SyncWebDAVClient:
         if not path.endswith("/"):
             path += "/"
 
-        if properties:
-            root = ET.Element(
-                "d:propfind",
-                {
-                    "xmlns:d": "DAV:",
-                    "xmlns:oc": "http://owncloud.org/ns",
-                },
+        return self.request(
+            "PROPFIND",
+            path,
+            headers={"Depth": depth},
+            content=_propfind_body(properties),
+        )
+
+    def list_resources(
+        self,
+        path: str,
+        *,
+        depth: Literal["0", "1", "infinity"] = "1",
+        properties: Optional[List[str]] = None,
+    ) -> List[Resource]:
+        """Runs a PROPFIND request, and parses the response into Resource objects.
+
+        If the client has a metadata_cache, listings are served from it while they
+        are fresh.
+
+        Args:
+            path: The path to send the request to
+            depth: Depth of the listing
+            properties: List of properties to request.
+        Raises:
+            DAVException: If the server returns an error status.
+        """
+        key = MetadataCache.key(path, depth, properties)
+        if self.metadata_cache is not None:
+            cached = self.metadata_cache.get(key)
+            if cached is not None:
+                return cached
+
+        res = self.propfind(path, depth=depth, properties=properties)
+        res.raise_for_status()
+        resources = response_to_resources(res)
+        if self.metadata_cache is not None:
+            self.metadata_cache.put(key, resources)
+        return resources
+
+    def iter_resources(
+        self,
+        path: str,
+        *,
+        depth: Literal["0", "1", "infinity"] = "1",
+        properties: Optional[List[str]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        compact: bool = False,
+    ) -> Iterator[AnyResource]:
+        """Runs a PROPFIND request, yielding Resource objects as the response streams in.
+
+        Unlike `propfind` followed by `response_to_resources`, the response body is
+        never held in memory as a whole, which makes this suitable for very large
+        (eg: Depth: infinity) listings.
+
+        Args:
+            path: The path to send the request to
+            depth: Depth of the listing
+            properties: List of properties to request.
+            chunk_size: The size of the chunks fed to the parser, in bytes
+            compact: Yield memory compact CompactResource objects instead of Resources.
+                     Collect them into a `ResourceTable` for sorting/filtering huge listings.
+        Raises:
+            DAVException: If the server returns an error status.
+        """
+        if not path.endswith("/"):
+            path += "/"
+
+        parser = ResourceParser(compact=compact)
+        with self.stream(
+            "PROPFIND",
+            path,
+            headers={"Depth": depth},
+            content=_propfind_body(properties),
+        ) as res:
+            res.raise_for_status()
+            for chunk in SyncIterBytes(res.orig, chunk_size):
+                for resource in parser.feed(chunk):
+                    yield resource
+        for resource in parser.close():
+            yield resource
+
+    def walk(
+        self,
+        path: str = "/",
+        *,
+        max_concurrency: int = 8,
+        properties: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+    ) -> Iterator[Resource]:
+        """Lists everything below a collection, for servers that don't allow Depth: infinity.
+
+        Collections are expanded breadth-first with Depth: 1 PROPFINDs, up to max_concurrency
+        of them at once, and the resources of each listing are yielded as soon as it arrives.
+        Each resource is yielded once, even if the server lists it more than once.
+
+        Args:
+            path: The collection to walk
+            max_concurrency: The maximum number of PROPFIND requests in flight at once
+            properties: List of properties to request.
+            max_depth: How many levels below path to list; the members of path are at
+                       depth 1. Collections at max_depth are yielded, but not expanded.
+        Raises:
+            DAVException: If listing any of the collections fails.
+        """
+        seen = {"/" + path.strip("/")}
+
+        def list_collection(collection: str, depth: int) -> Tuple[int, List[Resource]]:
+            resources = self.list_resources(
+                collection, depth="1", properties=properties
             )
-            prop = ET.SubElement(root, "d:prop")
-            for i in properties:
-                ET.SubElement(prop, i)
-            content = ET.tostring(root)
+            return depth, resources
+
+        with SyncCompletionPool(max_concurrency) as pool:
+            pool.submit(list_collection, path, 1)
+            while pool:
+                for depth, resources in pool.next_completed():
+                    for resource in resources:
+                        member = href_to_path(resource.href, self.base_url)
+                        key = "/" + member.strip("/")
+                        if key in seen:  # the listed collection itself, or a duplicate
+                            continue
+                        seen.add(key)
+                        if resource.properties["type"] == "collection" and (
+                            max_depth is None or depth < max_depth
+                        ):
+                            pool.submit(list_collection, member, depth + 1)
+                        yield resource
+
+    def search(
+        self,
+        path: str = "/",
+        *,
+        depth: Literal["0", "1", "infinity"] = "infinity",
+        type: Optional[Literal["file", "collection"]] = None,
+        name: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None,
+        order_by: Optional[Literal["name", "size", "mtime"]] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        properties: Optional[List[str]] = None,
+    ) -> List[Resource]:
+        """Searches a collection on the server, with a SEARCH request (RFC 5323), instead of
+        listing it and filtering the listing locally.
+
+        The conditions are the same as those of `ResourceTable.filter`, and all of them have
+        to match.
+
+        Args:
+            path: The collection to search in
+            depth: How deep below path to search
+            type: Only match files, or only collections
+            name: A glob pattern (eg: *.jpg) the name should match
+            min_size: Minimum size in bytes (inclusive)
+            max_size: Maximum size in bytes (inclusive)
+            modified_after: Only match entries modified at or after this timestamp
+            modified_before: Only match entries modified before this timestamp
+            order_by: Sort the results by name, size or modification time
+            descending: Sort in descending order
+            limit: The maximum number of results
+            properties: List of properties to return for each result
+        Raises:
+            DAVException: If the server returns an error status; servers that don't
+                          support SEARCH usually answer with 405 or 501.
+        """
+        if not path.endswith("/"):
+            path += "/"
+        scope = urlsplit(self.base_url).path.rstrip("/") + path
+        res = self.request(
+            "SEARCH",
+            path,
+            content=search_body(
+                quote(scope),
+                depth=depth,
+                type=type,
+                name=name,
+                min_size=min_size,
+                max_size=max_size,
+                modified_after=modified_after,
+                modified_before=modified_before,
+                order_by=order_by,
+                descending=descending,
+                limit=limit,
+                properties=properties,
+            ),
+        )
+        res.raise_for_status()
+        return response_to_resources(res)
+
+    def sync_collection(
+        self,
+        path: str,
+        sync_token: Optional[str] = None,
+        *,
+        depth: Literal["1", "infinity"] = "1",
+        properties: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> SyncCollectionResult:
+        """Runs a sync-collection REPORT (RFC 6578), returning the members of the collection
+        that changed, or were removed, since sync_token.
+
+        Args:
+            path: The path of the collection
+            sync_token: The token returned by an earlier call; without one, all the members
+                        are reported as changed
+            depth: Whether to report changes to direct members only, or to the whole tree
+            properties: List of properties to request for the changed members
+            limit: The maximum number of changes the server should report at once; if there
+                   are more, the result is truncated
+        Raises:
+            DAVException: If the server returns an error status. An invalid (or expired)
+                          token is reported with 403 or 409.
+        """
+        if not path.endswith("/"):
+            path += "/"
+        res = self.request(
+            "REPORT",
+            path,
+            headers={"Depth": "0"},
+            content=_sync_collection_body(sync_token, depth, properties, limit),
+        )
+        res.raise_for_status()
+        return response_to_sync_result(res)
+
+    def poll_changes(
+        self,
+        path: str,
+        store: SyncTokenStore,
+        *,
+        depth: Literal["1", "infinity"] = "1",
+        properties: Optional[List[str]] = None,
+    ) -> SyncCollectionResult:
+        """Returns what changed in a collection since the last poll, and saves the new
+        position in store.
+
+        Uses sync-collection REPORTs, fetching all the pages of a truncated result, and starts
+        over if the stored token is no longer valid. If the server doesn't support
+        sync-collection, the changes are worked out by comparing the ETags from a PROPFIND
+        with the ones stored by the last poll. The first poll reports all the members.
+
+        Args:
+            path: The path of the collection
+            store: Where the sync token (or ETags) of the collection are kept between polls
+            depth: Whether to report changes to direct members only, or to the whole tree
+            properties: List of properties to request for the changed members
+        """
+        token = store.get_token(path)
+        try:
+            try:
+                result = self.sync_collection(
+                    path, token, depth=depth, properties=properties
+                )
+            except DAVException as err:
+                if token is None or err.status_code not in (403, 409):
+                    raise
+                logger.debug("Sync token for %s was rejected, starting over", path)
+                result = self.sync_collection(
+                    path, None, depth=depth, properties=properties
+                )
+        except DAVException as err:
+            if err.status_code not in _SYNC_COLLECTION_UNSUPPORTED:
+                raise
+            result = self._etag_changes(path, store, depth, properties)
         else:
-            content = None
+            while result.truncated and result.sync_token:
+                page = self.sync_collection(
+                    path, result.sync_token, depth=depth, properties=properties
+                )
+                result = _merge_sync_results(result, page)
+            store.set_token(path, result.sync_token or "")
+        store.save()
+        return result
 
-        return self.request("PROPFIND", path, headers={"Depth": depth}, content=content)
+    def _etag_changes(
+        self,
+        path: str,
+        store: SyncTokenStore,
+        depth: Literal["1", "infinity"],
+        properties: Optional[List[str]],
+    ) -> SyncCollectionResult:
+        """Works out the changes in a collection from its ETags, for servers without sync-collection."""
+        # not list_resources: a cached listing could hide changes
+        res = self.propfind(path, depth=depth, properties=properties)
+        res.raise_for_status()
+        # the first entry is the collection itself
+        members = response_to_resources(res)[1:]
+        etags = {r.href: r.properties.get("etag", "") for r in members}
+        previous = store.get_etags(path)
+        result = SyncCollectionResult(sync_token=None)
+        if previous is None:
+            result.changed = members
+        else:
+            result.changed = [
+                r
+                for r in members
+                if r.href not in previous or previous[r.href] != etags[r.href]
+            ]
+            result.removed = [href for href in previous if href not in etags]
+        store.set_etags(path, etags)
+        return result
 
     def get(self, path: str, **kwargs: Any) -> DAVResponse:
         """Runs a GET request.
@@ -138,17 +667,252 @@ class SyncWebDAVClient:
             path: The path to send the request to
 
         Note:
-            Any extra keyword arguments passed to this method are passed
+            1) Any extra keyword arguments passed to this method are passed
             unchanged to [`httpx.request`](https://www.python-httpx.org/api/#helper-functions)
+            2) If the client has a content_cache, cached files are requested conditionally,
+            and served from the cache if they haven't changed on the server. Such responses
+            have `from_cache` set to True.
+        """
+        if self.content_cache is None or "Range" in (kwargs.get("headers") or {}):
+            return self.request("GET", path, **kwargs)
+
+        url = self.base_url + _quote_url(path)
+        headers = {**(kwargs.pop("headers", None) or {})}
+        conditional = self.content_cache.conditional_headers(url)
+        res = self.request("GET", path, headers={**headers, **conditional}, **kwargs)
+        orig = self.content_cache.handle_response(url, res.orig)
+        if orig.status_code == 304 and conditional:
+            # the cached copy went missing; fetch the body again
+            return self.request("GET", path, headers=headers, **kwargs)
+        return DAVResponse(orig, from_cache=orig is not res.orig)
+
+    def iter_content(
+        self, path: str, *, chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs: Any
+    ) -> Iterator[bytes]:
+        """Runs a GET request, yielding the response body in chunks as it arrives.
+
+        Args:
+            path: The path to send the request to
+            chunk_size: The (maximum) size of each yielded chunk, in bytes
+        Raises:
+            DAVException: If the server returns an error status.
+        """
+        with self.stream("GET", path, **kwargs) as res:
+            res.raise_for_status()
+            for chunk in SyncIterBytes(res.orig, chunk_size):
+                yield chunk
+
+    def download_to(
+        self,
+        path: str,
+        target_fp: Path,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        resume: bool = False,
+        max_attempts: int = 5,
+        progress: Optional[ProgressCallback] = None,
+        **kwargs: Any,
+    ) -> int:
+        """Downloads the file at path into target_fp, without buffering the whole body in memory.
+
+        Args:
+            path: The path of the file on the server
+            target_fp: The local file to write to
+            chunk_size: The size of the chunks written to disk, in bytes
+            resume: Whether to pick up from where an earlier, interrupted download
+                    to target_fp left off, and to retry from the last byte received
+                    if the connection drops.
+            max_attempts: How many times to try the download when resuming.
+            progress: Called with (bytes written, size of the file) as the download
+                      goes; see `TransferProgress`. Resumed downloads count the bytes
+                      that were already there.
+        Returns:
+            The size of the downloaded file.
+        Raises:
+            DAVException: If the server returns an error status. The local file is
+            not created in this case.
+
+        Note:
+            While a resumable download is in progress, the ETag (or Last-Modified date)
+            of the remote file is kept next to target_fp in a `<name>.resume` file.
+            Resumed requests send it as If-Range, so that the download starts over if
+            the file has changed on the server in the meantime.
+        """
+        if resume:
+            return self._resume_download(
+                path, target_fp, chunk_size, max_attempts, progress, **kwargs
+            )
+
+        written = 0
+        with self.stream("GET", path, **kwargs) as res:
+            res.raise_for_status()
+            total = _download_size(res)
+            if progress is not None:
+                progress(written, total)
+            with open(target_fp, "wb") as f:
+                for chunk in SyncIterBytes(res.orig, chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+                    if progress is not None:
+                        progress(written, total)
+        return written
+
+    def _resume_download(
+        self,
+        path: str,
+        target_fp: Path,
+        chunk_size: int,
+        max_attempts: int,
+        progress: Optional[ProgressCallback],
+        **kwargs: Any,
+    ) -> int:
+        marker = target_fp.with_name(target_fp.name + ".resume")
+        extra_headers = kwargs.pop("headers", None) or {}
+        failures = 0
+        while True:
+            offset = 0
+            headers = {**extra_headers}
+            if target_fp.exists() and marker.exists():
+                offset = target_fp.stat().st_size
+                validator = marker.read_text()
+                headers["Range"] = f"bytes={offset}-"
+                if validator:
+                    headers["If-Range"] = validator
+
+            try:
+                with self.stream("GET", path, headers=headers, **kwargs) as res:
+                    if res.status_code == 416:
+                        # nothing left to download, unless the remote file shrunk
+                        total = res.orig.headers.get("Content-Range", "").split("/")[-1]
+                        if total == str(offset):
+                            break
+                        marker.unlink()
+                        continue
+                    res.raise_for_status()
+                    if res.status_code != 206:  # full body; start over
+                        offset = 0
+                    marker.write_text(_range_validator(res))
+                    total = _download_size(res)
+                    if progress is not None:
+                        progress(offset, total)
+                    with open(target_fp, "r+b" if offset else "wb") as f:
+                        f.seek(offset)
+                        f.truncate()
+                        for chunk in SyncIterBytes(res.orig, chunk_size):
+                            f.write(chunk)
+                            offset += len(chunk)
+                            if progress is not None:
+                                progress(offset, total)
+                break
+            except TransportError as err:
+                failures += 1
+                if failures >= max_attempts:
+                    raise
+                logger.debug("Download of %s interrupted (%r), resuming", path, err)
+
+        marker.unlink(missing_ok=True)
+        return target_fp.stat().st_size
+
+    def get_parallel(
+        self,
+        path: str,
+        target_fp: Path,
+        *,
+        parts: int = 4,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> int:
+        """Downloads the file at path into target_fp, fetching `parts` byte ranges concurrently.
+
+        The size of the file is found with a HEAD request, and each part is written into
+        a preallocated file at its own offset. Falls back to a single streamed GET
+        (see `download_to`) if the server doesn't support range requests, or sends back
+        a part that doesn't match the range asked for.
+
+        Args:
+            path: The path of the file on the server
+            target_fp: The local file to write to
+            parts: The number of ranges to fetch concurrently
+            chunk_size: The size of the chunks written to disk, in bytes
+            headers: Extra headers to send with each request
+        Returns:
+            The number of bytes written.
         """
-        return self.request("GET", path, **kwargs)
+        headers = headers or {}
+        head = self.request("HEAD", path, headers=headers)
+        head.raise_for_status()
+        size = int(head.orig.headers.get("Content-Length", -1))
+        accepts_ranges = head.orig.headers.get("Accept-Ranges", "").lower() == "bytes"
+
+        if parts <= 1 or size < 2 or not accepts_ranges:
+            return self.download_to(
+                path, target_fp, chunk_size=chunk_size, headers=headers
+            )
+
+        # If-Range makes sure that all the parts come from the same version of the file;
+        # if it changes midway, the server sends back the full body instead of a part.
+        validator = _range_validator(head)
+        range_headers = {**headers}
+        if validator:
+            range_headers["If-Range"] = validator
 
-    def put(self, path: str, *, content: bytes, **kwargs: Any) -> DAVResponse:
+        with open(target_fp, "wb") as f:
+            f.truncate(size)
+
+        def fetch_range(byte_range: Tuple[int, int]) -> bool:
+            start, end = byte_range
+            with self.stream(
+                "GET", path, headers={**range_headers, "Range": f"bytes={start}-{end}"}
+            ) as res:
+                res.raise_for_status()
+                # the range may be ignored, or a different one sent back
+                if res.status_code != 206 or _content_range_start(res) != start:
+                    return False
+                written = 0
+                with open(target_fp, "r+b") as f:
+                    f.seek(start)
+                    for chunk in SyncIterBytes(res.orig, chunk_size):
+                        f.write(chunk)
+                        written += len(chunk)
+            # a short part would leave a zero-filled hole in the file
+            return written == end - start + 1
+
+        ranges = byte_ranges(size, parts)
+        results = SyncTaskPool(len(ranges)).map(fetch_range, ranges)
+        if not all(results):
+            logger.debug(
+                "Range requests not honoured for %s, falling back to GET", path
+            )
+            return self.download_to(
+                path, target_fp, chunk_size=chunk_size, headers=headers
+            )
+        return size
+
+    def put(
+        self,
+        path: str,
+        *,
+        content: UploadContent,
+        length: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None,
+        **kwargs: Any,
+    ) -> DAVResponse:
         """Runs a PUT request.
 
         Args:
             path: The path to send the request to
-            content: The content to be sent
+            content: The content to be sent. Can be bytes, str (sent UTF-8 encoded), an
+                     open binary file, an mmap, or an iterable (or async iterable, for the
+                     async client) of bytes. Files, mmaps and iterables are streamed in
+                     chunks, without being read into memory all at once.
+            length: The size of the content in bytes, sent as the Content-Length header.
+                    Worked out automatically for bytes, files and mmaps; iterables of unknown
+                    size are sent with chunked transfer encoding.
+            chunk_size: The size of the chunks read from files and mmaps
+            progress: Called with (bytes sent, length) as httpx sends the content;
+                      see `TransferProgress`. It starts over from 0 if the request
+                      is retried.
 
         Note:
             1) Any extra keyword arguments passed to this method are passed
@@ -156,7 +920,200 @@ class SyncWebDAVClient:
             2) Trying to create a file, whose intermediate directories haven't been made will result
             in an error. (eg: trying to create /a/b/c.txt when /a/b doesn't exist)
         """
-        return self.request("PUT", path, content=content, **kwargs)
+        if isinstance(content, str):  # as httpx does; iterating would yield characters
+            content = content.encode("utf-8")
+        if length is None:
+            length = content_length(content)
+        body = SyncUploadBody(content, chunk_size)
+        if progress is not None:
+            body = SyncProgressBody(body, progress, length, chunk_size)
+        headers = kwargs.pop("headers", None) or {}
+        if length is not None and not isinstance(body, bytes):
+            headers = {"Content-Length": str(length), **headers}
+
+        res = self.request("PUT", path, content=body, headers=headers, **kwargs)
+        self._invalidate(path)
+        return res
+
+    def put_resumable(
+        self,
+        path: str,
+        source_fp: Path,
+        *,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_attempts: int = 5,
+        progress: Optional[ProgressCallback] = None,
+    ) -> DAVResponse:
+        """Uploads source_fp to path in segments, resuming after dropped connections.
+
+        Each segment is sent as a PUT with a Content-Range header. The ETag the server
+        answers each segment with is saved next to source_fp, in `<name>.resume`, along
+        with the size and modification time of source_fp. When the connection drops (or
+        when called again after an interrupted upload), the upload continues after the
+        last segment the server acknowledged, but only if source_fp hasn't changed and
+        the file on the server still has that ETag; the segments are sent with If-Match,
+        so the upload starts over if the file on the server changes midway. Servers that
+        don't send strong ETags get the whole file again after a dropped connection.
+
+        Servers that reject partial PUTs get the whole file in a single (streamed) PUT
+        instead, as do servers that accept them but ignore the Content-Range: the size
+        of the file on the server is checked after the first segment sent at an offset,
+        and after the last one.
+
+        Args:
+            path: The path to upload the file to
+            source_fp: The local file to upload
+            segment_size: The number of bytes sent per request
+            chunk_size: The size of the chunks read from the file
+            max_attempts: How many dropped connections to tolerate before giving up
+            progress: Called with (bytes on the server, size of source_fp) as the
+                      segments are sent; see `TransferProgress`.
+        Returns:
+            The response to the last request sent.
+        """
+        stat = source_fp.stat()
+        total = stat.st_size
+        marker = source_fp.with_name(source_fp.name + ".resume")
+        source = f"{path}:{total}:{stat.st_mtime_ns}"
+        offset, etag = self._resume_offset(path, marker, source)
+
+        def segment_progress(sent: int, _: Optional[int]) -> None:
+            if progress is not None:
+                progress(offset + sent, total)
+
+        failures = 0
+        verified = False  # whether the server has been seen to honour Content-Range
+        with open(source_fp, "rb") as f:
+            while True:
+                length = min(segment_size, total - offset)
+                headers = {}
+                if length < total:  # a single segment is sent as a plain PUT
+                    headers[
+                        "Content-Range"
+                    ] = f"bytes {offset}-{offset + length - 1}/{total}"
+                if etag:
+                    headers["If-Match"] = etag
+                f.seek(offset)
+                try:
+                    res = self.put(
+                        path,
+                        content=FileChunks(f, chunk_size, length=length),
+                        length=length,
+                        headers=headers,
+                        progress=None if progress is None else segment_progress,
+                    )
+                except TransportError as err:
+                    failures += 1
+                    if failures >= max_attempts:
+                        raise
+                    logger.debug("Upload to %s interrupted (%r), resuming", path, err)
+                    offset, etag = self._resume_offset(path, marker, source)
+                    continue
+
+                if etag and res.status_code == 412:
+                    # the file changed on the server since the last segment
+                    failures += 1
+                    if failures >= max_attempts:
+                        res.raise_for_status()
+                    logger.debug("%s changed on the server, starting over", path)
+                    marker.unlink(missing_ok=True)
+                    offset, etag = 0, ""
+                    continue
+
+                partial = "Content-Range" in headers
+                whole = partial and res.status_code in (400, 501)
+                if not whole:
+                    res.raise_for_status()
+                # servers that ignore Content-Range replace the file with each segment;
+                # the size only tells them apart once a segment is sent at an offset
+                if not whole and partial and offset > 0:
+                    if not verified or offset + length >= total:
+                        size = self._remote_size(path)
+                        whole = size != offset + length
+                        verified = not whole
+                if whole:
+                    # partial PUTs are not supported, send the whole file instead
+                    logger.debug(
+                        "Partial PUTs not applied to %s, sending it whole", path
+                    )
+                    marker.unlink(missing_ok=True)
+                    f.seek(0)
+                    res = self.put(
+                        path, content=f, chunk_size=chunk_size, progress=progress
+                    )
+                    res.raise_for_status()
+                    return res
+
+                offset += length
+                if offset >= total:
+                    marker.unlink(missing_ok=True)
+                    return res
+                etag = _strong_etag(res)
+                if etag:
+                    state = {"source": source, "offset": offset, "etag": etag}
+                    marker.write_text(json.dumps(state))
+                else:  # nothing to resume from
+                    marker.unlink(missing_ok=True)
+
+    def put_chunked(
+        self,
+        path: str,
+        source_fp: Path,
+        *,
+        uploads_url: Optional[str] = None,
+        chunk_size: int = DEFAULT_SEGMENT_SIZE,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+    ) -> DAVResponse:
+        """Uploads source_fp to path with the ownCloud/Nextcloud chunked upload protocol.
+
+        The chunks are uploaded concurrently, failed chunks are retried on their own,
+        and calling this again after an interrupted upload only sends the missing chunks.
+        See `AsyncChunkedUploader` for details on the arguments.
+
+        Returns:
+            The response to the final MOVE request, which assembles the file.
+        """
+        uploader = SyncChunkedUploader(
+            self,
+            uploads_url=uploads_url,
+            chunk_size=chunk_size,
+            concurrency=concurrency,
+            max_attempts=max_attempts,
+        )
+        res = uploader.upload(source_fp, path)
+        self._invalidate(path)
+        return res
+
+    def _resume_offset(self, path: str, marker: Path, source: str) -> Tuple[int, str]:
+        """Where to continue an upload from, and the ETag the file at path must have.
+
+        (0, "") unless marker records an interrupted upload of the same source file
+        to path, and the file on the server is still as that upload left it.
+        """
+        try:
+            state = json.loads(marker.read_text())
+        except (OSError, ValueError):
+            return 0, ""
+        if state.get("source") != source or not state.get("etag"):
+            return 0, ""
+        res = self.request("HEAD", path)
+        if res.status_code == 404:
+            return 0, ""
+        res.raise_for_status()
+        size = int(res.orig.headers.get("Content-Length", -1))
+        if _strong_etag(res) != state["etag"] or size != state["offset"]:
+            return 0, ""
+        return state["offset"], state["etag"]
+
+    def _remote_size(self, path: str) -> Optional[int]:
+        """Size of the file at path, from a HEAD request; None if it doesn't exist."""
+        res = self.request("HEAD", path)
+        if res.status_code == 404:
+            return None
+        res.raise_for_status()
+        return int(res.orig.headers.get("Content-Length", 0))
 
     def move(self, src_path: str, target_path: str) -> DAVResponse:
         """Runs a MOVE request.
@@ -188,7 +1145,9 @@ class SyncWebDAVClient:
         """
         if not path.endswith("/"):
             path += "/"
-        return self.request("MKCOL", path)
+        res = self.request("MKCOL", path)
+        self._invalidate(path)
+        return res
 
     def delete(self, path: str) -> DAVResponse:
         """Runs a DELETE request.
@@ -196,7 +1155,239 @@ class SyncWebDAVClient:
         Args:
             path: The path to the file or directory to delete
         """
-        return self.request("DELETE", path)
+        res = self.request("DELETE", path)
+        self._invalidate(path)
+        return res
+
+    def batch(self, *, concurrency: int = 8) -> SyncBatch:
+        """Returns a batch, which collects operations to be run together with `run_many`."""
+        return SyncBatch(self, concurrency=concurrency)
+
+    def run_many(
+        self, operations: Iterable[Operation], *, concurrency: int = 8
+    ) -> List[OperationResult]:
+        """Runs many operations, with at most `concurrency` of them in flight at once.
+
+        Args:
+            operations: The client method calls to run, eg: Operation("delete", ("/a.txt",))
+            concurrency: The maximum number of operations running at the same time
+        Returns:
+            The result of each operation, in the same order as the operations. Exceptions
+            raised by an operation are kept in its result instead of being raised.
+        Raises:
+            ValueError: If an operation refers to a method the client doesn't have.
+        """
+        operations = list(operations)
+        for op in operations:
+            if op.method.startswith("_") or not callable(
+                getattr(self, op.method, None)
+            ):
+                raise ValueError(f"Unknown operation: {op.method}")
+
+        def run(op: Operation) -> OperationResult:
+            try:
+                result = getattr(self, op.method)(*op.args, **op.kwargs)
+            except Exception as err:
+                return OperationResult(op, error=err)
+            return OperationResult(op, result=result)
+
+        return SyncTaskPool(concurrency).map(run, operations)
+
+    def upload_tree(
+        self,
+        local_dir: Path,
+        remote_dir: str,
+        *,
+        concurrency: int = 8,
+        max_bytes_in_flight: int = 64 * 1024 * 1024,
+    ) -> List[TransferResult]:
+        """Uploads a local directory, recursively, into remote_dir.
+
+        Missing collections are created parent-first (existing ones are left as they are),
+        then the files are uploaded concurrently.
+
+        Args:
+            local_dir: The local directory to upload
+            remote_dir: The collection on the server to upload into
+            concurrency: The maximum number of requests in flight at once
+            max_bytes_in_flight: The maximum total size of the files being transferred at once
+        Returns:
+            The result of each file transfer. A failed transfer doesn't stop the others;
+            its error is kept in the result.
+        """
+        return upload_tree(
+            self,
+            Path(local_dir),
+            remote_dir,
+            concurrency=concurrency,
+            max_bytes_in_flight=max_bytes_in_flight,
+        )
+
+    def download_tree(
+        self,
+        remote_dir: str,
+        local_dir: Path,
+        *,
+        concurrency: int = 8,
+        max_bytes_in_flight: int = 64 * 1024 * 1024,
+    ) -> List[TransferResult]:
+        """Downloads a collection, recursively, into local_dir.
+
+        The collection is listed one level at a time (with concurrent Depth: 1 PROPFINDs),
+        then the files are downloaded concurrently.
+
+        Args:
+            remote_dir: The collection on the server to download
+            local_dir: The local directory to download into; created if it doesn't exist
+            concurrency: The maximum number of requests in flight at once
+            max_bytes_in_flight: The maximum total size of the files being transferred at once
+        Returns:
+            The result of each file transfer. A failed transfer doesn't stop the others;
+            its error is kept in the result. Members listed with an href outside of
+            remote_dir (or one that would be written outside of local_dir) aren't
+            downloaded, and get a failed result with a ValueError.
+        """
+        return download_tree(
+            self,
+            remote_dir,
+            Path(local_dir),
+            concurrency=concurrency,
+            max_bytes_in_flight=max_bytes_in_flight,
+        )
+
+    def sync(
+        self,
+        local_dir: Path,
+        remote_dir: str,
+        *,
+        direction: SyncDirection = "upload",
+        delete: bool = False,
+        dry_run: bool = False,
+        state_file: Optional[Path] = None,
+        checksums: bool = False,
+        concurrency: int = 8,
+        max_bytes_in_flight: int = 64 * 1024 * 1024,
+    ) -> SyncPlan:
+        """Makes remote_dir match local_dir ("upload"), or local_dir match remote_dir ("download"),
+        transferring only the files that differ.
+
+        Files on both sides are compared by size, by the state recorded in state_file by
+        the previous sync (local size/mtime and remote ETag), by checksum (the ownCloud
+        oc:checksums property) if `checksums` is True, and finally by modification time.
+
+        Args:
+            local_dir: The local directory
+            remote_dir: The collection on the server
+            direction: "upload" to update the server, "download" to update local_dir
+            delete: Whether to delete what the source side doesn't have from the target side
+            dry_run: Only work out what would be done; nothing is changed on either side
+            state_file: A JSON file to keep the state of the sync in, between runs
+            checksums: Whether to request and compare file checksums
+            concurrency: The maximum number of requests in flight at once
+            max_bytes_in_flight: The maximum total size of the files being transferred at once
+        Returns:
+            The plan that was carried out; failed actions have their error set. Members
+            listed with an href outside of remote_dir (or one that would be written outside
+            of local_dir) are left out of the plan.
+        Raises:
+            DAVException: If remote_dir can't be listed.
+        """
+        return sync_tree(
+            self,
+            Path(local_dir),
+            remote_dir,
+            direction=direction,
+            delete=delete,
+            dry_run=dry_run,
+            state_file=state_file,
+            checksums=checksums,
+            concurrency=concurrency,
+            max_bytes_in_flight=max_bytes_in_flight,
+        )
+
+    def _invalidate(self, path: str) -> None:
+        """
+        Drops cached listings that could be affected by a change to path, and makes reads
+        of it (or of collections around it) that are in flight not be joined anymore:
+        they may have been answered before the change.
+        """
+        changed = _quote_url(path).rstrip("/")
+        self._in_flight.forget(lambda key: _overlaps(key[1], changed))  # type: ignore
+        if self.metadata_cache is not None and not path.startswith(
+            ("http://", "https://")
+        ):
+            self.metadata_cache.invalidate(path)
+
+    def _instrument(self, hook: str, event: RequestEvent) -> None:
+        for instrument in self.instruments:
+            try:
+                getattr(instrument, hook)(event)
+            except Exception:
+                logger.exception("%s of %r failed", hook, instrument)
+
+    def _acquire_slot(self) -> None:
+        """Waits for the limiter to allow another request in flight."""
+        if self._gate is not None:
+            self._gate.acquire()
+
+    def _release_slot(
+        self,
+        started: float,
+        request_kwargs: Dict[str, Any],
+        *,
+        status: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Frees the slot taken by a request, adjusting the limit by how the request went."""
+        if self._gate is None or self.limiter is None:
+            return
+        content = request_kwargs.get("content")
+        sent = len(content) if isinstance(content, (bytes, str)) else 0
+        sampled = (
+            "files" not in request_kwargs
+            and (content is None or isinstance(content, (bytes, str)))
+            and sent <= _LATENCY_SAMPLE_MAX_BYTES
+        )
+        latency = time.monotonic() - started if sampled else None
+        self.limiter.record(latency, status=status, error=error)
+        self._gate.release()
+
+    def _retry_delay(
+        self,
+        method: str,
+        url: str,
+        attempt: int,
+        request_kwargs: Dict[str, Any],
+        *,
+        response: Optional[Response] = None,
+        error: Optional[TransportError] = None,
+    ) -> Optional[float]:
+        """Returns how long to wait before sending a failed request again; None if it shouldn't be."""
+        if self.retry is None:
+            return None
+        replayable = "files" not in request_kwargs and is_replayable(
+            request_kwargs.get("content")
+        )
+        if not self.retry.is_retryable(
+            method, replayable=replayable, response=response, error=error
+        ):
+            return None
+        if attempt >= self.retry.max_attempts:
+            self.metrics.record_exhausted()
+            return None
+        reason = (
+            str(response.status_code) if response is not None else type(error).__name__
+        )
+        self.metrics.record_retry(reason)
+        delay = self.retry.delay(attempt, response)
+        logger.debug("%s %s failed (%s), retrying in %.2fs", method, url, reason, delay)
+        return delay
+
+    def _build_headers(self, extra: Optional[Dict[str, str]]) -> Dict[str, str]:
+        headers = {**DEFAULT_HEADERS}
+        if extra is not None:
+            headers.update(extra)
+        return headers
 
     def _move_or_copy(
         self, method: Literal["MOVE", "COPY"], src: str, target: str
@@ -205,4 +1396,116 @@ class SyncWebDAVClient:
         if Path(target).suffix == "":  # no file extension at end of path i.e directory
             target += Path(src).name
         headers = {"Destination": self.base_url + quote(target)}
-        return self.request(method, src, headers=headers)
+        res = self.request(method, src, headers=headers)
+        if method == "MOVE":
+            self._invalidate(src)
+        self._invalidate(target)
+        return res
+
+
+def _range_validator(res: DAVResponse) -> str:
+    # weak ETags can't be used with If-Range, the Last-Modified date is used instead
+    etag = res.orig.headers.get("ETag", "")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return res.orig.headers.get("Last-Modified", "")
+
+
+def _strong_etag(res: DAVResponse) -> str:
+    """The ETag of a response, unless it's a weak one (which If-Match never matches)."""
+    etag = res.orig.headers.get("ETag", "")
+    return "" if etag.startswith("W/") else etag
+
+
+def _download_size(res: DAVResponse) -> Optional[int]:
+    """The size of the whole file, from Content-Range (for partial responses) or Content-Length."""
+    size = res.orig.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+    if not size.isdigit():
+        size = res.orig.headers.get("Content-Length", "")
+    return int(size) if size.isdigit() else None
+
+
+def _content_range_start(res: DAVResponse) -> Optional[int]:
+    """The first byte of a partial response, from its Content-Range header."""
+    unit, _, byte_range = res.orig.headers.get("Content-Range", "").partition(" ")
+    start = byte_range.split("-", 1)[0]
+    return int(start) if unit == "bytes" and start.isdigit() else None
+
+
+def _propfind_body(properties: Optional[List[str]]) -> Optional[bytes]:
+    if not properties:
+        return None
+    root = ET.Element(
+        "d:propfind",
+        {
+            "xmlns:d": "DAV:",
+            "xmlns:oc": "http://owncloud.org/ns",
+        },
+    )
+    prop = ET.SubElement(root, "d:prop")
+    for i in properties:
+        ET.SubElement(prop, i)
+    return ET.tostring(root)
+
+
+def _merge_sync_results(
+    first: SyncCollectionResult, then: SyncCollectionResult
+) -> SyncCollectionResult:
+    """Combines two consecutive pages of changes; the later page wins for any member in both."""
+    changed = {r.href: r for r in first.changed}
+    removed = dict.fromkeys(first.removed)
+    for href in then.removed:
+        changed.pop(href, None)
+        removed[href] = None
+    for resource in then.changed:
+        removed.pop(resource.href, None)
+        changed[resource.href] = resource
+    return SyncCollectionResult(
+        sync_token=then.sync_token,
+        changed=list(changed.values()),
+        removed=list(removed),
+        truncated=then.truncated,
+    )
+
+
+def _sync_collection_body(
+    sync_token: Optional[str],
+    depth: Literal["1", "infinity"],
+    properties: Optional[List[str]],
+    limit: Optional[int],
+) -> bytes:
+    root = ET.Element(
+        "d:sync-collection",
+        {
+            "xmlns:d": "DAV:",
+            "xmlns:oc": "http://owncloud.org/ns",
+        },
+    )
+    ET.SubElement(root, "d:sync-token").text = sync_token or ""
+    ET.SubElement(root, "d:sync-level").text = "1" if depth == "1" else "infinite"
+    if limit is not None:
+        ET.SubElement(ET.SubElement(root, "d:limit"), "d:nresults").text = str(limit)
+    prop = ET.SubElement(root, "d:prop")
+    for i in properties or _SYNC_COLLECTION_PROPERTIES:
+        ET.SubElement(prop, i)
+    return ET.tostring(root)
+
+
+def _is_coalescible(method: str, request_kwargs: Dict[str, Any]) -> bool:
+    """Whether a request can share the response of an identical one in flight."""
+    if method not in _COALESCED_METHODS or set(request_kwargs) - {"content"}:
+        return False
+    return isinstance(request_kwargs.get("content"), (bytes, str, type(None)))
+
+
+def _quote_url(path: str) -> str:
+    if path.startswith(("http://", "https://")):
+        return path
+    return quote(path)
+
+
+def _overlaps(url: str, changed: str) -> bool:
+    """Whether url is the same as, inside, or contains changed (without a trailing slash)."""
+    url = url.rstrip("/") + "/"
+    changed += "/"
+    return url.startswith(changed) or changed.startswith(url)
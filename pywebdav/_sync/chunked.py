@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
+
+from urllib.parse import quote, unquote
+
+from httpx import TransportError
+
+from .._unasync_compat import SyncTaskPool
+from ..types import DAVException, DAVResponse
+from ..utils import DEFAULT_CHUNK_SIZE, DEFAULT_SEGMENT_SIZE, FileChunks
+
+if TYPE_CHECKING:
+    from . import SyncWebDAVClient
+
+
+logger = getLogger(__name__)
+
+
+class Chunk(NamedTuple):
+    name: str
+    offset: int
+    length: int
+
+
+class SyncChunkedUploader:
+    """
+    Uploads large files using the ownCloud/Nextcloud chunking protocol.
+
+    The file is split into fixed size chunks, which are uploaded concurrently into an
+    upload collection (under `remote.php/dav/uploads/<user>`), and then assembled on the
+    server by moving the `.file` member of the collection to the target path.
+    Chunks that fail are retried on their own; the rest of the upload is kept.
+    """
+
+    def __init__(
+        self,
+        client: SyncWebDAVClient,
+        *,
+        uploads_url: Optional[str] = None,
+        chunk_size: int = DEFAULT_SEGMENT_SIZE,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+    ) -> None:
+        """
+        Args:
+            client: The client to send requests with
+            uploads_url: The URL of the user's uploads collection. If not passed, it is
+                         worked out from the client's base URL, which should then point to
+                         `remote.php/dav/files/<user>`.
+            chunk_size: The size of each chunk, in bytes
+            concurrency: The number of chunks to upload at once
+            max_attempts: How many times to try uploading each chunk
+        """
+        if uploads_url is None:
+            if "/dav/files/" not in client.base_url:
+                raise ValueError(
+                    "uploads_url must be passed if the base URL is not a remote.php/dav/files/<user> URL"
+                )
+            uploads_url = client.base_url.replace("/dav/files/", "/dav/uploads/", 1)
+
+        self.client = client
+        self.uploads_url = uploads_url.rstrip("/")
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+    def upload(self, source_fp: Path, target_path: str) -> DAVResponse:
+        """Uploads source_fp to target_path (relative to the client's base URL).
+
+        Calling this again after a failed or interrupted upload of the same file to the
+        same target only uploads the chunks that are missing on the server.
+
+        Returns:
+            The response to the final MOVE request.
+        Raises:
+            DAVException: If a chunk could not be uploaded after max_attempts tries, or if
+            the server fails to assemble the file.
+        """
+        size = source_fp.stat().st_size
+        collection = f"{self.uploads_url}/{self.transfer_id(source_fp, target_path)}"
+        destination = self.client.base_url + quote(target_path)
+
+        res = self.client.request(
+            "MKCOL", collection + "/", headers={"Destination": destination}
+        )
+        if res.status_code == 405:  # collection exists; resuming an earlier upload
+            uploaded = self._uploaded_chunks(collection)
+        else:
+            res.raise_for_status()
+            uploaded = {}
+
+        chunks = self.chunks(size)
+        pending = [c for c in chunks if uploaded.get(c.name) != c.length]
+        logger.debug(
+            "Uploading %d of %d chunks to %s", len(pending), len(chunks), collection
+        )
+
+        def upload_chunk(chunk: Chunk) -> Optional[Exception]:
+            try:
+                with open(source_fp, "rb") as f:
+                    f.seek(chunk.offset)
+                    res = self.client.put(
+                        f"{collection}/{chunk.name}",
+                        content=FileChunks(f, DEFAULT_CHUNK_SIZE, length=chunk.length),
+                        length=chunk.length,
+                    )
+                res.raise_for_status()
+            except (DAVException, TransportError) as err:
+                logger.debug("Chunk %s failed: %r", chunk.name, err)
+                return err
+            return None
+
+        pool = SyncTaskPool(self.concurrency)
+        last_error: Optional[Exception] = None
+        for _ in range(self.max_attempts):
+            if not pending:
+                break
+            errors = pool.map(upload_chunk, pending)
+            failed = [chunk for chunk, err in zip(pending, errors) if err is not None]
+            last_error = next((e for e in errors if e is not None), last_error)
+            pending = failed
+
+        if pending:
+            if isinstance(last_error, DAVException):
+                raise last_error
+            raise DAVException(0, f"{len(pending)} chunks failed: {last_error!r}")
+
+        res = self.client.request(
+            "MOVE",
+            f"{collection}/.file",
+            headers={"Destination": destination, "OC-Total-Length": str(size)},
+        )
+        res.raise_for_status()
+        return res
+
+    def discard(self, source_fp: Path, target_path: str) -> DAVResponse:
+        """Deletes the upload collection of an unfinished upload."""
+        collection = f"{self.uploads_url}/{self.transfer_id(source_fp, target_path)}"
+        return self.client.request("DELETE", collection + "/")
+
+    def chunks(self, size: int) -> List[Chunk]:
+        """Splits size bytes into chunks; names are zero padded so that they sort in order."""
+        count = max(1, -(-size // self.chunk_size))
+        width = max(5, len(str(count)))
+        return [
+            Chunk(
+                str(i + 1).zfill(width),
+                i * self.chunk_size,
+                min(self.chunk_size, size - i * self.chunk_size),
+            )
+            for i in range(count)
+        ]
+
+    @staticmethod
+    def transfer_id(source_fp: Path, target_path: str) -> str:
+        """
+        The name of the upload collection. It stays the same for as long as the local
+        file is unchanged, so that interrupted uploads can be resumed.
+        """
+        stat = source_fp.stat()
+        key = f"{source_fp.resolve()}:{stat.st_size}:{stat.st_mtime_ns}:{target_path}"
+        return "pywebdav-" + hashlib.sha1(key.encode()).hexdigest()
+
+    def _uploaded_chunks(self, collection: str) -> Dict[str, int]:
+        """Returns the names and sizes of the chunks already in the upload collection."""
+        res = self.client.request("PROPFIND", collection + "/", headers={"Depth": "1"})
+        res.raise_for_status()
+        chunks = {}
+        for response in res.xml().iterfind("{DAV:}response"):
+            href = unquote(response.findtext("{DAV:}href", "")).rstrip("/")
+            length = response.findtext(".//{DAV:}getcontentlength")
+            if length:
+                chunks[href.rsplit("/", 1)[-1]] = int(length)
+        return chunks
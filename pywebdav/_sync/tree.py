@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import os
+import shutil
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from httpx import TransportError
+
+from .._unasync_compat import SyncByteBudget, SyncTaskPool
+from ..sync import (
+    SyncAction,
+    SyncDirection,
+    SyncEntry,
+    SyncPlan,
+    SyncState,
+    plan_sync,
+    scan_local,
+)
+from ..types import DAVException, TransferResult
+from ..utils import href_to_path, member_path
+
+if TYPE_CHECKING:
+    from . import SyncWebDAVClient
+
+
+logger = getLogger(__name__)
+
+# the properties requested when listing a tree to sync with checksums
+_SYNC_PROPERTIES = [
+    "d:resourcetype",
+    "d:getlastmodified",
+    "d:getetag",
+    "d:getcontentlength",
+    "d:getcontenttype",
+    "oc:checksums",
+]
+
+
+def upload_tree(
+    client: SyncWebDAVClient,
+    local_dir: Path,
+    remote_dir: str,
+    *,
+    concurrency: int = 8,
+    max_bytes_in_flight: int = 64 * 1024 * 1024,
+) -> List[TransferResult]:
+    """Uploads the contents of local_dir into remote_dir. See `AsyncWebDAVClient.upload_tree`."""
+    remote_dir = "/" + remote_dir.strip("/")
+    dirs: List[str] = []
+    files: List[Tuple[Path, str, int]] = []
+    for root, dirnames, filenames in os.walk(local_dir):
+        dirnames.sort()
+        rel_root = Path(root).relative_to(local_dir).as_posix()
+        remote_root = (
+            remote_dir if rel_root == "." else f"{remote_dir.rstrip('/')}/{rel_root}"
+        )
+        dirs.append(remote_root)
+        for name in sorted(filenames):
+            fp = Path(root) / name
+            files.append((fp, f"{remote_root.rstrip('/')}/{name}", fp.stat().st_size))
+
+    pool = SyncTaskPool(concurrency)
+    _create_collections(client, pool, dirs)
+
+    budget = SyncByteBudget(max_bytes_in_flight)
+
+    def upload_file(item: Tuple[Path, str, int]) -> TransferResult:
+        source, target, size = item
+        result = TransferResult(str(source), target, size)
+        budget.acquire(size)
+        try:
+            with open(source, "rb") as f:
+                res = client.put(target, content=f)
+            res.raise_for_status()
+        except (DAVException, TransportError, OSError) as err:
+            logger.debug("Upload of %s failed: %r", source, err)
+            result.error = err
+        finally:
+            budget.release(size)
+        return result
+
+    return pool.map(upload_file, files)
+
+
+def download_tree(
+    client: SyncWebDAVClient,
+    remote_dir: str,
+    local_dir: Path,
+    *,
+    concurrency: int = 8,
+    max_bytes_in_flight: int = 64 * 1024 * 1024,
+) -> List[TransferResult]:
+    """Downloads the contents of remote_dir into local_dir. See `AsyncWebDAVClient.download_tree`."""
+    remote_dir = "/" + remote_dir.strip("/")
+    files: List[Tuple[str, Path, int]] = []
+    rejected: List[TransferResult] = []
+    local_dir.mkdir(parents=True, exist_ok=True)
+    for resource in client.walk(remote_dir, max_concurrency=concurrency):
+        path = href_to_path(resource.href, client.base_url)
+        relative = member_path(path, remote_dir, local_dir)
+        if relative is None:
+            logger.warning("Not downloading %s, from outside %s", path, remote_dir)
+            error = ValueError(f"{resource.href} is not inside {remote_dir}")
+            rejected.append(TransferResult(path, "", 0, error))
+            continue
+        local_fp = local_dir.joinpath(*relative.split("/"))
+        if resource.properties["type"] == "collection":
+            local_fp.mkdir(parents=True, exist_ok=True)
+        else:
+            files.append((path, local_fp, resource.properties.get("size", 0)))  # type: ignore
+
+    budget = SyncByteBudget(max_bytes_in_flight)
+
+    def download_file(item: Tuple[str, Path, int]) -> TransferResult:
+        source, target, size = item
+        result = TransferResult(source, str(target), size)
+        budget.acquire(size)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            client.download_to(source, target)
+        except (DAVException, TransportError, OSError) as err:
+            logger.debug("Download of %s failed: %r", source, err)
+            result.error = err
+        finally:
+            budget.release(size)
+        return result
+
+    results = SyncTaskPool(concurrency).map(download_file, files)
+    return results + rejected
+
+
+def sync_tree(
+    client: SyncWebDAVClient,
+    local_dir: Path,
+    remote_dir: str,
+    *,
+    direction: SyncDirection = "upload",
+    delete: bool = False,
+    dry_run: bool = False,
+    state_file: Optional[Union[str, Path]] = None,
+    checksums: bool = False,
+    concurrency: int = 8,
+    max_bytes_in_flight: int = 64 * 1024 * 1024,
+) -> SyncPlan:
+    """Syncs local_dir and remote_dir. See `AsyncWebDAVClient.sync`."""
+    remote_dir = "/" + remote_dir.strip("/")
+    remote_root = remote_dir.rstrip("/")
+    if direction == "download":
+        local_dir.mkdir(parents=True, exist_ok=True)
+    local = scan_local(local_dir)
+    remote: Dict[str, SyncEntry] = {}
+    missing_root = False
+    try:
+        for resource in client.walk(
+            remote_dir,
+            max_concurrency=concurrency,
+            properties=_SYNC_PROPERTIES if checksums else None,
+        ):
+            path = href_to_path(resource.href, client.base_url)
+            relative = member_path(path, remote_dir, local_dir)
+            if relative is None:
+                logger.warning("Not syncing %s, from outside %s", path, remote_dir)
+                continue
+            remote[relative] = SyncEntry.from_resource(relative, resource)
+    except DAVException as err:
+        # nothing to compare against yet
+        if not (direction == "upload" and err.status_code == 404):
+            raise
+        missing_root = True
+
+    state = SyncState(state_file)
+    plan = plan_sync(
+        local,
+        remote,
+        direction=direction,
+        delete=delete,
+        state=state,
+        local_dir=local_dir if checksums else None,
+    )
+    if dry_run:
+        return plan
+
+    pool = SyncTaskPool(concurrency)
+    budget = SyncByteBudget(max_bytes_in_flight)
+
+    def transfer(action: SyncAction, remote_path: str, local_fp: Path) -> None:
+        if action.kind == "upload":
+            with open(local_fp, "rb") as f:
+                res = client.put(remote_path, content=f)
+            res.raise_for_status()
+            state.record(local[action.path], res.orig.headers.get("ETag", ""))
+            return
+        entry = remote[action.path]
+        client.download_to(remote_path, local_fp)
+        if entry.mtime is not None:
+            # so that the next sync sees both sides as equally recent
+            os.utime(local_fp, (entry.mtime, entry.mtime))
+        stat = local_fp.stat()
+        state.record(
+            SyncEntry(
+                action.path, is_dir=False, size=stat.st_size, mtime=stat.st_mtime
+            ),
+            entry.etag,
+        )
+
+    def run(action: SyncAction) -> None:
+        remote_path = f"{remote_root}/{action.path}"
+        local_fp = local_dir.joinpath(*action.path.split("/"))
+        try:
+            if action.kind == "delete_remote":
+                (client.delete(remote_path)).raise_for_status()
+                state.forget(action.path)
+            elif action.kind == "delete_local":
+                if local_fp.is_dir():
+                    shutil.rmtree(local_fp)
+                else:
+                    local_fp.unlink()
+                state.forget(action.path)
+            elif action.kind == "mkcol":
+                (client.mkcol(remote_path)).raise_for_status()
+            elif action.kind == "mkdir":
+                local_fp.mkdir(exist_ok=True)
+            elif action.kind in ("upload", "download"):
+                budget.acquire(action.size)
+                try:
+                    transfer(action, remote_path, local_fp)
+                finally:
+                    budget.release(action.size)
+        except (DAVException, TransportError, OSError) as err:
+            logger.debug("Sync of %s failed: %r", action.path, err)
+            action.error = err
+
+    if missing_root:
+        _create_collections(client, pool, [remote_dir])
+
+    removals = [a for a in plan.actions if a.kind.startswith("delete")]
+    creations = [a for a in plan.actions if a.kind in ("mkcol", "mkdir")]
+    pool.map(run, removals)
+    # parents first; the actions are sorted by depth
+    levels: Dict[int, List[SyncAction]] = {}
+    for action in creations:
+        levels.setdefault(action.path.count("/"), []).append(action)
+    for depth in sorted(levels):
+        pool.map(run, levels[depth])
+    pool.map(run, plan.transfers)
+
+    for path in plan.unchanged:
+        state.record(local[path], remote[path].etag)
+    state.save()
+    return plan
+
+
+def _create_collections(
+    client: SyncWebDAVClient, pool: SyncTaskPool, paths: List[str]
+) -> None:
+    """Creates the collections at paths, parents first; existing collections are fine."""
+    levels: Dict[int, List[str]] = {}
+    for path in paths:
+        levels.setdefault(path.count("/"), []).append(path)
+
+    def mkcol(path: str) -> None:
+        res = client.mkcol(path)
+        if res.status_code != 405:  # 405 Method Not Allowed: it already exists
+            res.raise_for_status()
+
+    for depth in sorted(levels):
+        pool.map(mkcol, levels[depth])
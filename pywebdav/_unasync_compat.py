@@ -2,10 +2,517 @@
 # some names need to be modified however for it to work
 # without this, it would try importing a SyncClient class from httpx,
 # which does not exist.
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Deque,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from httpx import AsyncBaseTransport as AsyncBaseTransport
 from httpx import AsyncClient as AsyncClient
+from httpx import BaseTransport as SyncBaseTransport
 from httpx import Client as BaseClient
+from httpx import Response
+
+from .limiter import AdaptiveLimiter
+from .retry import is_replayable
+from .types import ProgressCallback, UploadContent
+from .utils import upload_chunks
+
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 class SyncClient(BaseClient):
     def aclose(self) -> None:
         return super().close()
+
+
+AsyncSleep = asyncio.sleep
+SyncSleep = time.sleep
+
+
+# httpx names the streaming helpers differently on sync and async responses
+# (aiter_bytes/iter_bytes), so they are wrapped in names that unasync can rewrite.
+def AsyncIterBytes(
+    response: Response, chunk_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    return response.aiter_bytes(chunk_size)
+
+
+def SyncIterBytes(
+    response: Response, chunk_size: Optional[int] = None
+) -> Iterator[bytes]:
+    return response.iter_bytes(chunk_size)
+
+
+async def AsyncReadResponse(response: Response) -> bytes:
+    return await response.aread()
+
+
+def SyncReadResponse(response: Response) -> bytes:
+    return response.read()
+
+
+class _AsyncChunks:
+    """Exposes a (re-iterable) sync chunk iterable as an async iterable for httpx.AsyncClient."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = chunks
+
+    @property
+    def replayable(self) -> bool:
+        return bool(getattr(self._chunks, "replayable", False))
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self._chunks:
+            yield chunk
+
+
+def AsyncUploadBody(
+    content: UploadContent, chunk_size: int
+) -> Union[bytes, AsyncIterable[bytes]]:
+    if isinstance(content, str):
+        raise TypeError("Text must be encoded to bytes before it is uploaded")
+    if isinstance(content, bytes) or hasattr(content, "__aiter__"):
+        return content  # type: ignore
+    if isinstance(content, (bytearray, memoryview)):
+        return bytes(content)
+    return _AsyncChunks(upload_chunks(content, chunk_size))
+
+
+def SyncUploadBody(
+    content: UploadContent, chunk_size: int
+) -> Union[bytes, Iterable[bytes]]:
+    if isinstance(content, str):
+        raise TypeError("Text must be encoded to bytes before it is uploaded")
+    if isinstance(content, bytes):
+        return content
+    if isinstance(content, (bytearray, memoryview)):
+        return bytes(content)
+    if hasattr(content, "__aiter__"):
+        raise TypeError("Async iterables can only be uploaded with AsyncWebDAVClient")
+    return upload_chunks(content, chunk_size)
+
+
+class AsyncProgressBody:
+    """
+    Wraps an upload body (see `AsyncUploadBody`), reporting the bytes httpx has taken from
+    it to a progress callback. Bytes bodies are handed over chunk_size bytes at a time.
+    """
+
+    def __init__(
+        self,
+        body: Union[bytes, AsyncIterable[bytes]],
+        progress: ProgressCallback,
+        total: Optional[int],
+        chunk_size: int,
+    ) -> None:
+        self._body = body
+        self._progress = progress
+        self._total = total
+        self._chunk_size = chunk_size
+
+    @property
+    def replayable(self) -> bool:
+        return is_replayable(self._body)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        sent = 0
+        self._progress(sent, self._total)
+        if isinstance(self._body, bytes):
+            for start in range(0, len(self._body), self._chunk_size):
+                chunk = self._body[start : start + self._chunk_size]
+                yield chunk
+                sent += len(chunk)
+                self._progress(sent, self._total)
+            return
+        async for chunk in self._body:
+            yield chunk
+            sent += len(chunk)
+            self._progress(sent, self._total)
+
+
+class SyncProgressBody:
+    def __init__(
+        self,
+        body: Union[bytes, Iterable[bytes]],
+        progress: ProgressCallback,
+        total: Optional[int],
+        chunk_size: int,
+    ) -> None:
+        self._body = body
+        self._progress = progress
+        self._total = total
+        self._chunk_size = chunk_size
+
+    @property
+    def replayable(self) -> bool:
+        return is_replayable(self._body)
+
+    def __iter__(self) -> Iterator[bytes]:
+        sent = 0
+        self._progress(sent, self._total)
+        chunks: Iterable[bytes] = self._body
+        if isinstance(self._body, bytes):
+            chunks = (
+                self._body[start : start + self._chunk_size]
+                for start in range(0, len(self._body), self._chunk_size)
+            )
+        for chunk in chunks:
+            yield chunk
+            sent += len(chunk)
+            self._progress(sent, self._total)
+
+
+# concurrency primitives; the async client runs coroutines on the event loop, and the
+# generated sync client runs the same (unasynced) functions on a thread pool.
+class AsyncTaskPool:
+    """
+    Runs a coroutine function over many items, with at most max_workers in flight.
+    If one of the calls fails, the others are cancelled before the exception is raised.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(1, max_workers)
+
+    async def map(
+        self, func: Callable[[T], Awaitable[R]], items: Iterable[T]
+    ) -> List[R]:
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run(item: T) -> R:
+            async with semaphore:
+                return await func(item)
+
+        tasks = [asyncio.ensure_future(run(item)) for item in items]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.wait(tasks)
+
+
+class SyncTaskPool:
+    """Runs a function over many items, with at most max_workers threads in flight."""
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(1, max_workers)
+
+    def map(self, func: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(func, item) for item in items]
+            try:
+                return [future.result() for future in futures]
+            finally:
+                # calls that haven't started are dropped; running ones are waited for
+                for future in futures:
+                    future.cancel()
+
+
+class AsyncCompletionPool:
+    """
+    Runs submitted coroutine functions, with at most max_workers in flight, handing back
+    their results as they complete. Work can be submitted while earlier work is running.
+    Exceptions are raised from `next_completed`; unfinished work is cancelled on exit.
+
+    Usage:
+        async with AsyncCompletionPool(8) as pool:
+            pool.submit(func, arg)
+            while pool:
+                for result in await pool.next_completed():
+                    ...
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(1, max_workers)
+        self._queue: Deque[
+            Tuple[Callable[..., Awaitable[Any]], Tuple[Any, ...]]
+        ] = deque()
+        self._pending: Set["asyncio.Future[Any]"] = set()
+
+    def __len__(self) -> int:
+        return len(self._queue) + len(self._pending)
+
+    def submit(self, func: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        self._queue.append((func, args))
+
+    async def next_completed(self) -> List[Any]:
+        """Waits for at least one piece of work to complete, returning the results."""
+        while self._queue and len(self._pending) < self.max_workers:
+            func, args = self._queue.popleft()
+            self._pending.add(asyncio.ensure_future(func(*args)))
+        done, self._pending = await asyncio.wait(
+            self._pending, return_when=asyncio.FIRST_COMPLETED
+        )
+        return [task.result() for task in done]
+
+    async def __aenter__(self) -> "AsyncCompletionPool":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._queue.clear()
+        for task in self._pending:
+            task.cancel()
+        if self._pending:
+            await asyncio.wait(self._pending)
+        self._pending = set()
+
+
+class SyncCompletionPool:
+    """
+    Runs submitted functions, with at most max_workers threads in flight, handing back
+    their results as they complete. Work can be submitted while earlier work is running.
+    Exceptions are raised from `next_completed`; unfinished work is cancelled on exit.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(1, max_workers)
+        self._queue: Deque[Tuple[Callable[..., Any], Tuple[Any, ...]]] = deque()
+        self._pending: Set["Future[Any]"] = set()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def __len__(self) -> int:
+        return len(self._queue) + len(self._pending)
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> None:
+        self._queue.append((func, args))
+
+    def next_completed(self) -> List[Any]:
+        """Waits for at least one piece of work to complete, returning the results."""
+        while self._queue and len(self._pending) < self.max_workers:
+            func, args = self._queue.popleft()
+            self._pending.add(self._executor.submit(func, *args))
+        done, pending = wait(self._pending, return_when=FIRST_COMPLETED)
+        self._pending = set(pending)
+        return [future.result() for future in done]
+
+    def __enter__(self) -> "SyncCompletionPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._queue.clear()
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        self._pending = set()
+
+
+class AsyncByteBudget:
+    """
+    Limits the number of bytes in flight across concurrent transfers. `acquire` waits until
+    enough of the budget is free; items larger than the whole budget are let through alone.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, limit)
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int) -> None:
+        size = min(size, self.limit)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.used + size <= self.limit)
+            self.used += size
+
+    async def release(self, size: int) -> None:
+        async with self._condition:
+            self.used -= min(size, self.limit)
+            self._condition.notify_all()
+
+
+class SyncByteBudget:
+    """
+    Limits the number of bytes in flight across concurrent transfers. `acquire` waits until
+    enough of the budget is free; items larger than the whole budget are let through alone.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, limit)
+        self.used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int) -> None:
+        size = min(size, self.limit)
+        with self._condition:
+            self._condition.wait_for(lambda: self.used + size <= self.limit)
+            self.used += size
+
+    def release(self, size: int) -> None:
+        with self._condition:
+            self.used -= min(size, self.limit)
+            self._condition.notify_all()
+
+
+class AsyncConcurrencyGate:
+    """
+    Holds requests until fewer than `limiter.limit` are in flight (see AdaptiveLimiter).
+    Waiters are let through in order; `release` doesn't block, so it can be called from
+    cleanup code.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter) -> None:
+        self.limiter = limiter
+        self.in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+    async def acquire(self) -> None:
+        if not self._waiters and self.in_flight < self.limiter.limit:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter  # in_flight is counted by _wake
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # woken, but cancelled before running
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.limiter.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.in_flight += 1
+
+
+class SyncConcurrencyGate:
+    """Holds requests until fewer than `limiter.limit` are in flight (see AdaptiveLimiter)."""
+
+    def __init__(self, limiter: AdaptiveLimiter) -> None:
+        self.limiter = limiter
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < self.limiter.limit)
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+
+class AsyncSingleFlight:
+    """
+    Shares one call among concurrent callers with the same key: the first caller starts
+    it, and callers arriving while it's in flight wait for (and get) the same result or
+    exception. The call is cancelled only once every caller waiting for it is cancelled.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, Tuple["asyncio.Task[Any]", List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        if key in self._calls:
+            task, waiters = self._calls[key]
+        else:
+            task, waiters = asyncio.ensure_future(func()), [0]
+            self._calls[key] = (task, waiters)
+            task.add_done_callback(lambda _: self._forget(key, task))
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and waiters[0] == 1:
+                task.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
+
+    def forget(self, match: Callable[[Hashable], bool]) -> None:
+        """
+        Makes callers with a matching key start a new call, instead of joining the one in
+        flight; those already waiting for it still get its result.
+        """
+        for key in [key for key in self._calls if match(key)]:
+            del self._calls[key]
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if key in self._calls and self._calls[key][0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every caller was cancelled
+
+
+class SyncSingleFlight:
+    """
+    Shares one call among concurrent callers (threads) with the same key: the first caller
+    runs it, and callers arriving while it's in flight wait for (and get) the same result
+    or exception.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "Future[Any]"] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as err:
+            self._forget(key, future)
+            future.set_exception(err)
+            raise
+        self._forget(key, future)
+        future.set_result(result)
+        return result
+
+    def forget(self, match: Callable[[Hashable], bool]) -> None:
+        """
+        Makes callers with a matching key start a new call, instead of joining the one in
+        flight; those already waiting for it still get its result.
+        """
+        with self._lock:
+            for key in [key for key in self._calls if match(key)]:
+                del self._calls[key]
+
+    def _forget(self, key: Hashable, future: "Future[Any]") -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
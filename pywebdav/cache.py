@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from httpx import Response
+
+from .types import Resource
+
+
+__all__ = ["CacheStats", "ContentCache", "MetadataCache"]
+
+
+# response headers that are kept with a cached body, and replayed on a cache hit
+_STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0  # response bytes served from the cache instead of the network
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class ContentCache:
+    """
+    An on-disk cache of GET response bodies, validated with ETag/Last-Modified.
+
+    Cached URLs are requested with If-None-Match/If-Modified-Since headers; when the server
+    answers 304 Not Modified, the body is served from disk. The cache is bounded by the total
+    size of the stored bodies, evicting the least recently used entries first.
+
+    Usage:
+        cache = ContentCache("~/.cache/pywebdav", max_size=512 * 1024 * 1024)
+        client = AsyncWebDAVClient(host, content_cache=cache)
+    """
+
+    def __init__(
+        self, directory: Union[str, Path], *, max_size: int = 256 * 1024 * 1024
+    ) -> None:
+        """
+        Args:
+            directory: The directory to store the cached bodies (and their index) in
+            max_size: The maximum total size of the cached bodies, in bytes
+        """
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._index_fp = self.directory / "index.json"
+        # url -> {"file": ..., "size": ..., "headers": {...}}, least recently used first
+        self._entries: OrderedDict[str, Dict] = OrderedDict()
+        if self._index_fp.exists():
+            try:
+                self._entries.update(json.loads(self._index_fp.read_text()))
+            except ValueError:  # corrupt index; start over
+                pass
+        self._size = sum(entry["size"] for entry in self._entries.values())
+
+    @property
+    def size(self) -> int:
+        """The total size of the cached bodies, in bytes."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Returns the validator headers to send when requesting url."""
+        entry = self._entries.get(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if "ETag" in entry["headers"]:
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if "Last-Modified" in entry["headers"]:
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def handle_response(self, url: str, response: Response) -> Response:
+        """
+        Updates the cache with the (fully read) response to a conditional GET of url.
+        Returns the response to hand to the caller; for a 304 response to a cached URL,
+        this is a 200 response with the cached body.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if response.status_code == 304 and entry is not None:
+                try:
+                    body = (self.directory / entry["file"]).read_bytes()
+                except OSError:  # the file was removed behind our back
+                    self._remove(url)
+                else:
+                    self._entries.move_to_end(url)
+                    self.stats.hits += 1
+                    self.stats.bytes_saved += len(body)
+                    return Response(
+                        200,
+                        headers=entry["headers"],
+                        content=body,
+                        request=response.request,
+                    )
+
+            self.stats.misses += 1
+            if response.status_code == 200:
+                self._store(url, response)
+            elif entry is not None and response.status_code != 304:
+                self._remove(url)
+            return response
+
+    def clear(self) -> None:
+        """Removes all the entries from the cache."""
+        with self._lock:
+            for url in list(self._entries):
+                self._remove(url)
+            self._save_index()
+
+    def _store(self, url: str, response: Response) -> None:
+        headers = {
+            name: response.headers[name]
+            for name in _STORED_HEADERS
+            if name in response.headers
+        }
+        body = response.content
+        if not ("ETag" in headers or "Last-Modified" in headers):
+            return  # can't be revalidated
+        if len(body) > self.max_size:
+            return
+
+        name = hashlib.sha256(url.encode()).hexdigest()
+        tmp = self.directory / (name + ".tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, self.directory / name)
+        old = self._entries.pop(url, None)
+        if old is not None:
+            self._size -= old["size"]
+        self._entries[url] = {"file": name, "size": len(body), "headers": headers}
+        self._size += len(body)
+
+        while self._size > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+        self._save_index()
+
+    def _remove(self, url: str) -> None:
+        entry = self._entries.pop(url)
+        self._size -= entry["size"]
+        try:
+            os.remove(self.directory / entry["file"])
+        except OSError:
+            pass
+
+    def _save_index(self) -> None:
+        tmp = self._index_fp.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._entries))
+        os.replace(tmp, self._index_fp)
+
+
+# (path, depth, properties)
+MetadataKey = Tuple[str, str, Tuple[str, ...]]
+
+
+class MetadataCache:
+    """
+    An in-memory cache of parsed PROPFIND listings, bounded by age (TTL) and number of entries.
+
+    Clients created with a MetadataCache use it in `list_resources`, and invalidate the
+    affected entries whenever they modify a path (put, delete, move, copy, mkcol): listings
+    of the path itself, its parent, anything below it, and Depth: infinity listings of any
+    collection above it.
+    """
+
+    def __init__(self, *, ttl: float = 30.0, max_entries: int = 1024) -> None:
+        """
+        Args:
+            ttl: How long a listing stays valid, in seconds
+            max_entries: The maximum number of listings kept; the least recently used ones
+                         are evicted first
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[
+            MetadataKey, Tuple[float, List[Resource]]
+        ] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(
+        path: str, depth: str, properties: Optional[Sequence[str]] = None
+    ) -> MetadataKey:
+        return (_normalize_path(path), depth, tuple(properties or ()))
+
+    def get(self, key: MetadataKey) -> Optional[List[Resource]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return list(entry[1])
+
+    def put(self, key: MetadataKey, resources: List[Resource]) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, list(resources))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        """Drops the listings that could include (or depend on) path."""
+        path = _normalize_path(path)
+        parent = path.rsplit("/", 1)[0]
+        with self._lock:
+            for key in list(self._entries):
+                cached_path, depth, _ = key
+                if (
+                    cached_path == path
+                    or cached_path == parent
+                    or cached_path.startswith(path + "/")
+                    or (depth == "infinity" and path.startswith(cached_path + "/"))
+                ):
+                    del self._entries[key]
+                    self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _normalize_path(path: str) -> str:
+    """/a/b/ -> /a/b; the root is an empty string."""
+    path = path.strip("/")
+    return "/" + path if path else ""
@@ -1,17 +1,28 @@
 import json
 import logging
 import shlex
-from http.client import responses
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Any, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
-import httpx
 from typer import Exit, Option, Typer, echo
 
-from .shell_client import ShellDAVClient
-from .types import DAVException, RequestMethod
-from .utils import DEFAULT_HEADERS
+from .types import DAVException, RequestMethod, TransferResult
 
+# the CLI is often run in tight loops; the clients, httpx and the XML parser are only
+# imported once a command needs them (see tests/test_cli_startup.py)
+if TYPE_CHECKING:
+    from .metrics import TransferProgress
+    from .shell_client import Job, ShellDAVClient, SizeNode
+    from .types import ProgressCallback
+    from .utils import FileChunks
+
+
+# a path touched by a shell command: (remote or local, path, whether it's written to)
+_Access = Tuple[str, str, bool]
 
 app = Typer(
     name="pywebdav",
@@ -58,30 +69,38 @@ def request(
         help="Path to a file containing the body to be sent with the request",
         show_default=False,
     ),
+    http2: bool = Option(False, help="Whether to use HTTP/2 (requires the h2 package)"),
+    timeout: float = Option(5.0, help="Timeout in seconds for network operations"),
 ) -> None:
     """Make a WebDAV request to the specified URL."""
-    auth = _handle_username_password(username, password)
+    import httpx
 
-    if body_path is None and body is None:
-        _body = None
-    elif body is not None:
-        _body = body
-    elif body_path is not None:
-        _body = body_path.read_text()
-    else:
-        _body = None
+    from .utils import DEFAULT_HEADERS, FileChunks, content_length
+
+    auth = _handle_username_password(username, password)
 
     if headers is None:
-        _headers = DEFAULT_HEADERS
+        _headers = {**DEFAULT_HEADERS}
     else:
         parsed_headers = json.loads(headers)
         _headers = {**DEFAULT_HEADERS, **parsed_headers}
 
-    res = httpx.request(method.value, url, headers=_headers, data=_body, auth=auth)  # type: ignore
-    # XML can be directly passed as data if passed with the right Content-Type header
-    # however httpx has type-hinted body to be of type dict
-    status = f"{res.status_code} {responses.get(res.status_code, 'UNKNOWN')}"
-    echo(f"Status: {status}\n")
+    with ExitStack() as stack:
+        _body: Union[str, "FileChunks", None]
+        if body is not None:
+            _body = body
+        elif body_path is not None:
+            # stream the file instead of reading it into memory
+            f = stack.enter_context(body_path.open("rb"))
+            _body = FileChunks(f)
+            _headers["Content-Length"] = str(content_length(f))
+        else:
+            _body = None
+
+        with httpx.Client(auth=auth, http2=http2, timeout=timeout) as client:  # type: ignore
+            res = client.request(method.value, url, headers=_headers, content=_body)
+
+    echo(f"Status: {res.status_code} {_reason(res.status_code)}\n")
     echo(res.text)
 
 
@@ -103,116 +122,579 @@ def shell(
         help="Any additional path which should be considered as part of the base URL",
     ),
     debug: bool = Option(False, help="Whether to log debug statements"),
+    cache_ttl: float = Option(
+        0.0,
+        help="How long (in seconds) directory listings are cached for; 0 disables caching."
+        " Only changes made in this session clear the cache, so changes made elsewhere can take this long to show up",
+    ),
+    http2: bool = Option(False, help="Whether to use HTTP/2 (requires the h2 package)"),
+    timeout: float = Option(5.0, help="Timeout in seconds for network operations"),
+    retries: int = Option(
+        3,
+        help="How many times failed requests (eg: 503 responses, dropped connections) are retried",
+    ),
+    script: Optional[str] = Option(
+        None,
+        help="Run the commands in this file (- for stdin), one per line, instead of an interactive session",
+        show_default=False,
+    ),
+    parallel: int = Option(
+        4,
+        help="How many independent transfer/delete/copy/move commands in a script, or background jobs in the shell, run at once",
+    ),
 ) -> None:
     """Start a shell session. Run commands like `cd`, `ls` etc on the specified host server, using WebDAV requests."""
     if debug:
         logging.basicConfig(level=logging.DEBUG)
     auth = _handle_username_password(username, password)
-    _shell_main(
+    kwargs = dict(
         host=host,
         port=port,
         scheme="https" if use_https else "http",
         auth=auth,
         path=path,
+        cache_ttl=cache_ttl,
+        http2=http2,
+        timeout=timeout,
+        retries=retries,
     )
+    if script is not None:
+        raise Exit(0 if _script_main(script, parallel=parallel, **kwargs) else 1)
+    _shell_main(max_jobs=parallel, **kwargs)
     raise Exit()
 
 
+def _reason(status_code: int) -> str:
+    from http.client import responses
+
+    return responses.get(status_code, "UNKNOWN")
+
+
 def _shell_main(**kwargs: Any) -> None:
     """REPL for shell commands"""
+    import httpx
+
+    from .shell_client import ShellDAVClient
+
     client = ShellDAVClient(**kwargs)
-    cmd_mapping = {
-        "ls": ls,
-        "cd": cd,
-        "mkdir": mkdir,
-        "move": move,
-        "copy": copy,
-        "rm": delete,
-        "download": download,
-        "upload": upload,
-        "help": help,
-    }
     echo(f"pywebdav shell")
     echo(f"Connecting to {client.dav_client.base_url}")
     echo("Type 'help' for a list of commands, and 'exit' to leave the shell.")
 
     while True:
-        line = input(f"{client.cwd}> ")
+        _report_jobs(client)
+        line = input(f"{client.cwd}> ").strip()
+        background = line.endswith("&")
+        if background:
+            line = line[:-1].strip()
+        if not line:
+            continue
         cmd_name, *args = shlex.split(line)
 
         if cmd_name == "exit":
-            client.dav_client.close()
+            if _exit(client):
+                break
+            continue
+        try:
+            if background:
+                error = _start_job(client, cmd_name, args, line)
+            elif cmd_name in _TRANSFER_COMMANDS:
+                error = _run_in_foreground(client, cmd_name, args, line)
+            else:
+                error = _run_command(client, cmd_name, args)
+        except httpx.ConnectError:
+            echo(_connect_error(client), err=True)
             break
+        if error is not None:
+            echo(error, err=True)
 
-        cmd_func = cmd_mapping.get(cmd_name)
 
-        if cmd_func is None:
-            echo(f"[ERROR] Invalid command: {cmd_name}")
-            continue
+def _script_main(script: str, *, parallel: int, **kwargs: Any) -> bool:
+    """
+    Runs the shell commands in a script file ("-" for stdin), one per line, over a single
+    client. Runs of consecutive transfer/delete/copy/move commands that don't touch the
+    same paths are run concurrently, up to parallel at a time; other commands (cd, ls,
+    mkdir etc) wait for those before them, and run alone.
+
+    After each line has run, its status is written to stderr as tab separated
+    "<line number>  ok|error  <command>  [<error>]". Returns whether every line succeeded.
+    """
+    import httpx
+
+    from .shell_client import ShellDAVClient
+
+    if script == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = Path(script).read_text().splitlines()
+    client = ShellDAVClient(**kwargs)
+    ok = True
+    batch: List[Tuple[int, str, List[str]]] = []  # commands to run concurrently
+    touched: List[_Access] = []  # the paths the commands in batch touch
+
+    def report(lineno: int, line: str, error: Optional[str]) -> None:
+        nonlocal ok
+        ok = ok and error is None
+        status = f"{lineno}\t{'ok' if error is None else 'error'}\t{line.strip()}"
+        echo(status if error is None else f"{status}\t{error}", err=True)
+
+    def run(args: List[str]) -> Optional[str]:
         try:
-            cmd_func(client, *args)
-        except TypeError as err:
-            echo(err.args[0], err=True)
-        except DAVException as err:
-            echo(
-                f"[ERROR] Status: {err.status_code} {responses.get(err.status_code, 'UNKNOWN')}",
-                err=True,
-            )
+            return _run_command(client, args[0], args[1:])
         except httpx.ConnectError:
-            echo(
-                f"[ERROR] Could not connect to {client.dav_client.base_url}; check the details you have passed in and try again.",
-                err=True,
+            return _connect_error(client)
+        # eg: a local file that can't be written, or a dropped connection
+        except (OSError, httpx.HTTPError) as err:
+            return f"[ERROR] {err}"
+
+    def flush() -> None:
+        if not batch:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            futures = [executor.submit(run, args) for _, _, args in batch]
+            for (lineno, line, _), future in zip(batch, futures):
+                report(lineno, line, future.result())
+        batch.clear()
+        touched.clear()
+
+    try:
+        for lineno, line in enumerate(lines, start=1):
+            try:
+                args = shlex.split(line, comments=True)
+            except ValueError as err:
+                flush()
+                report(lineno, line, str(err))
+                continue
+            if not args:
+                continue
+            if args[0] == "exit":
+                break
+            paths = _touched_paths(client.cwd, args)
+            if paths is None or _overlaps(paths, touched):
+                flush()
+            if paths is None:
+                report(lineno, line, run(args))
+            else:
+                batch.append((lineno, line, args))
+                touched.extend(paths)
+        flush()
+    finally:
+        client.dav_client.close()
+    return ok
+
+
+def _run_command(
+    client: "ShellDAVClient", cmd_name: str, args: List[str], **kwargs: Any
+) -> Optional[str]:
+    """Runs a shell command, returning the error to show if it failed."""
+    cmd_func = _COMMANDS.get(cmd_name)
+    if cmd_func is None:
+        return f"[ERROR] Invalid command: {cmd_name}"
+    try:
+        cmd_func(client, *args, **kwargs)
+    except TypeError as err:
+        return err.args[0]
+    except DAVException as err:
+        return f"[ERROR] Status: {err.status_code} {_reason(err.status_code)}"
+    return None
+
+
+def _connect_error(client: "ShellDAVClient") -> str:
+    return (
+        f"[ERROR] Could not connect to {client.dav_client.base_url}; check the details"
+        " you have passed in and try again."
+    )
+
+
+def _run_job(
+    client: "ShellDAVClient",
+    cmd_name: str,
+    args: List[str],
+    progress: "TransferProgress",
+) -> Optional[str]:
+    if cmd_name in _TRANSFER_COMMANDS:
+        return _run_command(client, cmd_name, args, progress=progress)
+    return _run_command(client, cmd_name, args)
+
+
+def _start_job(
+    client: "ShellDAVClient", cmd_name: str, args: List[str], line: str
+) -> Optional[str]:
+    """Runs a command (ended with &) as a background job."""
+    if cmd_name not in _CONCURRENT_COMMANDS:
+        return f"[ERROR] {cmd_name} can't be run in the background"
+    job = client.submit(
+        line, lambda shell, progress: _run_job(shell, cmd_name, args, progress)
+    )
+    echo(f"[{job.id}] {job.command}")
+    return None
+
+
+def _run_in_foreground(
+    client: "ShellDAVClient", cmd_name: str, args: List[str], line: str
+) -> Optional[str]:
+    """
+    Runs a transfer as a job, showing its progress until it's done. Ctrl-C leaves it
+    running in the background.
+    """
+    job = client.submit(
+        line, lambda shell, progress: _run_job(shell, cmd_name, args, progress)
+    )
+    try:
+        _wait_for([job])
+    except KeyboardInterrupt:
+        echo(f"\n[{job.id}] {job.command} continues in the background")
+        return None
+    del client.jobs[job.id]
+    return job.future.result()
+
+
+def _exit(client: "ShellDAVClient") -> bool:
+    """Ends the session once the background jobs are done; False if Ctrl-C was pressed while waiting."""
+    running = [job for job in client.jobs.values() if job.status != "done"]
+    if running:
+        echo(
+            f"Waiting for {len(running)} background job(s) to finish;"
+            " press Ctrl-C to go back to the shell."
+        )
+        try:
+            _wait_for(running)
+        except KeyboardInterrupt:
+            echo()
+            return False
+    _report_jobs(client)
+    client.close()
+    return True
+
+
+def _wait_for(jobs: List["Job"]) -> None:
+    """Waits for jobs to finish, showing their progress on a line of stderr if it's a terminal."""
+    live = sys.stderr.isatty()
+    pending = {job.future for job in jobs}
+    while pending:
+        _, pending = wait(pending, timeout=_PROGRESS_INTERVAL)
+        if live:
+            status = "  ".join(
+                f"[{job.id}] {_format_progress(job.progress) or job.status}"
+                for job in jobs
+                if job.status != "done"
             )
-            break
-        continue
+            width = shutil.get_terminal_size().columns - 1
+            echo(f"\r{status[:width]}\x1b[K", err=True, nl=False)
+    if live:
+        echo("\r\x1b[K", err=True, nl=False)
+
+
+def _report_jobs(client: "ShellDAVClient") -> None:
+    """Shows the background jobs that have finished since the last report."""
+    for job in client.reap():
+        echo(_format_job(client, job), err=_job_error(client, job) is not None)
+
+
+def _format_job(client: "ShellDAVClient", job: "Job") -> str:
+    """eg: [1] running  upload big.iso /dst  45.0 MiB of 100.0 MiB (45%), 12.0 MiB/s, 0:05 left"""
+    status: str = job.status
+    done = status == "done"
+    details = _format_progress(job.progress, finished=done)
+    if done:
+        error = _job_error(client, job)
+        if error is not None:
+            status, details = "failed", error
+    line = f"[{job.id}] {status:<8} {job.command}"
+    return f"{line}  {details}" if details else line
+
+
+def _job_error(client: "ShellDAVClient", job: "Job") -> Optional[str]:
+    import httpx
+
+    try:
+        return job.future.result()
+    except httpx.ConnectError:
+        return _connect_error(client)
+    except Exception as err:  # anything else the command didn't handle
+        return f"[ERROR] {err!r}"
+
+
+def _format_progress(progress: "TransferProgress", *, finished: bool = False) -> str:
+    """
+    How far a transfer has got, how fast it's going, and how long it has left; or once
+    finished, its size and average speed. Empty if nothing has been transferred.
+    """
+    if progress.started is None:
+        return ""
+    text = _format_size(progress.done)
+    fraction = progress.fraction
+    if fraction is not None and progress.total is not None and not finished:
+        text += f" of {_format_size(progress.total)} ({fraction:.0%})"
+    rate = progress.average_rate if finished else progress.rate
+    if rate:
+        text += f", {_format_size(int(rate))}/s"
+    eta = progress.eta
+    if eta is not None and not finished:
+        text += f", {_format_duration(eta)} left"
+    return text
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+def _touched_paths(cwd: str, args: List[str]) -> Optional[List[_Access]]:
+    """
+    The (remote or local) paths a command reads or writes, if it can run concurrently with
+    others that don't write to the same paths; None if it has to run alone.
+    """
+    from .utils import download_target, form_path, upload_target
+
+    cmd, positional = args[0], [arg for arg in args[1:] if not arg.startswith("-")]
+    accesses = _CONCURRENT_COMMANDS.get(cmd)
+    if accesses is None or len(positional) != len(accesses):
+        return None  # invalid arguments are reported in order, by running it alone
+    if cmd in _TRANSFER_COMMANDS and "-r" not in args:
+        # a file transfer into a folder only writes the file of that name in it
+        src, target = positional
+        if accesses[0][0] == "local":
+            positional = [src, upload_target(cwd, Path(src), target)]
+        else:
+            positional = [src, str(download_target(src, Path(target)))]
+    touched = []
+    for path, (kind, writes) in zip(positional, accesses):
+        if kind == "remote":
+            path = form_path(cwd, path).rstrip("/") + "/"
+        else:
+            path = str(Path(path).resolve()) + "/"
+        touched.append((kind, path, writes))
+    return touched
+
+
+def _overlaps(paths: List[_Access], others: List[_Access]) -> bool:
+    """Whether any of paths is the same as, inside, or contains one of others, and either is written to."""
+    return any(
+        kind == other_kind
+        and (writes or other_writes)
+        and (path.startswith(other) or other.startswith(path))
+        for kind, path, writes in paths
+        for other_kind, other, other_writes in others
+    )
 
 
-def ls(client: ShellDAVClient, path: Optional[str] = None) -> None:
+def ls(client: "ShellDAVClient", path: Optional[str] = None) -> None:
     path = client.cwd if path is None else path
     resources = client.ls(path)
     out = "\n".join([res.basename for res in resources])
     echo(out)
 
 
-def mkdir(client: ShellDAVClient, dirname: str) -> None:
+def _parse_options(
+    cmd_name: str, args: Tuple[str, ...], names: List[str]
+) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Splits the arguments of a command into its --name=value options and its path (at most one).
+    Raises TypeError, with a pointer to the help of the command, if they aren't valid.
+    """
+    error = f"Invalid arguments to {cmd_name}; see `help {cmd_name}`"
+    options: Dict[str, str] = {}
+    paths = []
+    for arg in args:
+        if not arg.startswith("--"):
+            paths.append(arg)
+            continue
+        name, sep, value = arg[2:].partition("=")
+        if not sep or name not in names:
+            raise TypeError(error)
+        options[name] = value
+    if len(paths) > 1:
+        raise TypeError(error)
+    return options, paths
+
+
+def find(client: "ShellDAVClient", *args: str) -> None:
+    from .utils import href_to_path
+
+    options, paths = _parse_options(
+        "find", args, ["name", "type", "min-size", "max-size", "limit"]
+    )
+    if options.get("type", "f") not in ("f", "d"):
+        raise TypeError("Invalid arguments to find; see `help find`")
+    try:
+        numbers = {
+            name: int(options[name]) if name in options else None
+            for name in ("min-size", "max-size", "limit")
+        }
+    except ValueError:
+        raise TypeError("Sizes and limits passed to find must be numbers")
+    resources = client.find(
+        paths[0] if paths else None,
+        name=options.get("name"),
+        type={"f": "file", "d": "collection"}.get(options.get("type", "")),
+        min_size=numbers["min-size"],
+        max_size=numbers["max-size"],
+        limit=numbers["limit"],
+    )
+    echo("\n".join(href_to_path(r.href, client.dav_client.base_url) for r in resources))
+
+
+def du(client: "ShellDAVClient", path: Optional[str] = None) -> None:
+    root = client.du(path)
+    for child in sorted(root.children.values(), key=lambda node: -node.size):
+        name = child.name + ("/" if child.is_collection else "")
+        echo(f"{_format_size(child.size):>10}  {name}")
+    echo(f"{_format_size(root.size):>10}  total")
+
+
+def tree(client: "ShellDAVClient", *args: str) -> None:
+    options, paths = _parse_options("tree", args, ["depth"])
+    try:
+        max_depth = int(options.get("depth", 3))
+    except ValueError:
+        raise TypeError("The depth passed to tree must be a number")
+    root = client.tree(paths[0] if paths else None, max_depth=max_depth)
+    echo(f"{root.name} ({_format_size(root.size)})")
+    _echo_tree(root, "")
+
+
+def _echo_tree(node: "SizeNode", indent: str) -> None:
+    children = sorted(
+        node.children.values(), key=lambda n: (not n.is_collection, n.name)
+    )
+    for i, child in enumerate(children):
+        last = i == len(children) - 1
+        name = child.name + ("/" if child.is_collection else "")
+        echo(f"{indent}{'└── ' if last else '├── '}{name} ({_format_size(child.size)})")
+        _echo_tree(child, indent + ("    " if last else "│   "))
+
+
+def _format_size(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if value < 1024 or unit == "TiB":
+            break
+        value /= 1024
+    return f"{size} B" if unit == "B" else f"{value:.1f} {unit}"
+
+
+def mkdir(client: "ShellDAVClient", dirname: str) -> None:
     client.mkdir(dirname)
     echo(f"Created directory {dirname}")
 
 
-def download(client: ShellDAVClient, src: str, target: str) -> None:
-    client.download(src, Path(target))
+def download(
+    client: "ShellDAVClient",
+    src: str,
+    target: str,
+    *flags: str,
+    progress: Optional["ProgressCallback"] = None,
+) -> None:
+    client.download(src, Path(target), resume="--resume" in flags, progress=progress)
     echo(f"File downloaded.")
 
 
-def move(client: ShellDAVClient, src: str, target: str) -> None:
+def move(client: "ShellDAVClient", src: str, target: str) -> None:
     client.move(src, target)
     echo(f"File moved")
 
 
-def copy(client: ShellDAVClient, src: str, target: str) -> None:
+def copy(client: "ShellDAVClient", src: str, target: str) -> None:
     client.copy(src, target)
     echo(f"File copied")
 
 
-def delete(client: ShellDAVClient, path: str) -> None:
+def delete(client: "ShellDAVClient", path: str) -> None:
     client.delete(path)
     echo(f"Deleted")
 
 
-def upload(client: ShellDAVClient, src: str, target: str) -> None:
+def upload(
+    client: "ShellDAVClient",
+    src: str,
+    target: str,
+    *flags: str,
+    progress: Optional["ProgressCallback"] = None,
+) -> None:
     fp = Path(src)
     if not fp.exists():
-        echo(f"[ERROR] File {src} does not exist", err=True)
-        return
-    client.upload(fp, target)
+        raise TypeError(f"[ERROR] File {src} does not exist")
+    client.upload(
+        fp,
+        target,
+        resume="--resume" in flags,
+        chunked="--chunked" in flags,
+        progress=progress,
+    )
     echo(f"File uploaded.")
 
 
-def cd(client: ShellDAVClient, target: str) -> None:
+def get(
+    client: "ShellDAVClient", *args: str, progress: Optional["ProgressCallback"] = None
+) -> None:
+    src, target, flags = _split_flags("get", args)
+    if "-r" not in flags:
+        download(client, src, target, *flags, progress=progress)
+        return
+    _echo_transfers(client.download_tree(src, Path(target)), "downloaded")
+
+
+def put(
+    client: "ShellDAVClient", *args: str, progress: Optional["ProgressCallback"] = None
+) -> None:
+    src, target, flags = _split_flags("put", args)
+    if "-r" not in flags:
+        upload(client, src, target, *flags, progress=progress)
+        return
+    fp = Path(src)
+    if not fp.is_dir():
+        raise TypeError(f"[ERROR] Directory {src} does not exist")
+    _echo_transfers(client.upload_tree(fp, target), "uploaded")
+
+
+def _split_flags(cmd: str, args: Tuple[str, ...]) -> Tuple[str, str, List[str]]:
+    """Splits the arguments to get/put into (src, target, flags)."""
+    flags = [arg for arg in args if arg.startswith("-")]
+    positional = [arg for arg in args if not arg.startswith("-")]
+    if len(positional) != 2:
+        raise TypeError(f"{cmd} takes a source and a target; see `help {cmd}`")
+    return positional[0], positional[1], flags
+
+
+def _echo_transfers(results: List[TransferResult], action: str) -> None:
+    """Shows the outcome of a tree transfer; raises TypeError if any of the files failed."""
+    for result in results:
+        if not result.ok:
+            echo(f"[ERROR] {result.source}: {result.error!r}", err=True)
+    done = [result for result in results if result.ok]
+    echo(f"{len(done)} of {len(results)} files {action}.")
+    if len(done) < len(results):
+        raise TypeError(f"[ERROR] {len(results) - len(done)} files were not {action}")
+
+
+def cd(client: "ShellDAVClient", target: str) -> None:
     client.cd(target)
 
 
-def help(_: ShellDAVClient, cmd: Optional[str] = None) -> None:
+def list_jobs(client: "ShellDAVClient") -> None:
+    finished = client.reap()
+    for job in sorted([*client.jobs.values(), *finished], key=lambda job: job.id):
+        echo(_format_job(client, job))
+
+
+def wait_jobs(client: "ShellDAVClient", job_id: Optional[str] = None) -> None:
+    jobs = list(client.jobs.values())
+    if job_id is not None:
+        number = job_id.lstrip("%")
+        jobs = [job for job in jobs if str(job.id) == number]
+        if not jobs:
+            raise TypeError(f"No such job: {job_id}")
+    try:
+        _wait_for(jobs)
+    except KeyboardInterrupt:
+        echo()
+        return
+    _report_jobs(client)
+
+
+def help(_: "ShellDAVClient", cmd: Optional[str] = None) -> None:
     cmd_help_mapping = {
         "cd": (
             "Change directory.\n\n"
@@ -255,25 +737,115 @@ def help(_: ShellDAVClient, cmd: Optional[str] = None) -> None:
         ),
         "upload": (
             "Uploads the file located at src_fp to target.\n\n"
-            "Syntax: upload <SRC_PATH> <TARGET>\n"
+            "Syntax: upload <SRC_PATH> <TARGET> [--resume] [--chunked]\n"
             "Arguments:\n"
             "   src: The location (on your computer) of the file to be uploaded [REQUIRED]\n"
             "   target: The location (on the server) to upload the file to [REQUIRED]\n"
+            "   --resume: Upload in segments, continuing an earlier interrupted upload of this file\n"
+            "   --chunked: Upload with the ownCloud/Nextcloud chunking protocol (resumable)\n"
         ),
         "download": (
             "Downloads the file located at src_path to target_path.\n\n"
-            "Syntax: download <SRC> <TARGET>\n"
+            "Syntax: download <SRC> <TARGET> [--resume]\n"
             "Arguments:\n"
             "   src: The location (on the server) of the file to be downloaded [REQUIRED]\n"
-            "   target: The location (on your computer) to download the file to [REQUIRED]"
+            "   target: The location (on your computer) to download the file to [REQUIRED]\n"
+            "   --resume: Continue an earlier interrupted download of this file"
+        ),
+        "du": (
+            "Shows the total size of a folder, and that of each file/folder in it.\n\n"
+            "Syntax: du [PATH]\n"
+            "Arguments:\n"
+            "   path: The folder to measure. If not passed, measures the current directory.\n"
+        ),
+        "tree": (
+            "Shows the files and folders below a folder as a tree, with folder sizes.\n\n"
+            "Syntax: tree [PATH] [--depth=N]\n"
+            "Arguments:\n"
+            "   path: The folder to show. If not passed, shows the current directory.\n"
+            "   --depth: How many levels to show (default 3); deeper files still count in the sizes\n"
         ),
-        "exit": "Ends the shell session",
+        "find": (
+            "Finds files and folders by name, type or size, searching on the server if it can.\n\n"
+            "Syntax: find [PATH] [--name=PATTERN] [--type=f|d] [--min-size=N] [--max-size=N] [--limit=N]\n"
+            "Arguments:\n"
+            "   path: The folder to search in. If not passed, searches the current directory.\n"
+            "   --name: A pattern the names should match, eg: *.jpg\n"
+            "   --type: Only find files (f) or folders (d)\n"
+            "   --min-size, --max-size: Size limits, in bytes\n"
+            "   --limit: The maximum number of results\n"
+        ),
+        "put": (
+            "Uploads a file, or with -r a whole directory, to target.\n\n"
+            "Syntax: put [-r] <SRC_PATH> <TARGET> [--resume] [--chunked]\n"
+            "Arguments:\n"
+            "   src: The location (on your computer) of the file/directory to be uploaded [REQUIRED]\n"
+            "   target: The location (on the server) to upload to [REQUIRED]\n"
+            "   -r: Upload the directory src recursively, creating missing folders\n"
+            "   --resume, --chunked: As for upload (single files only)\n"
+        ),
+        "get": (
+            "Downloads a file, or with -r a whole folder, to target.\n\n"
+            "Syntax: get [-r] <SRC> <TARGET> [--resume]\n"
+            "Arguments:\n"
+            "   src: The location (on the server) of the file/folder to be downloaded [REQUIRED]\n"
+            "   target: The location (on your computer) to download to [REQUIRED]\n"
+            "   -r: Download the folder src recursively\n"
+            "   --resume: As for download (single files only)\n"
+        ),
+        "jobs": (
+            "Lists the background jobs, with how far each transfer has got, its speed and the time it has left.\n\n"
+            "Syntax: jobs\n"
+        ),
+        "wait": (
+            "Waits for background jobs to finish, showing their progress. Ctrl-C stops waiting.\n\n"
+            "Syntax: wait [JOB]\n"
+            "Arguments:\n"
+            "   job: The number of the job to wait for. If not passed, waits for all of them.\n"
+        ),
+        "exit": "Ends the shell session, once the background jobs have finished",
     }
     main_help = (
         "pywebdav shell\n"
         "Some commands to interact with the filesystem.\n"
-        "Type help <CMD> to get help on a specific command.\n\n"
+        "Type help <CMD> to get help on a specific command.\n"
+        "End a transfer, rm, copy or move command with & to run it in the background.\n\n"
         "Commands:\n" + " " * 4 + ", ".join(cmd_help_mapping.keys())
     )
 
     echo(cmd_help_mapping.get(cmd, main_help))  # type: ignore
+
+
+_COMMANDS: Dict[str, Callable[..., None]] = {
+    "ls": ls,
+    "cd": cd,
+    "mkdir": mkdir,
+    "move": move,
+    "copy": copy,
+    "rm": delete,
+    "download": download,
+    "upload": upload,
+    "get": get,
+    "put": put,
+    "find": find,
+    "du": du,
+    "tree": tree,
+    "jobs": list_jobs,
+    "wait": wait_jobs,
+    "help": help,
+}
+# commands that scripts can run concurrently: whether each of their paths is remote or
+# local, and whether it is written to
+_CONCURRENT_COMMANDS = {
+    "upload": (("local", False), ("remote", True)),
+    "put": (("local", False), ("remote", True)),
+    "download": (("remote", False), ("local", True)),
+    "get": (("remote", False), ("local", True)),
+    "rm": (("remote", True),),
+    "copy": (("remote", False), ("remote", True)),
+    "move": (("remote", True), ("remote", True)),
+}
+# commands that report their progress, when passed a progress callback
+_TRANSFER_COMMANDS = ("upload", "download", "get", "put")
+# seconds between updates of the progress shown while waiting for jobs
+_PROGRESS_INTERVAL = 0.5
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+from typing import FrozenSet, Optional
+
+from httpx import TimeoutException
+
+
+__all__ = ["AdaptiveLimiter", "OVERLOAD_STATUSES"]
+
+
+# responses from a server that is shedding load
+OVERLOAD_STATUSES = frozenset({429, 503})
+
+
+class AdaptiveLimiter:
+    """
+    A limit on the number of requests in flight, that adapts to how the server copes (AIMD).
+
+    The limit grows by about one for every `limit` requests that succeed while latency stays
+    flat, and is cut back (multiplied by `backoff_ratio`) when the server responds with one
+    of `overload_statuses`, a request times out, or latency rises above `latency_tolerance`
+    times the lowest latency seen so far. After a cut, the requests already in flight are
+    let through before the limit is cut again.
+
+    A client with a limiter holds every request until a slot is free, so bulk operations
+    settle at the concurrency the server handles best; their `concurrency` argument is
+    then only an upper bound, and can be set high.
+
+    Usage:
+        client = AsyncWebDAVClient(host, limiter=AdaptiveLimiter(max_limit=32))
+        await client.upload_tree("photos", "/photos", concurrency=32)
+        print(client.limiter.limit)
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.2,
+        overload_statuses: FrozenSet[int] = OVERLOAD_STATUSES,
+    ) -> None:
+        """
+        Args:
+            initial_limit: The number of requests allowed in flight to start with
+            min_limit: The limit is never cut below this
+            max_limit: The limit never grows above this
+            backoff_ratio: What the limit is multiplied by when the server is overloaded
+            latency_tolerance: How many times the baseline latency is taken as overload
+            smoothing: The weight of each new sample in the moving average of latency
+            overload_statuses: Response status codes that mean the server is overloaded
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.overload_statuses = overload_statuses
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._latency: Optional[float] = None  # moving average
+        self._baseline: Optional[float] = None
+        self._cooldown = 0  # responses to let through before cutting the limit again
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """The number of requests currently allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """The moving average of request latency, in seconds."""
+        return self._latency
+
+    def record(
+        self,
+        latency: Optional[float],
+        *,
+        status: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """
+        Adjusts the limit after a request completed.
+
+        Args:
+            latency: How long the server took to respond (in seconds); None if the request
+                     shouldn't be sampled for latency (eg: a large transfer)
+            status: The response status code
+            error: The transport error the request failed with
+        """
+        with self._lock:
+            if self._cooldown:
+                self._cooldown -= 1
+            if error is not None:
+                overloaded = isinstance(error, TimeoutException)
+                if not overloaded:
+                    return  # says nothing about the server's load
+            else:
+                overloaded = status in self.overload_statuses
+            if not overloaded and latency is not None:
+                overloaded = self._sample(latency)
+            if not overloaded:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            elif not self._cooldown:
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                self._cooldown = self.limit
+
+    def _sample(self, latency: float) -> bool:
+        """Adds a latency sample, returning whether latency has risen above tolerance."""
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += (latency - self._latency) * self.smoothing
+        if self._baseline is None or self._latency < self._baseline:
+            self._baseline = self._latency
+        else:
+            # drift up slowly, so that a server that got slower for good is re-learned
+            self._baseline += (self._latency - self._baseline) * 0.01
+        return self._latency > self._baseline * self.latency_tolerance
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+
+__all__ = [
+    "ClientMetrics",
+    "Histogram",
+    "Instrument",
+    "LatencyCollector",
+    "MethodStats",
+    "RequestEvent",
+    "TransferProgress",
+]
+
+
+@dataclass
+class ClientMetrics:
+    """Counters kept by each client; see `AsyncWebDAVClient.metrics`."""
+
+    requests: int = 0  # requests sent, counting every attempt
+    retries: int = 0
+    # why requests were retried: a status code, or the name of a transport error
+    retries_by_reason: Dict[str, int] = field(default_factory=dict)
+    exhausted: int = 0  # requests that still failed after max_attempts
+    # requests that shared the response of an identical one in flight
+    coalesced: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_retry(self, reason: str) -> None:
+        with self._lock:
+            self.retries += 1
+            self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+
+    def record_exhausted(self) -> None:
+        with self._lock:
+            self.exhausted += 1
+
+    def record_coalesced(self) -> None:
+        with self._lock:
+            self.coalesced += 1
+
+
+@dataclass
+class RequestEvent:
+    """
+    A request sent by a client, passed to its instruments when the request starts (with
+    only method, url and started set) and again when it ends. Retries of a request are
+    part of the same event.
+    """
+
+    method: str
+    url: str
+    started: float = field(default_factory=time.monotonic)
+    status: Optional[int] = None  # of the last attempt
+    bytes_sent: int = 0  # the request's Content-Length; 0 for bodies of unknown size
+    bytes_received: int = 0
+    ttfb: Optional[float] = None  # seconds from sending the last attempt to its headers
+    duration: Optional[float] = None  # seconds from start to end, including retries
+    retries: int = 0
+    error: Optional[BaseException] = None  # the exception the request failed with
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and self.status < 400
+
+
+class Instrument:
+    """
+    Receives an event for every request a client sends; pass instances to a client as
+    `instruments`. Subclasses override the hooks they need. Exceptions raised by hooks
+    are logged, and don't affect the request.
+
+    Usage:
+        class SlowRequests(Instrument):
+            def request_finished(self, event: RequestEvent) -> None:
+                if event.duration > 1:
+                    print(event.method, event.url, event.duration)
+    """
+
+    def request_started(self, event: RequestEvent) -> None:
+        pass
+
+    def request_finished(self, event: RequestEvent) -> None:
+        pass
+
+
+class Histogram:
+    """
+    Counts samples in logarithmic buckets, each `growth` times as wide as the one before,
+    so that quantiles are exact to within that factor whatever the range of the samples.
+    """
+
+    def __init__(self, *, growth: float = 1.05, min_value: float = 1e-4) -> None:
+        self.growth = growth
+        self.min_value = min_value
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets: Dict[int, int] = {}
+
+    def add(self, value: float) -> None:
+        index = 0
+        if value > self.min_value:
+            index = math.ceil(math.log(value / self.min_value, self.growth))
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """The value below which a fraction q of the samples fall (eg: 0.95); 0 if empty."""
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(self.min_value * self.growth**index, self.max)
+        return 0.0
+
+
+@dataclass
+class MethodStats:
+    """What a LatencyCollector recorded about the requests of one method."""
+
+    duration: Histogram = field(default_factory=Histogram)
+    ttfb: Histogram = field(default_factory=Histogram)
+    errors: int = 0  # requests that failed, or got an error status
+    retries: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    @property
+    def count(self) -> int:
+        return self.duration.count
+
+    @property
+    def throughput(self) -> float:
+        """Bytes (sent and received) per second spent on requests."""
+        if not self.duration.total:
+            return 0.0
+        return (self.bytes_sent + self.bytes_received) / self.duration.total
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50": self.duration.quantile(0.5),
+            "p95": self.duration.quantile(0.95),
+            "p99": self.duration.quantile(0.99),
+            "ttfb_p50": self.ttfb.quantile(0.5),
+            "ttfb_p95": self.ttfb.quantile(0.95),
+            "ttfb_p99": self.ttfb.quantile(0.99),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "throughput": self.throughput,
+        }
+
+
+class LatencyCollector(Instrument):
+    """
+    Keeps per-method latency histograms (total duration, and time to first byte) and
+    byte counts in memory.
+
+    Usage:
+        collector = LatencyCollector()
+        client = AsyncWebDAVClient(host, instruments=[collector])
+        ...
+        print(collector.summary()["PROPFIND"]["p95"])
+    """
+
+    def __init__(self) -> None:
+        self.methods: Dict[str, MethodStats] = {}
+        self._lock = threading.Lock()
+
+    def request_finished(self, event: RequestEvent) -> None:
+        with self._lock:
+            stats = self.methods.setdefault(event.method, MethodStats())
+            stats.duration.add(event.duration or 0.0)
+            if event.ttfb is not None:
+                stats.ttfb.add(event.ttfb)
+            stats.errors += not event.ok
+            stats.retries += event.retries
+            stats.bytes_sent += event.bytes_sent
+            stats.bytes_received += event.bytes_received
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Counts, p50/p95/p99 latencies (in seconds) and throughput, per method."""
+        with self._lock:
+            return {method: stats.summary() for method, stats in self.methods.items()}
+
+
+class TransferProgress:
+    """
+    A progress callback (see `ProgressCallback`) that keeps track of how far a transfer
+    has got, its throughput over the last `window` seconds, and how long it has left.
+
+    Usage:
+        progress = TransferProgress()
+        await client.download_to("/big.iso", Path("big.iso"), progress=progress)
+        print(progress.done, progress.average_rate)
+    """
+
+    def __init__(
+        self, *, window: float = 5.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.window = window
+        self.done = 0
+        self.total: Optional[int] = None
+        self.started: Optional[float] = None  # when the transfer was first reported
+        self.updated: Optional[float] = None
+        self._clock = clock
+        self._samples: Deque[Tuple[float, int]] = deque()
+
+    def __call__(self, done: int, total: Optional[int]) -> None:
+        now = self._clock()
+        if self.started is None:
+            self.started = now
+        if done < self.done:  # started over, eg: a retried request
+            self._samples.clear()
+        self.done = done
+        self.total = total
+        self.updated = now
+        self._samples.append((now, done))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """How much of the transfer is done, from 0 to 1; None if the total isn't known."""
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Bytes per second over the last `window` seconds; it drops while a transfer stalls."""
+        if len(self._samples) < 2:
+            return None
+        since, done = self._samples[0]
+        elapsed = self._clock() - since
+        return (self.done - done) / elapsed if elapsed > 0 else None
+
+    @property
+    def average_rate(self) -> Optional[float]:
+        """Bytes per second from the first report to the last."""
+        if self.started is None or self.updated is None or self.updated <= self.started:
+            return None
+        return self.done / (self.updated - self.started)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left at the current rate, if the total is known and data is moving."""
+        rate = self.rate
+        if self.total is None or not rate:
+            return None
+        return max(0, self.total - self.done) / rate
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, FrozenSet, Optional
+
+from httpx import ConnectError, ConnectTimeout, PoolTimeout, Response, TransportError
+
+
+__all__ = ["IDEMPOTENT_METHODS", "RETRY_STATUSES", "RetryPolicy", "is_replayable"]
+
+
+# methods that can be sent again without changing the outcome (RFC 9110, and the
+# read-only WebDAV methods); PUT only qualifies when its body can be sent again
+IDEMPOTENT_METHODS = frozenset(
+    {"GET", "HEAD", "OPTIONS", "PROPFIND", "REPORT", "SEARCH", "PUT", "DELETE"}
+)
+# responses sent by servers (and gateways) that are shedding load, or briefly unavailable
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# errors raised before the request reached the server; these can be retried for any method
+_NOT_SENT_ERRORS = (ConnectError, ConnectTimeout, PoolTimeout)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    When, and how long after, a failed request is sent again.
+
+    Requests are retried when they fail with one of `statuses`, or with a transport error
+    (connection reset, timeout etc.), as long as the method is idempotent and the body (if
+    any) can be sent again. Requests that never reached the server are retried for any
+    method. The wait between attempts grows exponentially, with full jitter, unless the
+    server asks for a specific wait with a Retry-After header.
+
+    Usage:
+        client = AsyncWebDAVClient(host, retry=RetryPolicy(max_attempts=5))
+    """
+
+    max_attempts: int = 4  # including the first one
+    # the wait before the first retry, doubled for each one after
+    backoff_factor: float = 0.5
+    max_backoff: float = 30.0
+    jitter: bool = True
+    respect_retry_after: bool = True
+    max_retry_after: float = 60.0  # longer Retry-After waits are cut down to this
+    statuses: FrozenSet[int] = RETRY_STATUSES
+    methods: FrozenSet[str] = IDEMPOTENT_METHODS
+
+    def is_retryable(
+        self,
+        method: str,
+        *,
+        replayable: bool,
+        response: Optional[Response] = None,
+        error: Optional[BaseException] = None,
+    ) -> bool:
+        """Whether a request that got response (or failed with error) may be sent again."""
+        if not replayable:
+            return False
+        if error is not None:
+            if isinstance(error, _NOT_SENT_ERRORS):
+                return True
+            if not isinstance(error, TransportError):
+                return False
+        elif response is None or response.status_code not in self.statuses:
+            return False
+        return method.upper() in self.methods
+
+    def delay(self, attempt: int, response: Optional[Response] = None) -> float:
+        """The time to wait (in seconds) after the attempt-th attempt failed."""
+        if self.respect_retry_after and response is not None:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+def is_replayable(content: Any) -> bool:
+    """Whether a request body can be sent again: bytes, or a re-iterable body like FileChunks."""
+    if content is None or isinstance(content, (bytes, str, list, tuple)):
+        return True
+    return bool(getattr(content, "replayable", False))
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either a number of seconds, or an HTTP date."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+
+
+__all__ = ["search_body"]
+
+
+# the DAV: properties that ResourceTable column names map to
+_ORDER_PROPERTIES = {
+    "name": "d:displayname",
+    "size": "d:getcontentlength",
+    "mtime": "d:getlastmodified",
+}
+_DEFAULT_PROPERTIES = [
+    "d:displayname",
+    "d:getcontentlength",
+    "d:getcontenttype",
+    "d:getetag",
+    "d:getlastmodified",
+    "d:resourcetype",
+]
+
+
+def search_body(
+    scope: str,
+    *,
+    depth: Literal["0", "1", "infinity"] = "infinity",
+    type: Optional[Literal["file", "collection"]] = None,
+    name: Optional[str] = None,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    modified_after: Optional[float] = None,
+    modified_before: Optional[float] = None,
+    order_by: Optional[Literal["name", "size", "mtime"]] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    properties: Optional[List[str]] = None,
+) -> bytes:
+    """
+    Builds the body of a SEARCH request (RFC 5323), as a DASL basicsearch query.
+    The conditions are the same as those of `ResourceTable.filter`, and are combined with AND.
+
+    Args:
+        scope: The (server) path of the collection to search in, eg: /remote.php/dav/files/demo/
+        depth: How deep below scope to search
+        type: Only match files, or only collections
+        name: A glob pattern (eg: *.jpg) the name should match
+        min_size: Minimum size in bytes (inclusive)
+        max_size: Maximum size in bytes (inclusive)
+        modified_after: Only match entries modified at or after this timestamp
+        modified_before: Only match entries modified before this timestamp
+        order_by: Sort the results by name, size or modification time
+        descending: Sort in descending order
+        limit: The maximum number of results
+        properties: List of properties to return for each result
+    """
+    root = ET.Element(
+        "d:searchrequest",
+        {
+            "xmlns:d": "DAV:",
+            "xmlns:oc": "http://owncloud.org/ns",
+        },
+    )
+    search = ET.SubElement(root, "d:basicsearch")
+    prop = ET.SubElement(ET.SubElement(search, "d:select"), "d:prop")
+    for i in properties or _DEFAULT_PROPERTIES:
+        ET.SubElement(prop, i)
+    from_scope = ET.SubElement(ET.SubElement(search, "d:from"), "d:scope")
+    ET.SubElement(from_scope, "d:href").text = scope
+    ET.SubElement(from_scope, "d:depth").text = depth
+
+    conditions: List[ET.Element] = []
+    if type == "collection":
+        conditions.append(ET.Element("d:is-collection"))
+    elif type == "file":
+        not_ = ET.Element("d:not")
+        ET.SubElement(not_, "d:is-collection")
+        conditions.append(not_)
+    if name is not None:
+        conditions.append(_comparison("d:like", "d:displayname", _glob_to_like(name)))
+    if min_size is not None:
+        conditions.append(_comparison("d:gte", "d:getcontentlength", str(min_size)))
+    if max_size is not None:
+        conditions.append(_comparison("d:lte", "d:getcontentlength", str(max_size)))
+    if modified_after is not None:
+        conditions.append(
+            _comparison("d:gte", "d:getlastmodified", _iso_date(modified_after))
+        )
+    if modified_before is not None:
+        conditions.append(
+            _comparison("d:lt", "d:getlastmodified", _iso_date(modified_before))
+        )
+    if conditions:
+        where = ET.SubElement(search, "d:where")
+        if len(conditions) == 1:
+            where.append(conditions[0])
+        else:
+            ET.SubElement(where, "d:and").extend(conditions)
+
+    if order_by is not None:
+        order = ET.SubElement(ET.SubElement(search, "d:orderby"), "d:order")
+        ET.SubElement(ET.SubElement(order, "d:prop"), _ORDER_PROPERTIES[order_by])
+        ET.SubElement(order, "d:descending" if descending else "d:ascending")
+    if limit is not None:
+        ET.SubElement(ET.SubElement(search, "d:limit"), "d:nresults").text = str(limit)
+    return ET.tostring(root)
+
+
+def _comparison(operator: str, prop_name: str, literal: str) -> ET.Element:
+    """<operator><d:prop><prop_name/></d:prop><d:literal>literal</d:literal></operator>"""
+    elem = ET.Element(operator)
+    ET.SubElement(ET.SubElement(elem, "d:prop"), prop_name)
+    ET.SubElement(elem, "d:literal").text = literal
+    return elem
+
+
+def _glob_to_like(pattern: str) -> str:
+    """Converts a glob pattern into a DASL like pattern: *.jp?g -> %.jp_g"""
+    out = []
+    for char in pattern:
+        if char in "%_\\":
+            out.append("\\" + char)
+        elif char == "*":
+            out.append("%")
+        elif char == "?":
+            out.append("_")
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def _iso_date(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
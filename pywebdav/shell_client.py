@@ -1,17 +1,67 @@
 from __future__ import annotations
 
+import copy
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Literal, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Tuple
 
 from . import SyncWebDAVClient
-from .types import DAVResponse, Resource
-from .utils import form_path, response_to_resources
+from .cache import MetadataCache
+from .metrics import TransferProgress
+from .retry import RetryPolicy
+from .types import (
+    DAVException,
+    ProgressCallback,
+    Resource,
+    ResourceTable,
+    TransferResult,
+)
+from .utils import download_target, form_path, href_to_path, upload_target
+
+
+# collection sizes reported by ownCloud/Nextcloud (oc:size) and by RFC 4331 (quota-used-bytes)
+_SIZE_PROPERTIES = [
+    "d:resourcetype",
+    "d:getcontentlength",
+    "d:getlastmodified",
+    "d:getetag",
+    "oc:size",
+    "d:quota-used-bytes",
+]
+
+
+@dataclass
+class SizeNode:
+    """A file or folder, with the total size of everything in it."""
+
+    name: str
+    is_collection: bool
+    size: int = 0
+    children: Dict[str, SizeNode] = field(default_factory=dict)
+
+
+@dataclass
+class Job:
+    """A command running in the background of a shell session; see `ShellDAVClient.submit`."""
+
+    id: int
+    command: str
+    future: Future[Any]
+    progress: TransferProgress
+
+    @property
+    def status(self) -> Literal["queued", "running", "done"]:
+        if self.future.done():
+            return "done"
+        return "running" if self.future.running() else "queued"
 
 
 class ShellDAVClient:
     """
     Handles a shell session.
-    Note: This currently only allows synchronous operations.
+    Note: Commands run one at a time, unless they are started as background jobs
+    (see `submit`).
     """
 
     def __init__(
@@ -22,11 +72,70 @@ class ShellDAVClient:
         scheme: Literal["http", "https"],
         auth: Optional[Tuple[str, str]],
         path: Optional[str],
+        cache_ttl: float = 0,
+        http2: bool = False,
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        max_jobs: int = 4,
     ) -> None:
+        """
+        Args:
+            cache_ttl: How long (in seconds) listings are cached for; 0 disables caching.
+                       Changes made through this client invalidate cached listings.
+            http2: Whether to use HTTP/2
+            timeout: Timeout in seconds for network operations
+            retries: How many times failed requests are retried (see `RetryPolicy`)
+            max_jobs: How many background jobs run at once; more wait their turn
+        """
         self.dav_client = SyncWebDAVClient(
-            host, port, scheme=scheme, auth=auth, path=path
+            host,
+            port,
+            scheme=scheme,
+            auth=auth,
+            path=path,
+            http2=http2,
+            timeout=timeout,
+            metadata_cache=MetadataCache(ttl=cache_ttl) if cache_ttl > 0 else None,
+            retry=RetryPolicy(max_attempts=retries + 1) if retries > 0 else None,
         )
         self.cwd = "/"
+        self.max_jobs = max_jobs
+        self.jobs: Dict[int, Job] = {}  # running jobs, and finished ones not yet reaped
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._last_job_id = 0
+
+    def submit(
+        self, command: str, func: Callable[[ShellDAVClient, TransferProgress], Any]
+    ) -> Job:
+        """
+        Starts func(client, progress) as a background job on a pool of max_jobs threads.
+        The client passed to func shares this one's connections, but keeps the cwd this
+        one had when the job was submitted, so that a later `cd` doesn't change its paths.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.max_jobs), thread_name_prefix="pywebdav-job"
+            )
+        self._last_job_id += 1
+        progress = TransferProgress()
+        future = self._executor.submit(func, copy.copy(self), progress)
+        job = self.jobs[self._last_job_id] = Job(
+            self._last_job_id, command, future, progress
+        )
+        return job
+
+    def reap(self) -> List[Job]:
+        """Removes the jobs that have finished from `jobs`, and returns them."""
+        done = [job for job in self.jobs.values() if job.future.done()]
+        for job in done:
+            del self.jobs[job.id]
+        return done
+
+    def close(self) -> None:
+        """Waits for the background jobs to finish, then closes the connections."""
+        if self._executor is not None:
+            self._executor.shutdown()
+        self.dav_client.close()
 
     def ls(
         self,
@@ -37,43 +146,167 @@ class ShellDAVClient:
     ) -> List[Resource]:
         """List files/folders."""
         path = form_path(self.cwd, path)
-        res = self.dav_client.propfind(path, depth=depth, properties=properties)
-        res.raise_for_status()
-        resources = response_to_resources(res)
+        resources = self.dav_client.list_resources(
+            path, depth=depth, properties=properties
+        )
         if resources:
             resources = resources[1:]  # the first entry is the root
         return resources
 
-    def mkdir(self, dirname: str) -> DAVResponse:
+    def du(self, path: Optional[str] = None) -> SizeNode:
+        """
+        Returns the total size of path, and that of each of its members (in `children`).
+        Uses the folder sizes reported by the server if it has them; otherwise the folders
+        are walked, adding up the file sizes as the listings arrive.
+        """
+        return self.tree(path, max_depth=1)
+
+    def tree(self, path: Optional[str] = None, *, max_depth: int = 3) -> SizeNode:
+        """
+        Returns the tree below path, max_depth levels deep, with the total size of each
+        folder. Anything deeper is only counted in the sizes; it isn't kept in memory.
+        """
+        path = form_path(self.cwd, path or self.cwd)
+        root = SizeNode(path.rstrip("/").rsplit("/", 1)[-1] or "/", is_collection=True)
+        unsized: List[str] = []  # folders at max_depth that need to be walked to size
+        self._add_sizes(
+            root,
+            path,
+            self.dav_client.walk(
+                path, properties=_SIZE_PROPERTIES, max_depth=max_depth
+            ),
+            max_depth,
+            unsized,
+        )
+        for folder in unsized:
+            self._add_sizes(
+                root,
+                path,
+                self.dav_client.walk(folder, properties=_SIZE_PROPERTIES),
+                max_depth,
+                [],
+            )
+        return root
+
+    def _add_sizes(
+        self,
+        root: SizeNode,
+        root_path: str,
+        resources: Iterable[Resource],
+        max_depth: int,
+        unsized: List[str],
+    ) -> None:
+        """Adds the sizes of resources to the nodes above them, creating the nodes down to max_depth."""
+        prefix_len = len(root_path.rstrip("/"))
+        for resource in resources:
+            path = href_to_path(resource.href, self.dav_client.base_url)
+            parts = path[prefix_len:].strip("/").split("/")
+            is_collection = resource.properties["type"] == "collection"
+            size = resource.properties.get("size")
+            # files count at any depth; folders only count where we stop walking, if the
+            # server reported their size
+            if is_collection and len(parts) == max_depth and size is None:
+                unsized.append(path)
+            counted = 0
+            if not is_collection or len(parts) == max_depth:
+                counted = size or 0
+
+            node = root
+            node.size += counted
+            for depth, name in enumerate(parts[:max_depth], 1):
+                child = node.children.get(name)
+                if child is None:
+                    child = node.children[name] = SizeNode(
+                        name, is_collection=is_collection or depth < len(parts)
+                    )
+                child.size += counted
+                node = child
+
+    def find(
+        self,
+        path: Optional[str] = None,
+        *,
+        limit: Optional[int] = None,
+        **criteria: Any,
+    ) -> List[Resource]:
+        """
+        Finds the files and folders below path that match criteria (see `ResourceTable.filter`).
+        The server is asked to search with a SEARCH request; if it doesn't support that, the
+        tree is walked and filtered locally instead.
+        """
+        path = form_path(self.cwd, path or self.cwd)
+        try:
+            return self.dav_client.search(
+                path, order_by="name", limit=limit, **criteria
+            )
+        except DAVException as err:
+            if err.status_code not in (400, 403, 405, 422, 501):
+                raise
+        # many servers refuse Depth: infinity, so walk the tree one collection at a time
+        table = ResourceTable(self.dav_client.walk(path))
+        table = table.filter(**criteria).sorted_by("name")
+        return [resource.to_resource() for resource in table[:limit]]
+
+    def mkdir(self, dirname: str) -> None:
         """Create a new folder."""
-        return self.dav_client.mkcol(form_path(self.cwd, dirname))
+        res = self.dav_client.mkcol(form_path(self.cwd, dirname))
+        res.raise_for_status()
 
-    def download(self, src_path: str, target_fp: Path) -> None:
-        """Downloads a file located at src_path and saved it into target_fp."""
+    def download(
+        self,
+        src_path: str,
+        target_fp: Path,
+        *,
+        resume: bool = False,
+        progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        """
+        Downloads a file located at src_path and saved it into target_fp.
+        If resume is True, continues from an earlier, interrupted download.
+        progress is called as the download goes (see `TransferProgress`).
+        """
         path = form_path(self.cwd, src_path)
-        res = self.dav_client.get(path)
-        res.raise_for_status()
+        target_fp = download_target(src_path, target_fp)
+        self.dav_client.download_to(path, target_fp, resume=resume, progress=progress)
 
-        if target_fp.suffix == "":  # no filename provided
-            # use source file name
-            target_fp /= Path(src_path).name
-
-        with open(target_fp, "wb") as f:
-            f.write(res.orig.read())
-
-    def upload(self, source_fp: Path, target_path: str) -> None:
-        """Uploads source_fp to target_path."""
-        if Path(target_path).suffix == "":  # no filename provided
-            # use source file name
-            if target_path == ".":
-                target_path = source_fp.name
-            else:
-                target_path += source_fp.name
-        path = form_path(self.cwd, target_path)
+    def upload(
+        self,
+        source_fp: Path,
+        target_path: str,
+        *,
+        resume: bool = False,
+        chunked: bool = False,
+        progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        """
+        Uploads source_fp to target_path.
+        If resume is True, the file is uploaded in segments, continuing from an earlier,
+        interrupted upload. If chunked is True, the ownCloud/Nextcloud chunked upload
+        protocol is used instead, which also resumes interrupted uploads.
+        progress is called as the upload goes (see `TransferProgress`), except for
+        chunked uploads.
+        """
+        path = upload_target(self.cwd, source_fp, target_path)
+        if chunked:
+            self.dav_client.put_chunked(path.rstrip("/"), source_fp)
+            return
+        if resume:
+            self.dav_client.put_resumable(path, source_fp, progress=progress)
+            return
         with open(source_fp, "rb") as f:
-            res = self.dav_client.put(path, content=f.read())
+            res = self.dav_client.put(path, content=f, progress=progress)
         res.raise_for_status()
 
+    def upload_tree(self, source_dir: Path, target_path: str) -> List[TransferResult]:
+        """Uploads the directory source_dir, recursively, into the folder target_path."""
+        path = form_path(self.cwd, target_path)
+        return self.dav_client.upload_tree(source_dir, path)
+
+    def download_tree(self, src_path: str, target_dir: Path) -> List[TransferResult]:
+        """Downloads the folder at src_path, recursively, into target_dir."""
+        path = form_path(self.cwd, src_path)
+        return self.dav_client.download_tree(path, target_dir)
+
     def move(self, src_path: str, target_path: str) -> None:
         """Moves a file from src_path to target_path."""
         if not src_path.startswith("/"):
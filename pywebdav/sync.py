@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Union
+
+from .types import Resource, parse_http_date
+
+
+__all__ = [
+    "SyncAction",
+    "SyncEntry",
+    "SyncPlan",
+    "SyncState",
+    "SyncTokenStore",
+    "file_checksum",
+    "plan_sync",
+    "scan_local",
+]
+
+
+SyncDirection = Literal["upload", "download"]
+ActionKind = Literal[
+    "mkcol", "mkdir", "upload", "download", "delete_remote", "delete_local", "conflict"
+]
+
+# HTTP dates have a resolution of one second
+_MTIME_TOLERANCE = 1.0
+# oc:checksums algorithm -> hashlib name, in order of preference
+_CHECKSUM_ALGORITHMS = {"SHA256": "sha256", "SHA1": "sha1", "MD5": "md5"}
+
+
+@dataclass
+class SyncEntry:
+    """A file or directory on one side of a sync; path is relative to the synced root."""
+
+    path: str
+    is_dir: bool
+    size: int = 0
+    mtime: Optional[float] = None
+    etag: str = ""
+    checksums: str = ""  # only known for remote files, eg: "SHA1:abc... MD5:def..."
+
+    @classmethod
+    def from_resource(cls, path: str, resource: Resource) -> SyncEntry:
+        props = resource.properties
+        return cls(
+            path=path,
+            is_dir=props["type"] == "collection",
+            size=props.get("size", 0),  # type: ignore
+            mtime=parse_http_date(props["last_modified"]),
+            etag=props["etag"],
+            checksums=props.get("checksums", ""),  # type: ignore
+        )
+
+
+@dataclass
+class SyncAction:
+    kind: ActionKind
+    path: str
+    size: int = 0
+    reason: str = ""  # why the action is needed, eg: "missing", "size", "checksum"
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class SyncPlan:
+    """The changes needed to make one side of a sync match the other."""
+
+    direction: SyncDirection
+    actions: List[SyncAction] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def transfers(self) -> List[SyncAction]:
+        return [a for a in self.actions if a.kind in ("upload", "download")]
+
+    @property
+    def bytes_to_transfer(self) -> int:
+        return sum(a.size for a in self.transfers)
+
+    @property
+    def ok(self) -> bool:
+        return all(a.ok for a in self.actions)
+
+    def summary(self) -> str:
+        counts: Dict[str, int] = {}
+        for action in self.actions:
+            counts[action.kind] = counts.get(action.kind, 0) + 1
+        parts = [f"{n} {kind}" for kind, n in counts.items()]
+        parts.append(f"{len(self.unchanged)} unchanged")
+        return ", ".join(parts)
+
+
+class SyncState:
+    """
+    What both sides looked like after the last sync, keyed by relative path.
+    For each file, the local size and mtime and the remote ETag are kept; a file whose
+    local stats and remote ETag still match is unchanged, without comparing anything else.
+    Stored as JSON, at `path`.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None) -> None:
+        self.path = Path(path).expanduser() if path is not None else None
+        self.entries: Dict[str, Dict] = {}
+        if self.path is not None and self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except ValueError:  # corrupt state; everything is compared again
+                pass
+
+    def get(self, path: str) -> Optional[Dict]:
+        return self.entries.get(path)
+
+    def record(self, local: SyncEntry, remote_etag: str) -> None:
+        self.entries[local.path] = {
+            "size": local.size,
+            "mtime": local.mtime,
+            "etag": remote_etag,
+        }
+
+    def forget(self, path: str) -> None:
+        self.entries.pop(path, None)
+        prefix = path + "/"
+        for key in [key for key in self.entries if key.startswith(prefix)]:
+            del self.entries[key]
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries))
+        os.replace(tmp, self.path)
+
+
+class SyncTokenStore:
+    """
+    Keeps the position of each polled collection between runs, for `poll_changes`:
+    the last sync token, or the ETags of its members when the server doesn't support
+    sync-collection. Stored as JSON, at `path`; without a path, it's only kept in memory.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None) -> None:
+        self.path = Path(path).expanduser() if path is not None else None
+        # collection path -> {"token": ...} or {"etags": {href: etag}}
+        self.entries: Dict[str, Dict] = {}
+        if self.path is not None and self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except ValueError:  # corrupt store; the next poll starts over
+                pass
+
+    def get_token(self, collection: str) -> Optional[str]:
+        return self.entries.get(_collection_key(collection), {}).get("token")
+
+    def set_token(self, collection: str, token: str) -> None:
+        self.entries[_collection_key(collection)] = {"token": token}
+
+    def get_etags(self, collection: str) -> Optional[Dict[str, str]]:
+        return self.entries.get(_collection_key(collection), {}).get("etags")
+
+    def set_etags(self, collection: str, etags: Dict[str, str]) -> None:
+        self.entries[_collection_key(collection)] = {"etags": etags}
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries))
+        os.replace(tmp, self.path)
+
+
+def scan_local(local_dir: Path) -> Dict[str, SyncEntry]:
+    """Lists everything below local_dir, keyed by relative (posix) path."""
+    entries = {}
+    for root, dirnames, filenames in os.walk(local_dir):
+        rel_root = Path(root).relative_to(local_dir).as_posix()
+        prefix = "" if rel_root == "." else rel_root + "/"
+        for name in dirnames:
+            entries[prefix + name] = SyncEntry(prefix + name, is_dir=True)
+        for name in filenames:
+            stat = (Path(root) / name).stat()
+            entries[prefix + name] = SyncEntry(
+                prefix + name, is_dir=False, size=stat.st_size, mtime=stat.st_mtime
+            )
+    return entries
+
+
+def plan_sync(
+    local: Dict[str, SyncEntry],
+    remote: Dict[str, SyncEntry],
+    *,
+    direction: SyncDirection,
+    delete: bool = False,
+    state: Optional[SyncState] = None,
+    local_dir: Optional[Path] = None,
+) -> SyncPlan:
+    """
+    Works out what to create, transfer and delete to make the target side match the source
+    side (remote for "upload", local for "download").
+
+    Files present on both sides are compared by size first, then by the state recorded
+    by the last sync (local size/mtime and remote ETag), then by checksum if the remote
+    side has one (and local_dir is given to hash the local file), and finally by
+    modification time: the target is only overwritten if the source is newer.
+
+    Args:
+        local: The local entries, see `scan_local`
+        remote: The remote entries, keyed by relative path
+        direction: "upload" to update the remote side, "download" to update the local side
+        delete: Whether to delete entries on the target side that the source side doesn't have
+        state: The state recorded by the last sync, if any
+        local_dir: The local root; needed to compare checksums
+    """
+    if direction == "upload":
+        source, target = local, remote
+        create, transfer, remove = "mkcol", "upload", "delete_remote"
+    else:
+        source, target = remote, local
+        create, transfer, remove = "mkdir", "download", "delete_local"
+
+    plan = SyncPlan(direction)
+    removed: List[str] = []
+    conflicts: List[str] = []
+    for path in sorted(source, key=lambda p: (p.count("/"), p)):
+        if any(path.startswith(c + "/") for c in conflicts):
+            continue
+        entry = source[path]
+        other = target.get(path)
+        if other is not None and other.is_dir != entry.is_dir:
+            if not delete:
+                plan.actions.append(SyncAction("conflict", path, reason="type"))
+                conflicts.append(path)
+                continue
+            plan.actions.append(SyncAction(remove, path, reason="type"))
+            removed.append(path)
+            other = None
+        if entry.is_dir:
+            if other is None:
+                plan.actions.append(SyncAction(create, path, reason="missing"))
+            continue
+        if other is None:
+            plan.actions.append(SyncAction(transfer, path, entry.size, "missing"))
+            continue
+        local_entry, remote_entry = (
+            (entry, other) if direction == "upload" else (other, entry)
+        )
+        reason = _compare(local_entry, remote_entry, direction, state, local_dir)
+        if reason:
+            plan.actions.append(SyncAction(transfer, path, entry.size, reason))
+        else:
+            plan.unchanged.append(path)
+
+    if delete:
+        for path in sorted(target):
+            if path in source or any(path.startswith(r + "/") for r in removed):
+                continue
+            removed.append(path)
+            plan.actions.append(SyncAction(remove, path, reason="extra"))
+    return plan
+
+
+def _compare(
+    local: SyncEntry,
+    remote: SyncEntry,
+    direction: SyncDirection,
+    state: Optional[SyncState],
+    local_dir: Optional[Path],
+) -> str:
+    """Returns why the file differs between both sides, or an empty string if it doesn't."""
+    if local.size != remote.size:
+        return "size"
+    recorded = state.get(local.path) if state is not None else None
+    if recorded is not None and recorded["etag"]:
+        if (
+            recorded["size"] == local.size
+            and recorded["mtime"] == local.mtime
+            and recorded["etag"] == remote.etag
+        ):
+            return ""
+    if remote.checksums and local_dir is not None:
+        matches = _checksum_matches(local_dir / local.path, remote.checksums)
+        if matches is not None:
+            return "" if matches else "checksum"
+    if recorded is not None and recorded["etag"]:
+        return "changed"
+    if local.mtime is None or remote.mtime is None:
+        return "mtime"
+    if direction == "upload":
+        newer = local.mtime > remote.mtime + _MTIME_TOLERANCE
+    else:
+        newer = remote.mtime > local.mtime + _MTIME_TOLERANCE
+    return "mtime" if newer else ""
+
+
+def _checksum_matches(fp: Path, checksums: str) -> Optional[bool]:
+    """Compares fp against an oc:checksums value; None if no algorithm is supported."""
+    known = dict(
+        item.split(":", 1) for item in checksums.split() if ":" in item
+    )  # eg: {"SHA1": "abc...", "MD5": "def..."}
+    for name, algorithm in _CHECKSUM_ALGORITHMS.items():
+        if name in known:
+            return file_checksum(fp, algorithm) == known[name].lower()
+    return None
+
+
+def _collection_key(path: str) -> str:
+    return "/" + path.strip("/")
+
+
+def file_checksum(fp: Path, algorithm: str, chunk_size: int = 1024 * 1024) -> str:
+    """Returns the hex digest of the contents of fp."""
+    digest = hashlib.new(algorithm)
+    with open(fp, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -1,20 +1,59 @@
 from __future__ import annotations
 
-import xml.etree.ElementTree as ET
-from dataclasses import dataclass
+import math
+import mmap
+import sys
+from array import array
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
 from enum import Enum
-from pathlib import Path
-from typing import Literal, Tuple, TypedDict, Union
+from fnmatch import fnmatchcase
+from typing import (
+    IO,
+    Any,
+    AsyncIterable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    TypedDict,
+    Union,
+    overload,
+)
 
-from httpx import BasicAuth, DigestAuth, Response
+if TYPE_CHECKING:  # kept out of imports at runtime, so that the CLI starts quickly
+    import xml.etree.ElementTree as ET
+
+    from httpx import BasicAuth, DigestAuth, Response
 
 
 Auth = Union[
-    Tuple[str, str], BasicAuth, DigestAuth
+    Tuple[str, str], "BasicAuth", "DigestAuth"
 ]  # (email, pw) | BasicAuth | DigestAuth
 Cert = Union[str, Tuple[str, str]]  # path-to-cert.pem | ('cert', 'key')
+UploadContent = Union[
+    bytes, str, IO[bytes], mmap.mmap, Iterable[bytes], AsyncIterable[bytes]
+]  # str is sent UTF-8 encoded; AsyncIterable bodies can only be sent with the async client
+# called as a transfer goes, with (bytes transferred, total bytes if known)
+ProgressCallback = Callable[[int, Optional[int]], None]
 RequestMethodLiteral = Literal[
-    "PROPFIND", "GET", "PUT", "DELETE", "MKCOL", "HEAD", "POST", "MOVE", "COPY"
+    "PROPFIND",
+    "GET",
+    "PUT",
+    "DELETE",
+    "MKCOL",
+    "HEAD",
+    "POST",
+    "MOVE",
+    "COPY",
+    "REPORT",
+    "SEARCH",
 ]
 # there are more methods, we'll see how many we can implement in time
 
@@ -29,6 +68,8 @@ class RequestMethod(str, Enum):
     POST = "POST"
     MOVE = "MOVE"
     COPY = "COPY"
+    REPORT = "REPORT"
+    SEARCH = "SEARCH"
 
 
 class DAVException(Exception):
@@ -42,8 +83,9 @@ class DAVException(Exception):
 
 
 class DAVResponse:
-    def __init__(self, response: Response) -> None:
+    def __init__(self, response: Response, *, from_cache: bool = False) -> None:
         self.orig = response
+        self.from_cache = from_cache  # served by a ContentCache
 
     @property
     def status_code(self) -> int:
@@ -60,19 +102,75 @@ class DAVResponse:
 
     def xml(self) -> ET.Element:
         """Parses the response XML content."""
+        import xml.etree.ElementTree as ET
+
         return ET.fromstring(self.orig.content)
 
     def __repr__(self) -> str:
         return f"<DAVResponse [{self.orig.status_code}]>"
 
 
-class CollectionProperties(TypedDict):
+@dataclass
+class Operation:
+    """
+    A client method call, to be run as part of a batch.
+    Example: Operation("put", ("/notes.txt",), {"content": b"..."})
+    """
+
+    method: str
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class OperationResult:
+    """The outcome of an Operation; either the method's return value, or the exception it raised."""
+
+    operation: Operation
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the operation completed without an exception or an error status."""
+        if self.error is not None:
+            return False
+        return not (
+            isinstance(self.result, DAVResponse) and self.result.status_code >= 400
+        )
+
+
+@dataclass
+class TransferResult:
+    """The outcome of transferring a single file, as part of a tree upload/download."""
+
+    source: str
+    target: str
+    size: int
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _OptionalCollectionProperties(TypedDict, total=False):
+    # only present when requested from (and reported by) the server
+    size: int  # the size of everything in the collection: oc:size or quota-used-bytes
+
+
+class CollectionProperties(_OptionalCollectionProperties):
     type: Literal["collection"]
     last_modified: str
     etag: str
 
 
-class FileProperties(TypedDict):
+class _OptionalFileProperties(TypedDict, total=False):
+    # only present when requested from (and reported by) the server
+    checksums: str  # ownCloud oc:checksums, eg: "SHA1:abc... MD5:def..."
+
+
+class FileProperties(_OptionalFileProperties):
     type: Literal["file"]
     last_modified: str
     etag: str
@@ -91,4 +189,295 @@ class Resource:
     @property
     def basename(self) -> str:
         """Returns the name of the file, excluding the rest of it's path."""
-        return Path(self.href).name
+        return _split_href(self.href)[1].rstrip("/")
+
+
+@dataclass
+class SyncCollectionResult:
+    """The changes in a collection since an earlier sync token (or since the last poll)."""
+
+    # the token to ask for the next changes with; None when the changes were worked out
+    # by comparing ETags, because the server doesn't support sync-collection
+    sync_token: Optional[str]
+    changed: List[Resource] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)  # hrefs of the removed members
+    # the server returned only some of the changes; ask again with sync_token for the rest
+    truncated: bool = False
+
+
+class CompactResource:
+    """
+    A memory compact, read-only version of Resource, for very large listings.
+
+    It has the same API as Resource (href, properties, status, basename), but keeps the
+    properties in typed slots instead of a dict, and stores the href as an interned
+    parent prefix (shared by all the entries in a collection) plus the entry's own name.
+    The last modified date is kept as a timestamp; `properties["last_modified"]` is
+    formatted back from it as an HTTP date. The optional properties (the size of a
+    collection, the checksums of a file) are None when the server didn't report them.
+    """
+
+    __slots__ = (
+        "parent",
+        "name",
+        "is_collection",
+        "size",
+        "mtime",
+        "etag",
+        "content_type",
+        "checksums",
+        "status",
+    )
+
+    def __init__(
+        self,
+        href: str,
+        *,
+        is_collection: bool,
+        size: Optional[int] = None,
+        mtime: Optional[float] = None,
+        etag: str = "",
+        content_type: str = "",
+        checksums: Optional[str] = None,
+        status: str = "",
+    ) -> None:
+        self.parent, self.name = _split_href(href)
+        self.is_collection = is_collection
+        self.size = size if size is not None or is_collection else 0
+        self.mtime = mtime
+        self.etag = etag
+        self.content_type = sys.intern(content_type)
+        self.checksums = checksums
+        self.status = sys.intern(status)
+
+    @classmethod
+    def from_resource(cls, resource: Resource) -> CompactResource:
+        props = resource.properties
+        return cls(
+            resource.href,
+            is_collection=props.get("type") == "collection",
+            size=props.get("size"),
+            mtime=parse_http_date(props.get("last_modified", "")),
+            etag=props.get("etag", ""),
+            content_type=props.get("content_type", ""),  # type: ignore
+            checksums=props.get("checksums"),  # type: ignore
+            status=resource.status,
+        )
+
+    @property
+    def href(self) -> str:
+        return self.parent + self.name
+
+    @property
+    def basename(self) -> str:
+        """Returns the name of the file, excluding the rest of it's path."""
+        return self.name.rstrip("/")
+
+    @property
+    def last_modified(self) -> str:
+        return "" if self.mtime is None else formatdate(self.mtime, usegmt=True)
+
+    @property
+    def properties(self) -> Union[CollectionProperties, FileProperties]:
+        if self.is_collection:
+            collection: CollectionProperties = {
+                "type": "collection",
+                "last_modified": self.last_modified,
+                "etag": self.etag,
+            }
+            if self.size is not None:
+                collection["size"] = self.size
+            return collection
+        file: FileProperties = {
+            "type": "file",
+            "last_modified": self.last_modified,
+            "etag": self.etag,
+            "size": self.size or 0,
+            "content_type": self.content_type,
+        }
+        if self.checksums is not None:
+            file["checksums"] = self.checksums
+        return file
+
+    def to_resource(self) -> Resource:
+        return Resource(href=self.href, properties=self.properties, status=self.status)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (CompactResource, Resource)):
+            return (self.href, self.properties, self.status) == (
+                other.href,
+                other.properties,
+                other.status,
+            )
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<CompactResource {self.href!r}>"
+
+
+class ResourceTable(Sequence[CompactResource]):
+    """
+    Columnar storage for huge listings: sizes, modification times and types are kept in
+    `array`s, so that millions of entries can be sorted and filtered cheaply.
+    Indexing or iterating over the table returns CompactResource objects.
+    """
+
+    def __init__(
+        self, resources: Iterable[Union[Resource, CompactResource]] = ()
+    ) -> None:
+        self.parents: List[str] = []
+        self.names: List[str] = []
+        self.sizes = array("q")  # -1 for collections of unknown size
+        self.mtimes = array("d")  # NaN if unknown
+        self.collection_flags = array("B")
+        self.etags: List[str] = []
+        self.content_types: List[str] = []
+        self.checksums: List[Optional[str]] = []
+        self.statuses: List[str] = []
+        self.extend(resources)
+
+    def append(self, resource: Union[Resource, CompactResource]) -> None:
+        if isinstance(resource, Resource):
+            resource = CompactResource.from_resource(resource)
+        self.parents.append(resource.parent)
+        self.names.append(resource.name)
+        self.sizes.append(-1 if resource.size is None else resource.size)
+        self.mtimes.append(math.nan if resource.mtime is None else resource.mtime)
+        self.collection_flags.append(resource.is_collection)
+        self.etags.append(resource.etag)
+        self.content_types.append(resource.content_type)
+        self.checksums.append(resource.checksums)
+        self.statuses.append(resource.status)
+
+    def extend(self, resources: Iterable[Union[Resource, CompactResource]]) -> None:
+        for resource in resources:
+            self.append(resource)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @overload
+    def __getitem__(self, index: int) -> CompactResource:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ResourceTable:
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[CompactResource, ResourceTable]:
+        if isinstance(index, slice):
+            return self.select(range(len(self))[index])
+        mtime = self.mtimes[index]
+        size = self.sizes[index]
+        return CompactResource(
+            self.parents[index] + self.names[index],
+            is_collection=bool(self.collection_flags[index]),
+            size=None if size < 0 else size,
+            mtime=None if math.isnan(mtime) else mtime,
+            etag=self.etags[index],
+            content_type=self.content_types[index],
+            checksums=self.checksums[index],
+            status=self.statuses[index],
+        )
+
+    def __iter__(self) -> Iterator[CompactResource]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def total_size(self) -> int:
+        """The total size of the files (collection sizes, if known, aren't counted)."""
+        return sum(
+            size for size, flag in zip(self.sizes, self.collection_flags) if not flag
+        )
+
+    def select(self, indices: Iterable[int]) -> ResourceTable:
+        """Returns a new table with the rows at the given indices, in that order."""
+        table = ResourceTable()
+        for i in indices:
+            table.parents.append(self.parents[i])
+            table.names.append(self.names[i])
+            table.sizes.append(self.sizes[i])
+            table.mtimes.append(self.mtimes[i])
+            table.collection_flags.append(self.collection_flags[i])
+            table.etags.append(self.etags[i])
+            table.content_types.append(self.content_types[i])
+            table.checksums.append(self.checksums[i])
+            table.statuses.append(self.statuses[i])
+        return table
+
+    def sorted_by(
+        self, column: Literal["name", "size", "mtime"], *, reverse: bool = False
+    ) -> ResourceTable:
+        """
+        Returns a new table sorted by name, size or modification time.
+        Rows without a known modification time come last when sorting by mtime.
+        """
+        values = {"name": self.names, "size": self.sizes, "mtime": self.mtimes}[column]
+        rows: Iterable[int] = range(len(self))
+        unknown: List[int] = []
+        if column == "mtime":  # NaN can't be compared, so it can't be sorted
+            unknown = [i for i in rows if math.isnan(self.mtimes[i])]
+            rows = [i for i in rows if not math.isnan(self.mtimes[i])]
+        order = sorted(rows, key=values.__getitem__, reverse=reverse)
+        return self.select(order + unknown)
+
+    def filter(
+        self,
+        *,
+        type: Optional[Literal["file", "collection"]] = None,
+        name: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None,
+    ) -> ResourceTable:
+        """
+        Returns a new table with the rows matching all of the given conditions.
+
+        Args:
+            type: Only keep files, or only collections
+            name: A glob pattern (eg: *.jpg) the basename should match
+            min_size: Minimum size in bytes (inclusive); collections of unknown size
+                      are left out by both size limits
+            max_size: Maximum size in bytes (inclusive)
+            modified_after: Only keep entries modified at or after this timestamp
+            modified_before: Only keep entries modified before this timestamp
+        """
+        indices = range(len(self))
+        if type is not None:
+            flag = type == "collection"
+            indices = [i for i in indices if self.collection_flags[i] == flag]
+        if min_size is not None:
+            indices = [i for i in indices if self.sizes[i] >= min_size]
+        if max_size is not None:
+            indices = [i for i in indices if 0 <= self.sizes[i] <= max_size]
+        if modified_after is not None:
+            indices = [i for i in indices if self.mtimes[i] >= modified_after]
+        if modified_before is not None:
+            indices = [i for i in indices if self.mtimes[i] < modified_before]
+        if name is not None:
+            indices = [
+                i for i in indices if fnmatchcase(self.names[i].rstrip("/"), name)
+            ]
+        return self.select(indices)
+
+
+AnyResource = Union[Resource, CompactResource]
+
+
+def parse_http_date(value: str) -> Optional[float]:
+    """Parses an HTTP date (eg: a getlastmodified value) into a timestamp."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _split_href(href: str) -> Tuple[str, str]:
+    """Splits an href into its (interned) parent prefix and its own name."""
+    i = href.rstrip("/").rfind("/") + 1
+    return sys.intern(href[:i]), href[i:]
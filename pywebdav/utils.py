@@ -1,15 +1,56 @@
 from __future__ import annotations
 
+import mmap
+import os
 import xml.etree.ElementTree as ET
-from typing import Union
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+from typing import (
+    IO,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
 
-from .types import CollectionProperties, FileProperties, DAVResponse, Resource
+from .types import (
+    AnyResource,
+    CollectionProperties,
+    CompactResource,
+    FileProperties,
+    DAVResponse,
+    Resource,
+    SyncCollectionResult,
+    UploadContent,
+)
 
 
-__all__ = ["DEFAULT_HEADERS", "form_path", "response_to_resources"]
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "DEFAULT_HEADERS",
+    "DEFAULT_SEGMENT_SIZE",
+    "FileChunks",
+    "ResourceParser",
+    "aiter_resources",
+    "byte_ranges",
+    "content_length",
+    "download_target",
+    "form_path",
+    "href_to_path",
+    "iter_resources",
+    "member_path",
+    "response_to_resources",
+    "response_to_sync_result",
+    "upload_chunks",
+    "upload_target",
+]
 
 
 DEFAULT_HEADERS = {"Content-Type": "application/xml"}
+DEFAULT_CHUNK_SIZE = 64 * 1024  # bytes read/written at a time by streaming transfers
+DEFAULT_SEGMENT_SIZE = 10 * 1024 * 1024  # bytes sent per request by segmented uploads
 
 
 def form_path(cwd: str, path: str) -> str:
@@ -47,28 +88,273 @@ def form_path(cwd: str, path: str) -> str:
         return result
 
 
+def upload_target(cwd: str, source_fp: Path, target_path: str) -> str:
+    """The remote path source_fp is uploaded to; target_path gets its name if it has none."""
+    if Path(target_path).suffix == "":  # no filename provided
+        # use source file name
+        if target_path == ".":
+            target_path = source_fp.name
+        else:
+            target_path += source_fp.name
+    return form_path(cwd, target_path)
+
+
+def download_target(src_path: str, target_fp: Path) -> Path:
+    """The local file src_path is downloaded to; target_fp gets its name if it has none."""
+    if target_fp.suffix == "":  # no filename provided
+        # use source file name
+        target_fp /= Path(src_path).name
+    return target_fp
+
+
+class FileChunks:
+    """
+    Iterates over an open binary file (or mmap) in fixed size chunks, so that it can be
+    streamed as a request body. Iterating again starts over from the position the file
+    was at when this object was created, if the file is seekable.
+    If length is passed, at most that many bytes are read.
+    """
+
+    def __init__(
+        self,
+        f: Union[IO[bytes], mmap.mmap],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        *,
+        length: Optional[int] = None,
+    ) -> None:
+        self._file = f
+        self._chunk_size = chunk_size
+        self._length = length
+        try:
+            self._start: Optional[int] = f.tell()
+        except (AttributeError, OSError):  # pipes, sockets etc.
+            self._start = None
+
+    @property
+    def replayable(self) -> bool:
+        """Whether iterating again produces the same chunks (the file is seekable)."""
+        return self._start is not None
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._start is not None:
+            self._file.seek(self._start)
+        remaining = self._length
+        while remaining is None or remaining > 0:
+            size = (
+                self._chunk_size
+                if remaining is None
+                else min(self._chunk_size, remaining)
+            )
+            chunk = self._file.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def upload_chunks(
+    content: UploadContent, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterable[bytes]:
+    """Converts file objects and mmaps into a chunk iterable; other iterables are returned unchanged."""
+    if isinstance(content, mmap.mmap) or hasattr(content, "read"):
+        return FileChunks(content, chunk_size)  # type: ignore
+    return content  # type: ignore
+
+
+def content_length(content: UploadContent) -> Optional[int]:
+    """
+    Returns the number of bytes that will be sent for an upload body, or None if it
+    can't be known without consuming the body (i.e for plain iterators).
+    """
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        return len(content)
+    if isinstance(content, mmap.mmap):
+        return len(content) - content.tell()
+    if hasattr(content, "read"):
+        f: IO[bytes] = content  # type: ignore
+        try:
+            return os.fstat(f.fileno()).st_size - f.tell()
+        except (AttributeError, OSError, ValueError):
+            pass
+        try:
+            pos = f.tell()
+            end = f.seek(0, os.SEEK_END)
+            f.seek(pos)
+            return end - pos
+        except (AttributeError, OSError, ValueError):
+            return None
+    return None
+
+
+def href_to_path(href: str, base_url: str) -> str:
+    """
+    Converts an href from a multistatus response (an absolute, quoted URL or path) into a path
+    relative to base_url, that can be passed to the client methods. eg:
+    href_to_path("/remote.php/dav/files/demo/My%20Docs/", "https://host/remote.php/dav/files/demo")
+    -> "/My Docs/"
+    """
+    path = unquote(urlsplit(href).path)
+    base_path = unquote(urlsplit(base_url).path).rstrip("/")
+    if base_path and path.startswith(base_path):
+        path = path[len(base_path) :]
+    return path if path.startswith("/") else "/" + path
+
+
+def member_path(path: str, root: str, local_dir: Path) -> Optional[str]:
+    """
+    The path (as returned by href_to_path) of a member of the collection at root, relative
+    to root, for copying it into local_dir. eg:
+    member_path("/docs/My Docs/a.txt", "/docs", local_dir) -> "My Docs/a.txt"
+    Returns None if path isn't below root, has empty, "." or ".." segments, or would end up
+    outside of local_dir anyway (through a symlink, say): hrefs come from the server, and
+    shouldn't be able to make the client write anywhere else.
+    """
+    root = root.rstrip("/") + "/"
+    if not path.startswith(root):
+        return None
+    relative = path[len(root) :]
+    if relative.endswith("/"):  # a collection
+        relative = relative[:-1]
+    segments = relative.split("/")
+    if any(segment in ("", ".", "..") for segment in segments):
+        return None
+    local_root = local_dir.resolve()
+    target = local_root.joinpath(*segments).resolve()
+    if target == local_root or local_root not in target.parents:
+        return None
+    return relative
+
+
+def byte_ranges(size: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Splits size bytes into (at most) `parts` contiguous, inclusive (start, end) ranges,
+    as used by the HTTP Range header.
+    """
+    parts = max(1, min(parts, size))
+    part_size, remainder = divmod(size, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + part_size + (1 if i < remainder else 0)
+        ranges.append((start, end - 1))
+        start = end
+    return ranges
+
+
 def response_to_resources(res: DAVResponse) -> list[Resource]:
     """
     Converts a DAVResponse into a list of Resource objects (if possible). Meant to be used with
     a PROPFIND request.
     """
-    resources: list[Resource] = []
-    for child in res.xml().findall("{DAV:}response"):
-        href = _get_child_named(child, "href", "")
-        href = href or ""  # will not happen, here for type checking
-        props_elem = child.findall("{DAV:}propstat/{DAV:}prop")[0]
-        if props_elem is None:
-            props = {}
-        else:
-            props = _parse_properties(props_elem)
+    return [
+        _response_to_resource(child) for child in res.xml().iterfind("{DAV:}response")
+    ]
 
+
+def response_to_sync_result(res: DAVResponse) -> SyncCollectionResult:
+    """
+    Converts the response to a sync-collection REPORT (RFC 6578) into a SyncCollectionResult.
+    Members reported with a 404 status were removed; the others were added or changed.
+    """
+    root = res.xml()
+    result = SyncCollectionResult(sync_token=_get_child_named(root, "sync-token", ""))
+    for child in root.iterfind("{DAV:}response"):
         status = _get_child_named(child, "status", "")
-        resources.append(Resource(href=href, properties=props, status=status))  # type: ignore
-    return resources
+        if " 507 " in status:  # 507 Insufficient Storage: the results were truncated
+            result.truncated = True
+        elif " 404 " in status:
+            result.removed.append(_get_child_named(child, "href", ""))
+        else:
+            result.changed.append(_response_to_resource(child))
+    return result
+
+
+class ResourceParser:
+    """
+    Incrementally parses a multistatus XML body (the response to a PROPFIND request),
+    producing Resource objects as soon as their <response> elements are complete.
+    Parsed elements are discarded, so memory use doesn't grow with the size of the listing.
+    If compact is True, CompactResource objects are produced instead.
+
+    Usage:
+        parser = ResourceParser()
+        for data in chunks:
+            for resource in parser.feed(data):
+                ...
+        for resource in parser.close():
+            ...
+    """
+
+    def __init__(self, *, compact: bool = False) -> None:
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root: Optional[ET.Element] = None
+        self._compact = compact
+
+    def feed(self, data: bytes) -> Iterator[AnyResource]:
+        """Feeds more data to the parser, yielding the resources that were completed by it."""
+        self._parser.feed(data)
+        return self._read_resources()
+
+    def close(self) -> Iterator[AnyResource]:
+        """Finishes parsing, yielding any remaining resources."""
+        self._parser.close()
+        return self._read_resources()
+
+    def _read_resources(self) -> Iterator[AnyResource]:
+        for event, elem in self._parser.read_events():
+            if self._root is None:
+                self._root = elem  # the first event is the start of the root element
+            elif event == "end" and elem.tag == "{DAV:}response":
+                resource = _response_to_resource(elem)
+                if self._compact:
+                    yield CompactResource.from_resource(resource)
+                else:
+                    yield resource
+                # responses are direct children of the root; drop the parsed ones
+                del self._root[:]
+
+
+def iter_resources(
+    chunks: Iterable[bytes], *, compact: bool = False
+) -> Iterator[AnyResource]:
+    """Parses Resource objects from a multistatus body received as an iterable of byte chunks."""
+    parser = ResourceParser(compact=compact)
+    for data in chunks:
+        yield from parser.feed(data)
+    yield from parser.close()
+
+
+async def aiter_resources(
+    chunks: AsyncIterable[bytes], *, compact: bool = False
+) -> AsyncIterator[AnyResource]:
+    """Parses Resource objects from a multistatus body received as an async iterable of byte chunks."""
+    parser = ResourceParser(compact=compact)
+    async for data in chunks:
+        for resource in parser.feed(data):
+            yield resource
+    for resource in parser.close():
+        yield resource
+
+
+def _response_to_resource(elem: ET.Element) -> Resource:
+    href = _get_child_named(elem, "href", "")
+    propstat = elem.find("{DAV:}propstat")
+    prop = propstat.find("{DAV:}prop") if propstat is not None else None
+    if prop is None:
+        props = {}
+    else:
+        props = _parse_properties(prop)
+
+    # the status is either a direct child of <response>, or that of the (first) propstat
+    status = _get_child_named(elem, "status", "")
+    if not status and propstat is not None:
+        status = _get_child_named(propstat, "status", "")
+    return Resource(href=href, properties=props, status=status)  # type: ignore
 
 
 def _get_child_named(elem: ET.Element, name: str, default: str) -> str:
-    child = elem.find(f".//{{DAV:}}{name}")
+    child = elem.find(f"{{DAV:}}{name}")
     # return child.text if it is not None, else return an empty string
     # however if child is None, return the specified default
     return (child.text or "") if child is not None else default
@@ -77,22 +363,29 @@ def _get_child_named(elem: ET.Element, name: str, default: str) -> str:
 def _parse_properties(elem: ET.Element) -> Union[CollectionProperties, FileProperties]:
     """Parse the properties element of a file or collection response."""
     props = {}
-    resource_type_elem = elem.find(".//{DAV:}resourcetype")
-    assert resource_type_elem is not None
+    resource_type_elem = elem.find("{DAV:}resourcetype")
     # the owncloud server returns a child <d:collection /> with the resourcetype element
     # in the case of collection responses
     # the resourcetype element has no children in the case of file responses.
     # TODO: investigate if this is standard
-    if len(resource_type_elem) == 1:
+    if resource_type_elem is not None and len(resource_type_elem) == 1:
         props["type"] = "collection"
     else:
         props["type"] = "file"
-
     props["last_modified"] = _get_child_named(elem, "getlastmodified", "")
     props["etag"] = _get_child_named(elem, "getetag", "")
 
+    if props["type"] == "collection":
+        size = elem.findtext("{http://owncloud.org/ns}size") or _get_child_named(
+            elem, "quota-used-bytes", ""
+        )
+        if size.isdigit():
+            props["size"] = int(size)
     if props["type"] == "file":
         props["size"] = int(_get_child_named(elem, "getcontentlength", "0"))
         props["content_type"] = _get_child_named(elem, "getcontenttype", "")
+        checksums = elem.find("{http://owncloud.org/ns}checksums")
+        if checksums is not None:
+            props["checksums"] = " ".join("".join(checksums.itertext()).split())
     # TODO: implement this with type safety
     return props  # type: ignore
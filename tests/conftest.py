@@ -0,0 +1,32 @@
+from typing import Any, Callable, Union
+
+import httpx
+import pytest
+
+from pywebdav import AsyncWebDAVClient, SyncWebDAVClient
+
+
+MockClientFactory = Callable[..., Union[AsyncWebDAVClient, SyncWebDAVClient]]
+
+
+@pytest.fixture
+def mock_client() -> MockClientFactory:
+    """
+    Makes clients for example.com/dav, whose requests are answered by a handler
+    (a callable taking an httpx.Request and returning an httpx.Response) instead of a server.
+    Extra keyword arguments are passed to the client; sync=True makes a SyncWebDAVClient.
+    """
+
+    def make(
+        handler: Callable[[httpx.Request], httpx.Response],
+        *,
+        sync: bool = False,
+        path: str = "dav",
+        **kwargs: Any,
+    ) -> Union[AsyncWebDAVClient, SyncWebDAVClient]:
+        client_class = SyncWebDAVClient if sync else AsyncWebDAVClient
+        return client_class(
+            "example.com", path=path, transport=httpx.MockTransport(handler), **kwargs
+        )
+
+    return make
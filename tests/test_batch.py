@@ -0,0 +1,73 @@
+import threading
+
+import httpx
+import pytest
+
+from pywebdav.types import DAVException, Operation
+
+
+class Server:
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if request.url.path.endswith("/missing.txt"):
+                return httpx.Response(404)
+            return httpx.Response(201 if request.method in ("PUT", "MKCOL") else 204)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_run_many(mock_client):
+    client = mock_client(Server())
+    results = await client.run_many(
+        [
+            Operation("put", ("/a.txt",), {"content": b"a"}),
+            Operation("delete", ("/missing.txt",)),
+            Operation("mkcol", ("/dir",)),
+            Operation("put", ("/b.txt",)),  # missing the content argument
+        ],
+        concurrency=2,
+    )
+    assert [r.ok for r in results] == [True, False, True, False]
+    assert results[0].result.status_code == 201
+    assert results[1].result.status_code == 404
+    assert isinstance(results[3].error, TypeError)
+
+    with pytest.raises(ValueError):
+        await client.run_many([Operation("_client")])
+
+
+@pytest.mark.asyncio
+async def test_batch(mock_client):
+    client = mock_client(Server())
+    async with client.batch() as batch:
+        for i in range(10):
+            batch.put(f"/{i}.txt", content=b"x")
+        batch.copy("/0.txt", "/copy.txt").delete("/missing.txt")
+    assert len(batch.results) == 12
+    assert [r.ok for r in batch.results] == [True] * 11 + [False]
+
+
+def test_sync_batch_is_bounded(mock_client):
+    server = Server()
+    client = mock_client(server, sync=True)
+    batch = client.batch(concurrency=3)
+    for i in range(30):
+        batch.delete(f"/{i}.txt")
+    results = batch.run()
+    assert all(r.ok for r in results)
+    assert 1 <= server.max_in_flight <= 3
+
+    # error statuses are left for the caller to handle
+    res = client.run_many([Operation("delete", ("/missing.txt",))])[0]
+    with pytest.raises(DAVException):
+        res.result.raise_for_status()
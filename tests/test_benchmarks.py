@@ -0,0 +1,47 @@
+import json
+from urllib.parse import unquote
+
+import pytest
+
+from benchmarks.run import main
+from benchmarks.server import StandInServer
+from pywebdav import AsyncWebDAVClient, SyncWebDAVClient
+from pywebdav.utils import response_to_resources
+
+
+def test_stand_in_server(tmp_path):
+    with StandInServer(tmp_path) as server:
+        client = SyncWebDAVClient("127.0.0.1", server.port, scheme="http")
+        assert client.mkcol("/docs").status_code == 201
+        assert client.put("/docs/a b.txt", content=b"hello").status_code == 201
+        assert (
+            client.put("/docs/c.txt", content=iter([b"chun", b"ked"])).status_code
+            == 201
+        )
+        assert client.get("/docs/a b.txt").orig.content == b"hello"
+        assert (tmp_path / "docs" / "c.txt").read_bytes() == b"chunked"
+
+        resources = response_to_resources(client.propfind("/docs"))
+        names = [unquote(r.basename) for r in resources]
+        assert names == ["docs", "a b.txt", "c.txt"]
+        assert len(response_to_resources(client.propfind("/_listing/50"))) == 51
+        assert client.delete("/docs").status_code == 204
+        assert client.get("/docs/a b.txt").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stand_in_server_async(tmp_path):
+    with StandInServer(tmp_path, latency=0.01) as server:
+        async with AsyncWebDAVClient("127.0.0.1", server.port, scheme="http") as client:
+            res = await client.propfind("/", depth="0")
+            assert res.status_code == 207 and server.requests == 1
+
+
+def test_runner(tmp_path):
+    output = tmp_path / "results.json"
+    main(["--quick", "--repeat", "1", "--only", "listing", "-o", str(output)])
+    results = json.loads(output.read_text())
+    assert results["meta"]["quick"] is True
+    assert {(r["client"], r["params"]["entries"]) for r in results["results"]} == {
+        (client, n) for client in ("sync", "async") for n in (10, 1000, 10000)
+    }
@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+from pywebdav.cache import ContentCache, MetadataCache
+
+
+class FileServer:
+    def __init__(self) -> None:
+        self.files = {"/dav/a.txt": b"a" * 100, "/dav/b.txt": b"b" * 100}
+        self.bytes_sent = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = self.files[request.url.path]
+        etag = f'"{hash(body)}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        self.bytes_sent += len(body)
+        return httpx.Response(
+            200, headers={"ETag": etag, "Content-Type": "text/plain"}, content=body
+        )
+
+
+@pytest.mark.asyncio
+async def test_content_cache(tmp_path: Path, mock_client):
+    server = FileServer()
+    cache = ContentCache(tmp_path)
+    client = mock_client(server, content_cache=cache)
+
+    res = await client.get("/a.txt")
+    assert res.status_code == 200 and not res.from_cache
+    res = await client.get("/a.txt")
+    assert res.status_code == 200 and res.from_cache
+    assert res.read() == b"a" * 100
+    assert res.orig.headers["Content-Type"] == "text/plain"
+    assert server.bytes_sent == 100
+    assert cache.stats.hits == 1 and cache.stats.misses == 1
+    assert cache.stats.bytes_saved == 100
+
+    res = await client.get("/a.txt", headers=None)
+    assert res.from_cache
+
+    server.files["/dav/a.txt"] = b"changed"
+    res = await client.get("/a.txt")
+    assert res.read() == b"changed" and not res.from_cache
+
+    # the cache is persisted on disk
+    assert "https://example.com:443/dav/a.txt" in ContentCache(tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_content_cache_eviction(tmp_path: Path, mock_client):
+    server = FileServer()
+    cache = ContentCache(tmp_path, max_size=150)
+    client = mock_client(server, content_cache=cache)
+
+    await client.get("/a.txt")
+    await client.get("/b.txt")
+    assert len(cache) == 1 and cache.size == 100
+    assert cache.stats.evictions == 1
+    assert "https://example.com:443/dav/b.txt" in cache
+    assert not (await client.get("/a.txt")).from_cache
+
+
+@pytest.mark.asyncio
+async def test_content_cache_missing_file(tmp_path: Path, mock_client):
+    server = FileServer()
+    cache = ContentCache(tmp_path)
+    client = mock_client(server, content_cache=cache)
+    await client.get("/a.txt")
+    for fp in tmp_path.iterdir():
+        if fp.name != "index.json":
+            fp.unlink()
+    res = await client.get("/a.txt")
+    assert res.status_code == 200 and res.read() == b"a" * 100
+
+
+LISTING = b"""<d:multistatus xmlns:d="DAV:">
+<d:response><d:href>/dav/docs/</d:href><d:propstat><d:prop>
+<d:resourcetype><d:collection/></d:resourcetype></d:prop>
+<d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>
+</d:multistatus>"""
+
+
+@pytest.mark.asyncio
+async def test_metadata_cache(mock_client):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, request.url.path))
+        if request.method == "PROPFIND":
+            return httpx.Response(207, content=LISTING)
+        return httpx.Response(201)
+
+    cache = MetadataCache(ttl=60)
+    client = mock_client(handler, metadata_cache=cache)
+
+    first = await client.list_resources("/docs")
+    assert await client.list_resources("/docs/") == first
+    assert await client.list_resources("/", depth="infinity") == first
+    assert len(requests) == 2
+    assert cache.stats.hits == 1 and cache.stats.misses == 2
+
+    await client.put("/docs/new.txt", content=b"new")  # invalidates both listings
+    assert len(cache) == 0
+    await client.list_resources("/docs")
+    assert requests[-1] == ("PROPFIND", "/dav/docs/")
+
+
+def test_metadata_cache_invalidation():
+    cache = MetadataCache()
+    for path, depth in [
+        ("/", "1"),
+        ("/", "infinity"),
+        ("/a", "1"),
+        ("/a/b", "0"),
+        ("/a/b/c", "1"),
+        ("/x", "1"),
+    ]:
+        cache.put(cache.key(path, depth), [])
+    cache.invalidate("/a/b/")
+    remaining = {(path, depth) for path, depth, _ in cache._entries}
+    assert remaining == {("", "1"), ("/x", "1")}
+
+
+def test_metadata_cache_ttl_and_size():
+    cache = MetadataCache(ttl=0, max_entries=2)
+    cache.put(cache.key("/a", "1"), [])
+    assert cache.get(cache.key("/a", "1")) is None  # expired
+    cache = MetadataCache(max_entries=2)
+    for path in ["/a", "/b", "/c"]:
+        cache.put(cache.key(path, "1"), [])
+    assert cache.get(cache.key("/a", "1")) is None
+    assert cache.stats.evictions == 1
@@ -0,0 +1,179 @@
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+import pytest
+
+from pywebdav.sync import SyncTokenStore
+from pywebdav.types import DAVException, DAVResponse
+from pywebdav.utils import response_to_sync_result
+
+
+def member(href: str, etag: str) -> str:
+    return (
+        f"<d:response><d:href>{href}</d:href><d:propstat><d:prop>"
+        f"<d:getetag>{etag}</d:getetag><d:getcontentlength>1</d:getcontentlength>"
+        "<d:resourcetype/></d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat>"
+        "</d:response>"
+    )
+
+
+def removed(href: str) -> str:
+    return (
+        f"<d:response><d:href>{href}</d:href>"
+        "<d:status>HTTP/1.1 404 Not Found</d:status></d:response>"
+    )
+
+
+def multistatus(*responses: str, token: str = "") -> bytes:
+    sync_token = f"<d:sync-token>{token}</d:sync-token>" if token else ""
+    return (
+        f'<d:multistatus xmlns:d="DAV:">{"".join(responses)}{sync_token}</d:multistatus>'
+    ).encode()
+
+
+class ChangeServer:
+    """Keeps a log of changes to /dav/col/, and answers sync-collection REPORTs from it."""
+
+    def __init__(self, supports_sync: bool = True, page_size: int = 100) -> None:
+        self.supports_sync = supports_sync
+        self.page_size = page_size
+        self.files: Dict[str, str] = {}
+        self.log: List[str] = []  # the href changed by each revision
+        self.tokens_seen: List[str] = []
+
+    def change(self, name: str, etag: str = "") -> None:
+        href = f"/dav/col/{name}"
+        if etag:
+            self.files[href] = etag
+        else:
+            del self.files[href]
+        self.log.append(href)
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "PROPFIND":
+            return httpx.Response(
+                207,
+                content=multistatus(
+                    member("/dav/col/", '"col"'),
+                    *(member(href, etag) for href, etag in sorted(self.files.items())),
+                ),
+            )
+        assert request.method == "REPORT" and request.headers["Depth"] == "0"
+        if not self.supports_sync:
+            return httpx.Response(501)
+        body = ET.fromstring(request.read())
+        token = body.findtext("{DAV:}sync-token")
+        self.tokens_seen.append(token)
+        if token and not token.startswith("rev-"):
+            return httpx.Response(403)  # valid-sync-token precondition failed
+        if not token:  # an initial sync reports all the members, in one go
+            page, rest, end = sorted(self.files), [], len(self.log)
+        else:
+            start = int(token[4:])
+            page, rest = (
+                self.log[start:][: self.page_size],
+                self.log[start:][self.page_size :],
+            )
+            end = start + len(page)
+        responses = [
+            member(href, self.files[href]) if href in self.files else removed(href)
+            for href in page
+        ]
+        if rest:
+            responses.append(
+                "<d:response><d:href>/dav/col/</d:href>"
+                "<d:status>HTTP/1.1 507 Insufficient Storage</d:status></d:response>"
+            )
+        return httpx.Response(207, content=multistatus(*responses, token=f"rev-{end}"))
+
+
+def test_response_to_sync_result():
+    result = response_to_sync_result(
+        DAVResponse(
+            httpx.Response(
+                207,
+                content=multistatus(
+                    member("/dav/col/a.txt", '"1"'),
+                    removed("/dav/col/b.txt"),
+                    token="http://example.com/sync/3",
+                ),
+            )
+        )
+    )
+    assert result.sync_token == "http://example.com/sync/3"
+    assert [r.basename for r in result.changed] == ["a.txt"]
+    assert result.changed[0].properties["etag"] == '"1"'
+    assert result.removed == ["/dav/col/b.txt"] and not result.truncated
+
+
+@pytest.mark.asyncio
+async def test_poll_changes(tmp_path: Path, mock_client):
+    server = ChangeServer()
+    client = mock_client(server)
+    store = SyncTokenStore(tmp_path / "tokens.json")
+    server.change("a.txt", '"a1"')
+    server.change("b.txt", '"b1"')
+
+    result = await client.poll_changes("/col", store)
+    assert [r.basename for r in result.changed] == ["a.txt", "b.txt"]
+    assert result.sync_token == "rev-2"
+
+    server.change("a.txt", '"a2"')
+    server.change("b.txt")
+    # the token is persisted between runs
+    result = await client.poll_changes(
+        "/col/", SyncTokenStore(tmp_path / "tokens.json")
+    )
+    assert [r.properties["etag"] for r in result.changed] == ['"a2"']
+    assert result.removed == ["/dav/col/b.txt"]
+    assert server.tokens_seen == ["", "rev-2"]
+
+    result = await client.poll_changes("/col", SyncTokenStore(tmp_path / "tokens.json"))
+    assert result.changed == [] and result.removed == []
+
+
+@pytest.mark.asyncio
+async def test_poll_changes_truncated_and_invalid_token(mock_client):
+    server = ChangeServer(page_size=2)
+    client = mock_client(server)
+    store = SyncTokenStore()
+    for name in "abc":
+        server.change(f"{name}.txt", '"1"')
+    await client.poll_changes("/col", store)
+
+    for name in "abcde":
+        server.change(f"{name}.txt", '"2"')
+    server.change("a.txt")  # on a later page than its first change
+    result = await client.poll_changes("/col", store)
+    assert [r.basename for r in result.changed] == ["b.txt", "c.txt", "d.txt", "e.txt"]
+    assert result.removed == ["/dav/col/a.txt"]
+    assert store.get_token("/col") == "rev-9"
+
+    store.set_token("/col", "expired")
+    result = await client.poll_changes("/col", store)
+    assert len(result.changed) == 4  # started over
+    assert server.tokens_seen[-2:] == ["expired", ""]
+
+
+@pytest.mark.asyncio
+async def test_poll_changes_etag_fallback(mock_client):
+    server = ChangeServer(supports_sync=False)
+    client = mock_client(server)
+    store = SyncTokenStore()
+    server.change("a.txt", '"a1"')
+    server.change("b.txt", '"b1"')
+
+    result = await client.poll_changes("/col", store)
+    assert result.sync_token is None and len(result.changed) == 2
+
+    server.change("a.txt", '"a2"')
+    server.change("b.txt")
+    server.change("c.txt", '"c1"')
+    result = await client.poll_changes("/col", store)
+    assert [r.basename for r in result.changed] == ["a.txt", "c.txt"]
+    assert result.removed == ["/dav/col/b.txt"]
+
+    with pytest.raises(DAVException):
+        await client.sync_collection("/col")
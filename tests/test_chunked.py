@@ -0,0 +1,101 @@
+from pathlib import Path
+from typing import Dict
+
+import httpx
+import pytest
+
+from pywebdav import AsyncWebDAVClient
+from pywebdav._async.chunked import AsyncChunkedUploader
+from pywebdav.types import DAVException
+
+
+BODY = bytes(range(256)) * 4000  # ~1 MB
+UPLOADS = "/remote.php/dav/uploads/demo/"
+
+
+class ChunkingServer:
+    """Just enough of the ownCloud chunked upload protocol for the tests."""
+
+    def __init__(self, fail_puts: int = 0) -> None:
+        self.chunks: Dict[str, Dict[str, bytes]] = {}
+        self.files: Dict[str, bytes] = {}
+        self.fail_puts = fail_puts
+        self.puts = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        assert path.startswith(UPLOADS)
+        transfer, _, name = path[len(UPLOADS) :].strip("/").partition("/")
+        if request.method == "MKCOL":
+            if transfer in self.chunks:
+                return httpx.Response(405)
+            self.chunks[transfer] = {}
+            return httpx.Response(201)
+        if request.method == "PUT":
+            self.puts += 1
+            if self.puts <= self.fail_puts:
+                return httpx.Response(503)
+            self.chunks[transfer][name] = request.read()
+            return httpx.Response(201)
+        if request.method == "PROPFIND":
+            entries = "".join(
+                f"<d:response><d:href>{UPLOADS}{transfer}/{name}</d:href><d:propstat><d:prop>"
+                f"<d:getcontentlength>{len(data)}</d:getcontentlength></d:prop></d:propstat></d:response>"
+                for name, data in self.chunks[transfer].items()
+            )
+            return httpx.Response(
+                207, content=f'<d:multistatus xmlns:d="DAV:">{entries}</d:multistatus>'
+            )
+        if request.method == "MOVE":
+            assert name == ".file"
+            chunks = self.chunks.pop(transfer)
+            body = b"".join(chunks[n] for n in sorted(chunks))
+            assert len(body) == int(request.headers["OC-Total-Length"])
+            destination = httpx.URL(request.headers["Destination"]).path
+            self.files[destination] = body
+            return httpx.Response(201)
+        return httpx.Response(405)
+
+
+@pytest.fixture
+def local_file(tmp_path: Path) -> Path:
+    fp = tmp_path / "big.bin"
+    fp.write_bytes(BODY)
+    return fp
+
+
+@pytest.mark.asyncio
+async def test_put_chunked(local_file: Path, mock_client):
+    server = ChunkingServer(fail_puts=2)  # the first two chunks are retried
+    client = mock_client(server, path="remote.php/dav/files/demo")
+    res = await client.put_chunked("/big.bin", local_file, chunk_size=100_000)
+    assert res.status_code == 201
+    assert server.files["/remote.php/dav/files/demo/big.bin"] == BODY
+    assert server.puts == 11 + 2
+
+
+@pytest.mark.asyncio
+async def test_put_chunked_resumes(local_file: Path, mock_client):
+    server = ChunkingServer(fail_puts=100)
+    client = mock_client(server, path="remote.php/dav/files/demo")
+    with pytest.raises(DAVException):
+        await client.put_chunked(
+            "/big.bin", local_file, chunk_size=100_000, max_attempts=1
+        )
+
+    # pretend that some of the chunks made it to the server before the failure
+    transfer = next(iter(server.chunks))
+    server.chunks[transfer] = {"00001": BODY[:100_000], "00002": BODY[100_000:200_000]}
+    server.fail_puts = 0
+    server.puts = 0
+    await client.put_chunked("/big.bin", local_file, chunk_size=100_000)
+    assert server.files["/remote.php/dav/files/demo/big.bin"] == BODY
+    assert server.puts == 11 - 2
+
+
+def test_uploads_url_required():
+    client = AsyncWebDAVClient("example.com", path="webdav")
+    with pytest.raises(ValueError):
+        AsyncChunkedUploader(client)
+    uploader = AsyncChunkedUploader(client, uploads_url="https://example.com/uploads/")
+    assert uploader.uploads_url == "https://example.com/uploads"
@@ -0,0 +1,81 @@
+import time
+
+from benchmarks.server import StandInServer
+from pywebdav.cli import _shell_main
+
+
+def run_shell(monkeypatch, server, lines):
+    """Runs the shell with lines as its input; returns when each line was read."""
+    commands = iter(lines)
+    read_at = []
+
+    def read(prompt: str) -> str:
+        read_at.append(time.monotonic())
+        return next(commands)
+
+    monkeypatch.setattr("builtins.input", read)
+    _shell_main(
+        host="127.0.0.1",
+        port=server.port,
+        scheme="http",
+        auth=None,
+        path=None,
+        max_jobs=4,
+    )
+    return read_at
+
+
+def test_background_jobs(tmp_path, capsys, monkeypatch):
+    root = tmp_path / "server"
+    root.mkdir()
+    source = tmp_path / "big.bin"
+    source.write_bytes(b"x" * 100_000)
+
+    with StandInServer(root, latency=0.2) as server:
+        read_at = run_shell(
+            monkeypatch,
+            server,
+            [
+                "mkdir docs",
+                "cd docs",
+                f"upload {source} a.bin &",
+                f"upload {source} b.bin&",
+                "cd /",  # the jobs keep the cwd they were started in
+                "jobs",
+                "wait %1",
+                "wait",
+                "ls &",
+                "exit",
+            ],
+        )
+
+    out, err = capsys.readouterr()
+    lines = out.splitlines()
+    assert f"[1] upload {source} a.bin" in lines
+    assert f"[2] upload {source} b.bin" in lines
+    running = [line for line in lines if " running " in line or " queued " in line]
+    assert len(running) == 2
+    done = [line for line in lines if " done " in line]
+    assert done[0].startswith(f"[1] done     upload {source} a.bin  97.7 KiB")
+    assert done[1].startswith(f"[2] done     upload {source} b.bin  97.7 KiB")
+    assert "[ERROR] ls can't be run in the background" in err
+    assert sorted(p.name for p in (root / "docs").iterdir()) == ["a.bin", "b.bin"]
+    # the uploads ran side by side; one after the other they take over 0.4s
+    assert read_at[-1] - read_at[2] < 0.4
+
+
+def test_foreground_transfer_error(tmp_path, capsys, monkeypatch):
+    with StandInServer(tmp_path) as server:
+        run_shell(
+            monkeypatch,
+            server,
+            ["", "download missing.txt out.txt", "download missing.txt &", "exit"],
+        )
+
+    out, err = capsys.readouterr()
+    assert err.splitlines() == [
+        "[ERROR] Status: 404 Not Found",
+        "[2] failed   download missing.txt  download() missing 1 required positional"
+        " argument: 'target'",
+    ]
+    assert not (tmp_path / "out.txt").exists()
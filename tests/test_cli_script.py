@@ -0,0 +1,169 @@
+import io
+import time
+
+from benchmarks.server import StandInServer
+from pywebdav.cli import _script_main
+
+
+def run_script(server, script, **kwargs):
+    return _script_main(
+        str(script),
+        host="127.0.0.1",
+        port=server.port,
+        scheme="http",
+        auth=None,
+        path=None,
+        **kwargs,
+    )
+
+
+def statuses(stderr: str):
+    return [tuple(line.split("\t")[:3]) for line in stderr.splitlines() if "\t" in line]
+
+
+def test_script(tmp_path, capsys):
+    root = tmp_path / "server"
+    root.mkdir()
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text(name)
+    script = tmp_path / "script.txt"
+    script.write_text(
+        f"""# set up
+mkdir docs
+cd docs
+upload {tmp_path / "a.txt"} a.txt
+upload {tmp_path / "b.txt"} b.txt
+copy a.txt c.txt  # waits for the upload of a.txt
+rm b.txt
+bogus
+ls
+
+rm missing.txt
+exit
+ls
+"""
+    )
+    with StandInServer(root) as server:
+        assert run_script(server, script, parallel=4) is False
+
+    out, err = capsys.readouterr()
+    assert statuses(err) == [
+        ("2", "ok", "mkdir docs"),
+        ("3", "ok", "cd docs"),
+        ("4", "ok", f"upload {tmp_path / 'a.txt'} a.txt"),
+        ("5", "ok", f"upload {tmp_path / 'b.txt'} b.txt"),
+        ("6", "ok", "copy a.txt c.txt  # waits for the upload of a.txt"),
+        ("7", "ok", "rm b.txt"),
+        ("8", "error", "bogus"),
+        ("9", "ok", "ls"),
+        ("11", "error", "rm missing.txt"),
+    ]
+    assert "404" in err.splitlines()[-1]
+    assert out.splitlines()[-2:] == ["a.txt", "c.txt"]  # from ls
+    assert sorted(p.name for p in (root / "docs").iterdir()) == ["a.txt", "c.txt"]
+
+
+def test_script_runs_transfers_concurrently(tmp_path, capsys, monkeypatch):
+    root = tmp_path / "server"
+    root.mkdir()
+    source = tmp_path / "f.txt"
+    source.write_text("x")
+    lines = [f"upload {source} f{i}.txt" for i in range(8)]
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(lines)))
+
+    with StandInServer(root, latency=0.1) as server:
+        started = time.monotonic()
+        assert run_script(server, "-", parallel=8) is True
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.5  # 8 requests one after the other take 0.8s
+    assert [status for _, status, _ in statuses(capsys.readouterr().err)] == ["ok"] * 8
+    assert len(list(root.iterdir())) == 8
+
+
+def test_script_uploads_into_a_folder(tmp_path, capsys, monkeypatch):
+    root = tmp_path / "server"
+    root.mkdir()
+    lines = ["mkdir dst"]
+    for i in range(8):
+        (tmp_path / f"f{i}.txt").write_text(str(i))
+        lines.append(f"upload {tmp_path / f'f{i}.txt'} /dst/")
+    lines.append("rm /dst/f0.txt")  # waits for the upload of f0.txt
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(lines)))
+
+    with StandInServer(root, latency=0.1) as server:
+        started = time.monotonic()
+        assert run_script(server, "-", parallel=8) is True
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.7  # 10 requests one after the other take 1s
+    assert [status for _, status, _ in statuses(capsys.readouterr().err)] == ["ok"] * 10
+    assert sorted(p.name for p in (root / "dst").iterdir()) == [
+        f"f{i}.txt" for i in range(1, 8)
+    ]
+
+
+def test_script_invalid_options(tmp_path, capsys):
+    root = tmp_path / "server"
+    root.mkdir()
+    (root / "a.txt").write_text("a")
+    script = tmp_path / "script.txt"
+    script.write_text(
+        "find --name\nfind --size=1\nfind --type=x\nfind --name=*.txt\n"
+        "tree --depth\ntree --depth=x\ntree / /\ntree --depth=1\n"
+    )
+    with StandInServer(root) as server:
+        assert run_script(server, script, parallel=1) is False
+
+    out, err = capsys.readouterr()
+    assert [status for _, status, _ in statuses(err)] == (["error"] * 3 + ["ok"]) * 2
+    assert "see `help find`" in err and "see `help tree`" in err
+    assert out.splitlines()[0] == "/a.txt"
+
+
+def test_script_failed_transfers(tmp_path, capsys):
+    root = tmp_path / "server"
+    (root / "docs").mkdir(parents=True)
+    for name in ("a.txt", "b.txt"):
+        (root / "docs" / name).write_text(name)
+    (tmp_path / "out" / "b.txt").mkdir(parents=True)  # so b.txt can't be downloaded
+    script = tmp_path / "script.txt"
+    script.write_text(
+        f"""upload {tmp_path / "missing.bin"} x.bin
+put -r {tmp_path / "missing"} /d
+mkdir docs
+mkdir missing/docs
+get -r docs {tmp_path / "out"}
+mkdir new
+"""
+    )
+    with StandInServer(root) as server:
+        assert run_script(server, script, parallel=1) is False
+
+    _, err = capsys.readouterr()
+    assert [status for _, status, _ in statuses(err)] == ["error"] * 5 + ["ok"]
+    assert "does not exist" in err and "1 files were not downloaded" in err
+    assert "405" in err and "409" in err
+    assert (tmp_path / "out" / "a.txt").read_text() == "a.txt"
+
+
+def test_script_local_errors(tmp_path, capsys):
+    root = tmp_path / "server"
+    (root / "dst").mkdir(parents=True)
+    (root / "dst" / "f1.txt").write_text("f1")
+    script = tmp_path / "script.txt"
+    script.write_text(
+        f"""download /dst/f1.txt /nonexistent/dir/x.txt
+get /dst/f1.txt {tmp_path / "f1.txt"}
+mkdir new
+download /dst/f1.txt /nonexistent/dir/y.txt
+"""
+    )
+    with StandInServer(root) as server:
+        assert run_script(server, script, parallel=2) is False
+
+    _, err = capsys.readouterr()
+    assert [status for _, status, _ in statuses(err)] == ["error", "ok", "ok", "error"]
+    assert "No such file or directory" in err
+    assert (tmp_path / "f1.txt").read_text() == "f1"
+    assert (root / "new").is_dir()
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+import pytest
+
+
+# modules that the CLI only needs once a command runs
+HEAVY_MODULES = [
+    "httpx",
+    "http.client",
+    "xml.etree.ElementTree",
+    "pywebdav._async",
+    "pywebdav._sync",
+]
+# the cumulative time budget for `import pywebdav.cli`, typer included; it took over
+# 500ms when the clients were imported up front
+IMPORT_BUDGET_MS = 200
+
+
+def import_times(*args: str) -> Dict[str, float]:
+    """Runs python -X importtime with args, returning the cumulative import time (ms) of each module."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def loaded(times: Dict[str, float]) -> List[str]:
+    return [name for name in HEAVY_MODULES if name in times]
+
+
+def test_cli_imports_lazily():
+    assert loaded(import_times("-c", "import pywebdav.cli")) == []
+    assert loaded(import_times("-m", "pywebdav", "--help")) == []
+    assert loaded(import_times("-m", "pywebdav", "shell", "--help")) == []
+
+    # the clients are still there when asked for
+    assert "httpx" in import_times("-c", "from pywebdav import SyncWebDAVClient")
+
+
+@pytest.mark.skipif(
+    not os.environ.get("PYWEBDAV_TIMING_TESTS"),
+    reason="wall-clock timings are unreliable on shared machines; set PYWEBDAV_TIMING_TESTS=1",
+)
+def test_cli_import_budget():
+    import_times("-c", "import pywebdav.cli")  # warm up (bytecode caches etc.)
+    best = min(
+        import_times("-c", "import pywebdav.cli")["pywebdav.cli"] for _ in range(3)
+    )
+    assert best < IMPORT_BUDGET_MS
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+
+class SlowServer:
+    def __init__(self, fail: bool = False) -> None:
+        self.requests = []
+        self.fail = fail
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.method, request.url.path))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise httpx.ReadError("reset", request=request)
+        return httpx.Response(207 if request.method == "PROPFIND" else 200)
+
+
+@pytest.mark.asyncio
+async def test_coalesce(mock_client):
+    server = SlowServer()
+    client = mock_client(server)
+    responses = await asyncio.gather(
+        *[client.propfind("/a") for _ in range(5)],
+        client.propfind("/a", depth="0"),  # different headers
+        client.get("/a"),
+        client.get("/a"),
+        client.put("/a", content=b"x"),  # never coalesced
+        client.put("/a", content=b"x"),
+    )
+    assert [r.status_code for r in responses] == [207] * 6 + [200] * 4
+    assert (
+        sorted(server.requests)
+        == [("GET", "/dav/a")] + [("PROPFIND", "/dav/a/")] * 2 + [("PUT", "/dav/a")] * 2
+    )
+    assert client.metrics.coalesced == 5 and client.metrics.requests == 5
+    assert len(client._in_flight) == 0
+
+    # requests after the shared one completed are sent again
+    await client.propfind("/a")
+    assert len(server.requests) == 6
+
+    client = mock_client(server, coalesce=False)
+    await asyncio.gather(*[client.get("/b") for _ in range(3)])
+    assert server.requests.count(("GET", "/dav/b")) == 3
+
+
+@pytest.mark.asyncio
+async def test_coalesce_errors_and_cancellation(mock_client):
+    server = SlowServer(fail=True)
+    client = mock_client(server)
+    results = await asyncio.gather(
+        client.get("/a"), client.get("/a"), return_exceptions=True
+    )
+    assert all(isinstance(r, httpx.ReadError) for r in results)
+    assert len(server.requests) == 1
+
+    # a cancelled caller doesn't cancel the request for the others
+    server = SlowServer()
+    client = mock_client(server)
+    first = asyncio.ensure_future(client.get("/a"))
+    second = asyncio.ensure_future(client.get("/a"))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert (await second).status_code == 200
+    assert first.cancelled() and len(server.requests) == 1
+
+
+class FileServer:
+    """
+    Answers GET and PROPFIND slowly, with what the path held when the request arrived
+    (a fake listing, for PROPFIND); PUT and DELETE are quick.
+    """
+
+    def __init__(self) -> None:
+        self.files = {"/dav/d/a": b"old"}
+        self.reads = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.rstrip("/")
+        if request.method == "PUT":
+            self.files[path] = request.read()
+            return httpx.Response(204)
+        if request.method == "DELETE":
+            for name in [f for f in self.files if f.startswith(path + "/")]:
+                del self.files[name]
+            return httpx.Response(204)
+        self.reads += 1
+        if request.method == "PROPFIND":
+            content = " ".join(f for f in sorted(self.files) if f.startswith(path))
+        else:
+            content = self.files.get(path, b"")
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, content=content)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "read,write,before,after",
+    [
+        ("GET /d/a", "PUT /d/a", b"old", b"new"),
+        ("GET /d/a", "DELETE /d", b"old", b""),  # the collection around it
+        ("PROPFIND /d", "PUT /d/b", b"/dav/d/a", b"/dav/d/a /dav/d/b"),  # inside it
+    ],
+)
+async def test_coalesce_read_your_writes(mock_client, read, write, before, after):
+    server = FileServer()
+    client = mock_client(server)
+    read_method, read_path = read.split()
+    write_method, write_path = write.split()
+    # someone else's read, sent before the write
+    other = asyncio.ensure_future(client.request(read_method, read_path))
+    await asyncio.sleep(0.01)
+    if write_method == "PUT":
+        await client.put(write_path, content=b"new")
+    else:
+        await client.delete(write_path)
+    # a read sent after the write completed doesn't join the one sent before it
+    assert (await client.request(read_method, read_path)).orig.content == after
+    assert (await other).orig.content == before
+    assert server.reads == 2 and len(client._in_flight) == 0
+
+
+def test_sync_coalesce(mock_client):
+    requests = []
+    barrier = threading.Barrier(4)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        time.sleep(0.1)
+        return httpx.Response(200, content=b"data")
+
+    client = mock_client(handler, sync=True)
+    results = []
+
+    def get() -> None:
+        barrier.wait()
+        results.append(client.get("/a").orig.content)
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [b"data"] * 4
+    assert requests == ["/dav/a"] and client.metrics.coalesced == 3
@@ -0,0 +1,96 @@
+import httpx
+import pytest
+
+from pywebdav.metrics import Histogram, Instrument, LatencyCollector, RequestEvent
+from pywebdav.retry import RetryPolicy
+
+
+class Recorder(Instrument):
+    def __init__(self) -> None:
+        self.events = []
+
+    def request_started(self, event: RequestEvent) -> None:
+        self.events.append(("started", event.method, event.status))
+
+    def request_finished(self, event: RequestEvent) -> None:
+        self.events.append(("finished", event.method, event.status))
+        self.last = event
+
+
+class Broken(Instrument):
+    def request_started(self, event: RequestEvent) -> None:
+        raise RuntimeError
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/dav/busy.txt":
+        return httpx.Response(503)
+    if request.url.path == "/dav/down.txt":
+        raise httpx.ConnectError("refused", request=request)
+    # streamed, like responses from the network, so that downloaded bytes are counted
+    body = httpx.ByteStream(b"x" * 100)
+    return httpx.Response(201 if request.method == "PUT" else 200, stream=body)
+
+
+@pytest.mark.asyncio
+async def test_request_events(mock_client):
+    recorder = Recorder()
+    calls = 0
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        return handler(request)
+
+    client = mock_client(
+        flaky, retry=RetryPolicy(backoff_factor=0), instruments=[Broken(), recorder]
+    )
+    await client.get("/a.txt")
+    assert recorder.events == [("started", "GET", None), ("finished", "GET", 200)]
+    event = recorder.last
+    assert event.ok and event.retries == 1 and event.bytes_received == 100
+    assert 0 <= event.ttfb <= event.duration
+
+    await client.put("/a.txt", content=b"y" * 10)
+    assert recorder.last.bytes_sent == 10 and recorder.last.status == 201
+
+    # streamed requests end when the context exits
+    async with client.stream("GET", "/a.txt") as res:
+        assert recorder.events[-1] == ("started", "GET", None)
+        async for _ in res.orig.aiter_bytes():
+            pass
+    assert recorder.last.bytes_received == 100
+
+    with pytest.raises(httpx.ConnectError):
+        await client.get("/down.txt")
+    assert isinstance(recorder.last.error, httpx.ConnectError)
+    assert not recorder.last.ok and recorder.last.retries == 3
+
+
+def test_histogram():
+    histogram = Histogram()
+    for i in range(1, 101):
+        histogram.add(i / 1000)
+    assert histogram.count == 100 and histogram.max == 0.1
+    assert 0.05 <= histogram.quantile(0.5) <= 0.05 * 1.05
+    assert 0.095 <= histogram.quantile(0.95) <= 0.095 * 1.05
+    assert histogram.quantile(1) == 0.1
+    assert Histogram().quantile(0.5) == 0
+
+
+def test_latency_collector(mock_client):
+    collector = LatencyCollector()
+    client = mock_client(handler, sync=True, instruments=[collector])
+    for _ in range(3):
+        client.get("/a.txt")
+    client.put("/b.txt", content=b"y" * 10)
+    client.get("/busy.txt")
+
+    summary = collector.summary()
+    assert set(summary) == {"GET", "PUT"}
+    get = summary["GET"]
+    assert get["count"] == 4 and get["errors"] == 1
+    assert get["bytes_received"] == 300 and get["p50"] <= get["p99"]
+    assert summary["PUT"]["bytes_sent"] == 10
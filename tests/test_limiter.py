@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from pywebdav.limiter import AdaptiveLimiter
+from pywebdav.types import Operation
+
+
+def test_limiter_aimd():
+    limiter = AdaptiveLimiter(2, max_limit=4)
+    for _ in range(10):
+        limiter.record(0.01, status=200)
+    assert limiter.limit == 4  # additive increase, capped at max_limit
+
+    limiter.record(0.01, status=503)
+    assert limiter.limit == 2
+    limiter.record(0.01, status=429)  # sent before the cut
+    assert limiter.limit == 2
+    limiter.record(0.01, error=httpx.ReadTimeout("timeout"))
+    assert limiter.limit == 1  # min_limit
+
+    limiter.record(None, error=httpx.ConnectError("refused"))
+    assert limiter.limit == 1
+
+
+def test_limiter_latency():
+    limiter = AdaptiveLimiter(8, latency_tolerance=2, smoothing=1)
+    limiter.record(0.1, status=200)
+    limiter.record(0.15, status=200)
+    assert limiter.limit == 8
+    limiter.record(0.5, status=200)
+    assert limiter.limit == 4 and limiter.latency == 0.5
+    # large transfers aren't sampled
+    limiter = AdaptiveLimiter(8, smoothing=1)
+    limiter.record(0.1, status=200)
+    limiter.record(None, status=200)
+    assert limiter.limit == 8
+
+
+@pytest.mark.asyncio
+async def test_client_limiter(mock_client):
+    in_flight = max_in_flight = 0
+    overloaded = True
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight, overloaded
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        if overloaded:
+            overloaded = False
+            return httpx.Response(503)
+        return httpx.Response(204)
+
+    # latency is left out; it's too noisy here
+    limiter = AdaptiveLimiter(4, max_limit=4, latency_tolerance=100)
+    client = mock_client(handler, limiter=limiter)
+    results = await client.run_many(
+        [Operation("delete", (f"/{i}.txt",)) for i in range(40)], concurrency=40
+    )
+    assert sum(not r.ok for r in results) == 1
+    assert max_in_flight <= 4
+    assert limiter.limit == 4  # cut to 2 by the 503, then grew again
+    assert client._gate.in_flight == 0
+
+    # the slot is freed once the headers arrive
+    async with client.stream("GET", "/a.txt"):
+        assert client._gate.in_flight == 0
+
+
+def test_sync_client_limiter(mock_client):
+    lock = threading.Lock()
+    in_flight = max_in_flight = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.001)
+        with lock:
+            in_flight -= 1
+        return httpx.Response(204)
+
+    client = mock_client(
+        handler,
+        sync=True,
+        limiter=AdaptiveLimiter(2, max_limit=3, latency_tolerance=100),
+    )
+    results = client.run_many(
+        [Operation("delete", (f"/{i}.txt",)) for i in range(30)], concurrency=10
+    )
+    assert all(r.ok for r in results)
+    assert max_in_flight <= 3 and client.limiter.limit == 3
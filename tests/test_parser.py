@@ -0,0 +1,196 @@
+import httpx
+import pytest
+
+from pywebdav.types import CompactResource, DAVResponse, ResourceTable
+from pywebdav.utils import (
+    ResourceParser,
+    aiter_resources,
+    iter_resources,
+    response_to_resources,
+)
+
+
+MULTISTATUS = b"""<?xml version="1.0"?>
+<d:multistatus xmlns:d="DAV:" xmlns:s="http://sabredav.org/ns" xmlns:oc="http://owncloud.org/ns">
+  <d:response>
+    <d:href>/remote.php/dav/files/demo/</d:href>
+    <d:propstat>
+      <d:prop>
+        <d:getlastmodified>Sat, 11 Jun 2022 10:00:00 GMT</d:getlastmodified>
+        <d:resourcetype><d:collection/></d:resourcetype>
+        <d:getetag>"root"</d:getetag>
+      </d:prop>
+      <d:status>HTTP/1.1 200 OK</d:status>
+    </d:propstat>
+  </d:response>
+  <d:response>
+    <d:href>/remote.php/dav/files/demo/Photos/</d:href>
+    <d:propstat>
+      <d:prop>
+        <d:getlastmodified>Sat, 11 Jun 2022 10:00:00 GMT</d:getlastmodified>
+        <d:resourcetype><d:collection/></d:resourcetype>
+        <d:getetag>"photos"</d:getetag>
+      </d:prop>
+      <d:status>HTTP/1.1 200 OK</d:status>
+    </d:propstat>
+  </d:response>
+  <d:response>
+    <d:href>/remote.php/dav/files/demo/Readme.md</d:href>
+    <d:propstat>
+      <d:prop>
+        <d:getlastmodified>Sat, 11 Jun 2022 10:00:00 GMT</d:getlastmodified>
+        <d:getcontentlength>136</d:getcontentlength>
+        <d:resourcetype/>
+        <d:getetag>"readme"</d:getetag>
+        <d:getcontenttype>text/markdown</d:getcontenttype>
+      </d:prop>
+      <d:status>HTTP/1.1 200 OK</d:status>
+    </d:propstat>
+  </d:response>
+</d:multistatus>
+"""
+
+
+def chunked(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_response_to_resources():
+    resources = response_to_resources(
+        DAVResponse(httpx.Response(207, content=MULTISTATUS))
+    )
+    assert [r.basename for r in resources] == ["demo", "Photos", "Readme.md"]
+    assert resources[1].properties["type"] == "collection"
+    assert resources[2].properties == {
+        "type": "file",
+        "last_modified": "Sat, 11 Jun 2022 10:00:00 GMT",
+        "etag": '"readme"',
+        "size": 136,
+        "content_type": "text/markdown",
+    }
+    assert resources[2].status == "HTTP/1.1 200 OK"
+
+
+@pytest.mark.parametrize("size", [1, 7, 100, len(MULTISTATUS)])
+def test_iter_resources_matches_full_parse(size: int):
+    expected = response_to_resources(
+        DAVResponse(httpx.Response(207, content=MULTISTATUS))
+    )
+    assert list(iter_resources(chunked(MULTISTATUS, size))) == expected
+
+
+def test_parser_discards_parsed_responses():
+    parser = ResourceParser()
+    first, _ = MULTISTATUS.split(b"</d:response>", 1)
+    assert list(parser.feed(first)) == []
+    assert [r.basename for r in parser.feed(b"</d:response>")] == ["demo"]
+    assert len(parser._root) == 0
+
+
+@pytest.mark.asyncio
+async def test_aiter_resources():
+    async def chunks():
+        for chunk in chunked(MULTISTATUS, 50):
+            yield chunk
+
+    resources = [r async for r in aiter_resources(chunks())]
+    assert len(resources) == 3
+
+
+@pytest.mark.asyncio
+async def test_client_iter_resources(mock_client):
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.method == "PROPFIND"
+        assert request.headers["Depth"] == "infinity"
+        return httpx.Response(207, content=MULTISTATUS)
+
+    client = mock_client(handler, path="remote.php/dav/files/demo")
+    resources = [r async for r in client.iter_resources("/", depth="infinity")]
+    assert [r.basename for r in resources] == ["demo", "Photos", "Readme.md"]
+
+
+def test_compact_resources_match():
+    full = list(iter_resources(chunked(MULTISTATUS, 64)))
+    compact = list(iter_resources(chunked(MULTISTATUS, 64), compact=True))
+    assert all(isinstance(r, CompactResource) for r in compact)
+    assert compact == full
+    assert [r.basename for r in compact] == [r.basename for r in full]
+    # entries in the same collection share their parent prefix
+    assert compact[1].parent is compact[2].parent
+    assert compact[2].size == 136 and compact[2].mtime == 1654941600.0
+
+
+SIZED = b"""<?xml version="1.0"?>
+<d:multistatus xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns">
+  <d:response>
+    <d:href>/files/Photos/</d:href>
+    <d:propstat>
+      <d:prop>
+        <d:resourcetype><d:collection/></d:resourcetype>
+        <d:getetag>"photos"</d:getetag>
+        <oc:size>2048</oc:size>
+      </d:prop>
+      <d:status>HTTP/1.1 200 OK</d:status>
+    </d:propstat>
+  </d:response>
+  <d:response>
+    <d:href>/files/Photos/a.jpg</d:href>
+    <d:propstat>
+      <d:prop>
+        <d:resourcetype/>
+        <d:getcontentlength>2048</d:getcontentlength>
+        <oc:checksums><oc:checksum>SHA1:abc MD5:def</oc:checksum></oc:checksums>
+      </d:prop>
+      <d:status>HTTP/1.1 200 OK</d:status>
+    </d:propstat>
+  </d:response>
+</d:multistatus>
+"""
+
+
+def test_compact_resources_keep_optional_properties():
+    full = list(iter_resources([SIZED]))
+    assert full[0].properties["size"] == 2048
+    assert full[1].properties["checksums"] == "SHA1:abc MD5:def"
+    compact = list(iter_resources([SIZED], compact=True))
+    assert compact == full
+    assert [r.to_resource() for r in ResourceTable(full)] == full
+
+
+def test_resource_table():
+    table = ResourceTable(iter_resources(chunked(MULTISTATUS, 64)))
+    table.append(
+        CompactResource(
+            "/remote.php/dav/files/demo/big.iso", is_collection=False, size=10**10
+        )
+    )
+    assert len(table) == 4
+    assert table.total_size() == 136 + 10**10
+    assert [r.basename for r in table.filter(type="file")] == ["Readme.md", "big.iso"]
+    assert [r.basename for r in table.filter(name="*.md")] == ["Readme.md"]
+    assert [r.basename for r in table.filter(min_size=1000)] == ["big.iso"]
+    by_size = table.sorted_by("size", reverse=True)
+    assert by_size[0].basename == "big.iso"
+    assert by_size[0].properties["size"] == 10**10
+    assert (
+        table[2]
+        == response_to_resources(DAVResponse(httpx.Response(207, content=MULTISTATUS)))[
+            2
+        ]
+    )
+    # entries without a known modification time are left out by date filters
+    assert len(table.filter(modified_after=0)) == 3
+    assert len(table[1:3]) == 2
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_resource_table_sorted_by_mtime(reverse: bool):
+    mtimes = [5, None, 3, 1, None, 4, 2]
+    table = ResourceTable(
+        CompactResource(f"/dav/{i}.txt", is_collection=False, mtime=mtime)
+        for i, mtime in enumerate(mtimes)
+    )
+    by_mtime = table.sorted_by("mtime", reverse=reverse)
+    known = sorted((m for m in mtimes if m is not None), reverse=reverse)
+    # unknown modification times come last, either way
+    assert [r.mtime for r in by_mtime] == known + [None, None]
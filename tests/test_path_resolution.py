@@ -1,5 +1,6 @@
-from typing import Tuple
-from pywebdav.utils import form_path
+from pathlib import Path
+from typing import Optional, Tuple
+from pywebdav.utils import form_path, member_path
 
 import pytest
 
@@ -23,3 +24,27 @@ def test_path_resolution(case: Tuple[str, str], expected: str):
     cwd, target = case
     path = form_path(cwd, target)
     assert path == expected
+
+
+member_paths = [
+    ("/docs/My Docs/a.txt", "My Docs/a.txt"),
+    ("/docs/My Docs/", "My Docs"),  # collections end with a slash
+    ("/docs/", None),  # the collection itself
+    ("/docsets/a.txt", None),  # not inside /docs
+    ("/elsewhere/a.txt", None),
+    ("/docs/inner/../../escaped.txt", None),
+    ("/docs/./a.txt", None),
+    ("/docs//a.txt", None),
+]
+
+
+@pytest.mark.parametrize("path,expected", member_paths)
+def test_member_path(tmp_path: Path, path: str, expected: Optional[str]):
+    """Test the function used to map the members of a remote tree to local files."""
+    assert member_path(path, "/docs", tmp_path) == expected
+
+
+def test_member_path_symlink(tmp_path: Path):
+    (tmp_path / "local").mkdir()
+    (tmp_path / "local" / "link").symlink_to(tmp_path)
+    assert member_path("/docs/link/a.txt", "/docs/", tmp_path / "local") is None
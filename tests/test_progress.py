@@ -0,0 +1,114 @@
+import httpx
+import pytest
+
+from benchmarks.server import StandInServer
+from pywebdav import AsyncWebDAVClient, SyncWebDAVClient
+from pywebdav.metrics import TransferProgress
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_transfer_progress():
+    clock = FakeClock()
+    progress = TransferProgress(window=5, clock=clock)
+    assert progress.rate is None and progress.eta is None
+    assert progress.fraction is None
+
+    for second in range(11):  # 100 bytes a second
+        clock.now = 100 + second
+        progress(second * 100, 2000)
+    assert progress.fraction == 0.5
+    assert progress.rate == pytest.approx(100)
+    assert progress.eta == pytest.approx(10)
+    assert progress.average_rate == pytest.approx(100)
+
+    clock.now += 5  # stalled; the rate drops, and the time left grows
+    assert progress.rate < 100 and progress.eta > 10
+
+    progress(0, 2000)  # started over
+    assert progress.done == 0 and progress.rate is None
+
+
+def test_sync_progress(tmp_path):
+    data = bytes(range(256)) * 1024  # 256 KiB
+    source = tmp_path / "source.bin"
+    source.write_bytes(data)
+    (tmp_path / "server").mkdir()
+    with StandInServer(tmp_path / "server") as server:
+        client = SyncWebDAVClient("127.0.0.1", server.port, scheme="http")
+
+        calls = []
+        with open(source, "rb") as f:
+            res = client.put(
+                "/a.bin",
+                content=f,
+                chunk_size=64 * 1024,
+                progress=lambda done, total: calls.append((done, total)),
+            )
+        res.raise_for_status()
+        assert calls == [(n * 64 * 1024, len(data)) for n in range(5)]
+
+        calls.clear()
+        client.put(
+            "/b.bin",
+            content=data,
+            chunk_size=100 * 1024,
+            progress=lambda done, total: calls.append((done, total)),
+        ).raise_for_status()
+        assert calls == [(0, len(data)), (100 * 1024, len(data))] + [
+            (200 * 1024, len(data)),
+            (len(data), len(data)),
+        ]
+        assert (tmp_path / "server" / "b.bin").read_bytes() == data
+
+        progress = TransferProgress()
+        target = tmp_path / "download.bin"
+        assert client.download_to("/a.bin", target, progress=progress) == len(data)
+        assert (progress.done, progress.total) == (len(data), len(data))
+        assert target.read_bytes() == data
+
+
+def test_resumed_download_progress(tmp_path, mock_client):
+    # a resumed download counts the bytes that were already there
+    data = b"0123456789" * 1000
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Range"] == "bytes=1000-"
+        return httpx.Response(
+            206,
+            headers={"Content-Range": f"bytes 1000-{len(data) - 1}/{len(data)}"},
+            content=data[1000:],
+        )
+
+    client = mock_client(handler, sync=True)
+    target = tmp_path / "download.bin"
+    target.write_bytes(data[:1000])
+    target.with_name("download.bin.resume").write_text("")
+    calls = []
+    client.download_to(
+        "/a.bin",
+        target,
+        resume=True,
+        chunk_size=4000,
+        progress=lambda done, total: calls.append((done, total)),
+    )
+    assert calls == [(n, len(data)) for n in (1000, 5000, 9000, 10000)]
+    assert target.read_bytes() == data
+
+
+@pytest.mark.asyncio
+async def test_async_progress(tmp_path):
+    data = b"x" * 300_000
+    with StandInServer(tmp_path) as server:
+        async with AsyncWebDAVClient("127.0.0.1", server.port, scheme="http") as client:
+            progress = TransferProgress()
+            res = await client.put("/a.bin", content=data, progress=progress)
+            assert res.status_code == 201
+            assert (progress.done, progress.total) == (len(data), len(data))
+            assert (tmp_path / "a.bin").read_bytes() == data
@@ -0,0 +1,113 @@
+from email.utils import formatdate
+import time
+
+import httpx
+import pytest
+
+from pywebdav.retry import RetryPolicy
+
+
+NO_WAIT = RetryPolicy(max_attempts=3, backoff_factor=0)
+
+
+def flaky(*failures):
+    """A handler that fails with each of failures (a status code or an exception) in turn, then succeeds."""
+    failures = list(failures)
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.read())
+        if failures:
+            failure = failures.pop(0)
+            if isinstance(failure, int):
+                return httpx.Response(failure, headers={"Retry-After": "0"})
+            raise failure("failed", request=request)
+        return httpx.Response(201 if request.method == "PUT" else 200, content=b"ok")
+
+    return handler, requests
+
+
+@pytest.mark.asyncio
+async def test_retry_statuses_and_errors(mock_client):
+    handler, requests = flaky(503, httpx.ReadError)
+    client = mock_client(handler, retry=NO_WAIT)
+    res = await client.get("/a.txt")
+    assert res.status_code == 200 and len(requests) == 3
+    assert client.metrics.requests == 3 and client.metrics.retries == 2
+    assert client.metrics.retries_by_reason == {"503": 1, "ReadError": 1}
+
+    handler, requests = flaky(503, 503, 503)
+    client = mock_client(handler, retry=NO_WAIT)
+    assert (await client.get("/a.txt")).status_code == 503
+    assert len(requests) == 3 and client.metrics.exhausted == 1
+
+    # not retried without a policy
+    handler, requests = flaky(503)
+    client = mock_client(handler)
+    assert (await client.get("/a.txt")).status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_retry_only_idempotent_or_replayable(mock_client):
+    handler, requests = flaky(502)
+    client = mock_client(handler, retry=NO_WAIT)
+    assert (await client.request("POST", "/a")).status_code == 502
+    assert len(requests) == 1
+
+    # MOVE isn't idempotent, but a request that never reached the server can be retried
+    handler, requests = flaky(httpx.ConnectError)
+    client = mock_client(handler, retry=NO_WAIT)
+    assert (await client.move("/a", "/b")).status_code == 200
+
+    handler, requests = flaky(503)
+    client = mock_client(handler, retry=NO_WAIT)
+    assert (await client.put("/a.txt", content=b"data")).status_code == 201
+    assert requests == [b"data", b"data"]
+
+    def chunks():
+        yield b"da"
+        yield b"ta"
+
+    handler, requests = flaky(503)
+    client = mock_client(handler, retry=NO_WAIT)
+    assert (await client.put("/a.txt", content=chunks())).status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_retry_put_file(tmp_path, mock_client):
+    fp = tmp_path / "a.txt"
+    fp.write_bytes(b"x" * 100)
+    handler, requests = flaky(httpx.WriteError)
+    client = mock_client(handler, retry=NO_WAIT)
+    with open(fp, "rb") as f:
+        res = await client.put("/a.txt", content=f, chunk_size=30)
+    assert res.status_code == 201 and requests[-1] == b"x" * 100
+
+
+@pytest.mark.asyncio
+async def test_retry_stream(mock_client):
+    handler, requests = flaky(429)
+    client = mock_client(handler, retry=NO_WAIT)
+    async with client.stream("GET", "/a.txt") as res:
+        assert res.status_code == 200
+    assert len(requests) == 2
+
+
+def test_retry_delay():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.delay(i) for i in range(1, 5)] == [1, 2, 4, 5]
+    jittered = RetryPolicy(backoff_factor=1)
+    assert all(0 <= jittered.delay(3) <= 4 for _ in range(20))
+
+    assert policy.delay(1, httpx.Response(503, headers={"Retry-After": "7"})) == 7
+    date = formatdate(time.time() + 30, usegmt=True)
+    delay = policy.delay(1, httpx.Response(503, headers={"Retry-After": date}))
+    assert 28 <= delay <= 30
+    assert policy.delay(1, httpx.Response(503, headers={"Retry-After": "3600"})) == 60
+
+
+def test_sync_retry(mock_client):
+    handler, requests = flaky(504)
+    client = mock_client(handler, sync=True, retry=NO_WAIT)
+    assert client.propfind("/").status_code == 200
+    assert client.metrics.retries == 1
@@ -0,0 +1,83 @@
+import xml.etree.ElementTree as ET
+
+import httpx
+import pytest
+
+from pywebdav.search import search_body
+from pywebdav.shell_client import ShellDAVClient
+from pywebdav.types import DAVException
+
+from test_parser import MULTISTATUS
+
+
+D = "{DAV:}"
+
+
+def test_search_body():
+    body = ET.fromstring(
+        search_body(
+            "/dav/docs/",
+            type="file",
+            name="*_report?.pdf",
+            min_size=10,
+            modified_before=0,
+            order_by="size",
+            descending=True,
+            limit=5,
+        )
+    )
+    search = body.find(f"{D}basicsearch")
+    assert search.findtext(f"{D}from/{D}scope/{D}href") == "/dav/docs/"
+    assert search.findtext(f"{D}from/{D}scope/{D}depth") == "infinity"
+    conditions = search.find(f"{D}where/{D}and")
+    assert [c.tag for c in conditions] == [f"{D}not", f"{D}like", f"{D}gte", f"{D}lt"]
+    assert conditions[1].findtext(f"{D}literal") == "%\\_report_.pdf"
+    assert conditions[3].findtext(f"{D}literal") == "1970-01-01T00:00:00Z"
+    order = search.find(f"{D}orderby/{D}order")
+    assert order.find(f"{D}prop/{D}getcontentlength") is not None
+    assert order.find(f"{D}descending") is not None
+    assert search.findtext(f"{D}limit/{D}nresults") == "5"
+
+    # a single condition isn't wrapped in <and>
+    where = ET.fromstring(search_body("/", type="collection")).find(
+        f"{D}basicsearch/{D}where"
+    )
+    assert [c.tag for c in where] == [f"{D}is-collection"]
+
+
+@pytest.mark.asyncio
+async def test_client_search(mock_client):
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.method == "SEARCH"
+        assert request.url.path == "/remote.php/dav/files/demo/"
+        scope = ET.fromstring(request.read()).findtext(f".//{D}scope/{D}href")
+        assert scope == "/remote.php/dav/files/demo/"
+        return httpx.Response(207, content=MULTISTATUS)
+
+    client = mock_client(handler, path="remote.php/dav/files/demo")
+    resources = await client.search(name="*.md")
+    assert [r.basename for r in resources] == ["demo", "Photos", "Readme.md"]
+
+
+def test_shell_find_fallback(mock_client):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.method)
+        if request.method == "SEARCH":
+            return httpx.Response(405)
+        assert request.headers["Depth"] == "1"
+        return httpx.Response(207, content=MULTISTATUS)
+
+    shell = ShellDAVClient(
+        "example.com", 443, scheme="https", auth=None, path="remote.php/dav/files/demo"
+    )
+    shell.dav_client = mock_client(handler, sync=True, path="remote.php/dav/files/demo")
+    assert [r.basename for r in shell.find(name="*.md")] == ["Readme.md"]
+    assert [r.basename for r in shell.find(type="collection")] == ["Photos"]
+    # the root and Photos/ are listed
+    assert requests == ["SEARCH", "PROPFIND", "PROPFIND"] * 2
+
+    shell.dav_client = mock_client(lambda r: httpx.Response(500), sync=True)
+    with pytest.raises(DAVException):
+        shell.find()
@@ -0,0 +1,364 @@
+import asyncio
+import mmap
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import httpx
+import pytest
+
+from pywebdav import AsyncWebDAVClient, SyncWebDAVClient
+from pywebdav.types import DAVException
+
+
+BODY = bytes(range(256)) * 1024  # 256 KiB
+
+
+uploads = {}
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.method == "PUT":
+        body = request.read()
+        length = request.headers.get("Content-Length")
+        assert length is None or int(length) == len(body)
+        uploads[request.url.path] = (body, request.headers)
+        return httpx.Response(201)
+    if request.url.path.endswith("/missing.bin"):
+        return httpx.Response(404)
+    return httpx.Response(200, content=BODY)
+
+
+@pytest.fixture
+def async_client(mock_client):
+    return mock_client(handler)
+
+
+@pytest.fixture
+def sync_client(mock_client):
+    return mock_client(handler, sync=True)
+
+
+@pytest.mark.asyncio
+async def test_iter_content_chunks(async_client: AsyncWebDAVClient):
+    chunks = [c async for c in async_client.iter_content("/a.bin", chunk_size=4096)]
+    assert all(len(c) <= 4096 for c in chunks)
+    assert b"".join(chunks) == BODY
+
+
+@pytest.mark.asyncio
+async def test_download_to(async_client: AsyncWebDAVClient, tmp_path: Path):
+    target = tmp_path / "a.bin"
+    written = await async_client.download_to("/a.bin", target)
+    assert written == len(BODY)
+    assert target.read_bytes() == BODY
+
+
+@pytest.mark.asyncio
+async def test_download_to_404(async_client: AsyncWebDAVClient, tmp_path: Path):
+    target = tmp_path / "missing.bin"
+    with pytest.raises(DAVException):
+        await async_client.download_to("/missing.bin", target)
+    assert not target.exists()  # nothing is written for failed requests
+
+
+def test_sync_download_to(sync_client: SyncWebDAVClient, tmp_path: Path):
+    target = tmp_path / "a.bin"
+    assert sync_client.download_to("/a.bin", target) == len(BODY)
+    assert target.read_bytes() == BODY
+
+
+@pytest.fixture
+def local_file(tmp_path: Path) -> Path:
+    fp = tmp_path / "upload.bin"
+    fp.write_bytes(BODY)
+    return fp
+
+
+@pytest.mark.asyncio
+async def test_put_file_object(async_client: AsyncWebDAVClient, local_file: Path):
+    with open(local_file, "rb") as f:
+        res = await async_client.put("/up.bin", content=f, chunk_size=1000)
+    assert res.status_code == 201
+    body, headers = uploads["/dav/up.bin"]
+    assert body == BODY
+    assert headers["Content-Length"] == str(len(BODY))
+
+
+@pytest.mark.asyncio
+async def test_put_mmap(async_client: AsyncWebDAVClient, local_file: Path):
+    with open(local_file, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        await async_client.put("/mm.bin", content=mm)
+    assert uploads["/dav/mm.bin"][0] == BODY
+
+
+@pytest.mark.asyncio
+async def test_put_async_iterator(async_client: AsyncWebDAVClient):
+    async def gen():
+        yield b"hello "
+        yield b"world"
+
+    await async_client.put("/gen.txt", content=gen())
+    body, headers = uploads["/dav/gen.txt"]
+    assert body == b"hello world"
+    assert headers["Transfer-Encoding"] == "chunked"
+
+
+def test_sync_put_iterator(sync_client: SyncWebDAVClient):
+    sync_client.put("/it.txt", content=iter([b"a", b"b"]), length=2)
+    body, headers = uploads["/dav/it.txt"]
+    assert body == b"ab"
+    assert headers["Content-Length"] == "2"
+
+
+@pytest.mark.asyncio
+async def test_put_str(async_client: AsyncWebDAVClient):
+    await async_client.put("/text.txt", content="héllo")
+    body, headers = uploads["/dav/text.txt"]
+    assert body == "héllo".encode("utf-8")
+    assert headers["Content-Length"] == str(len(body))
+
+
+def test_sync_put_str(sync_client: SyncWebDAVClient):
+    sync_client.put("/text.txt", content="héllo", progress=lambda *_: None)
+    assert uploads["/dav/text.txt"][0] == "héllo".encode("utf-8")
+
+
+def test_sync_put_async_iterator_rejected(sync_client: SyncWebDAVClient):
+    async def gen():
+        yield b""
+
+    with pytest.raises(TypeError):
+        sync_client.put("/x", content=gen())
+
+
+def requested_range(request: httpx.Request) -> tuple:
+    start, end = request.headers["Range"][len("bytes=") :].split("-")
+    return int(start), int(end)
+
+
+def partial_response(start: int, end: int) -> httpx.Response:
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": '"v1"',
+        "Content-Range": f"bytes {start}-{end}/{len(BODY)}",
+    }
+    return httpx.Response(206, headers=headers, content=BODY[start : end + 1])
+
+
+def range_handler(request: httpx.Request) -> httpx.Response:
+    headers = {"Accept-Ranges": "bytes", "ETag": '"v1"'}
+    if request.method == "HEAD":
+        return httpx.Response(
+            200, headers={**headers, "Content-Length": str(len(BODY))}
+        )
+    if "Range" not in request.headers or request.headers.get("If-Range") != '"v1"':
+        return httpx.Response(200, headers=headers, content=BODY)
+    return partial_response(*requested_range(request))
+
+
+def short_range_handler(request: httpx.Request) -> httpx.Response:
+    if request.method == "HEAD" or "Range" not in request.headers:
+        return range_handler(request)
+    # sends back only the first half of each part
+    start, end = requested_range(request)
+    return partial_response(start, start + (end - start) // 2)
+
+
+def wrong_range_handler(request: httpx.Request) -> httpx.Response:
+    if request.method == "HEAD" or "Range" not in request.headers:
+        return range_handler(request)
+    # sends back a part of the same size, from the start of the file
+    start, end = requested_range(request)
+    return partial_response(0, end - start)
+
+
+def no_range_handler(request: httpx.Request) -> httpx.Response:
+    if request.method == "HEAD":
+        # claims to support ranges, but ignores the Range header
+        headers = {"Accept-Ranges": "bytes", "Content-Length": str(len(BODY))}
+        return httpx.Response(200, headers=headers)
+    return httpx.Response(200, content=BODY)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "handler",
+    [range_handler, no_range_handler, short_range_handler, wrong_range_handler],
+)
+async def test_get_parallel(handler, tmp_path: Path, mock_client):
+    client = mock_client(handler)
+    target = tmp_path / "a.bin"
+    assert await client.get_parallel("/a.bin", target, parts=7) == len(BODY)
+    assert target.read_bytes() == BODY
+
+
+def test_sync_get_parallel(tmp_path: Path, mock_client):
+    client = mock_client(range_handler, sync=True)
+    target = tmp_path / "a.bin"
+    assert client.get_parallel("/a.bin", target, parts=3) == len(BODY)
+    assert target.read_bytes() == BODY
+
+
+def failing_range_handler(request: httpx.Request) -> httpx.Response:
+    if request.method == "HEAD":
+        return range_handler(request)
+    if request.headers["Range"].startswith("bytes=0-"):
+        return httpx.Response(500)
+    start, end = requested_range(request)
+    headers = {"Content-Range": f"bytes {start}-{end}/{len(BODY)}"}
+    return httpx.Response(206, headers=headers, stream=SlowStream())
+
+
+class SlowStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            yield b"x" * 100
+
+
+@pytest.mark.asyncio
+async def test_get_parallel_failure(tmp_path: Path, mock_client):
+    client = mock_client(failing_range_handler)
+    target = tmp_path / "a.bin"
+    with pytest.raises(DAVException):
+        await client.get_parallel("/a.bin", target, parts=4)
+    # the other ranges were cancelled, rather than left writing to the file
+    before = target.read_bytes()
+    await asyncio.sleep(0.3)
+    assert target.read_bytes() == before
+    assert b"x" not in before
+
+
+class FlakyStream(httpx.AsyncByteStream):
+    """Sends `data`, then drops the connection."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+        raise httpx.ReadError("connection dropped")
+
+
+def resumable_handler(request: httpx.Request) -> httpx.Response:
+    headers = {"ETag": '"v1"', "Accept-Ranges": "bytes"}
+    range_header = request.headers.get("Range")
+    if range_header is None or request.headers.get("If-Range") != '"v1"':
+        # the first response is cut off halfway
+        return httpx.Response(
+            200, headers=headers, stream=FlakyStream(BODY[: len(BODY) // 2])
+        )
+    start = int(range_header[len("bytes=") : -1])
+    return httpx.Response(206, headers=headers, content=BODY[start:])
+
+
+@pytest.mark.asyncio
+async def test_download_resume(tmp_path: Path, mock_client):
+    client = mock_client(resumable_handler)
+    target = tmp_path / "a.bin"
+    assert await client.download_to("/a.bin", target, resume=True) == len(BODY)
+    assert target.read_bytes() == BODY
+    assert not (tmp_path / "a.bin.resume").exists()
+
+
+class SegmentServer:
+    """Applies PUTs with a Content-Range, and checks If-Match against its ETag."""
+
+    def __init__(self, content: bytes = b"", drop_at: Tuple[int, ...] = ()) -> None:
+        self.stored = bytearray(content)
+        self.version = 0
+        self.drop_at = drop_at  # offsets of the segments to drop the connection on
+        self.calls: List[Tuple[int, Optional[str]]] = []
+
+    @property
+    def etag(self) -> str:
+        return f'"v{self.version}"'
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        headers = {"Content-Length": str(len(self.stored)), "ETag": self.etag}
+        if request.method == "HEAD":
+            return httpx.Response(200, headers=headers)
+        start = int(request.headers["Content-Range"].split()[1].split("-")[0])
+        if_match = request.headers.get("If-Match")
+        self.calls.append((start, if_match))
+        if start in self.drop_at:
+            self.drop_at = tuple(i for i in self.drop_at if i != start)
+            raise httpx.WriteError("connection dropped")
+        if if_match is not None and if_match != self.etag:
+            return httpx.Response(412)
+        del self.stored[start:]
+        self.stored.extend(request.read())
+        self.version += 1
+        return httpx.Response(204, headers={"ETag": self.etag})
+
+
+@pytest.mark.asyncio
+async def test_put_resumable(local_file: Path, mock_client):
+    server = SegmentServer(drop_at=(100_000,))
+    client = mock_client(server)
+    res = await client.put_resumable("/up.bin", local_file, segment_size=100_000)
+    assert res.status_code == 204
+    assert bytes(server.stored) == BODY
+    # resumed after the acknowledged segment, as long as the file is unchanged
+    assert [start for start, _ in server.calls] == [0, 100_000, 100_000, 200_000]
+    assert server.calls[2][1] == '"v1"'
+    assert not (local_file.parent / "upload.bin.resume").exists()
+
+
+def test_put_resumable_next_call(local_file: Path, mock_client):
+    server = SegmentServer(drop_at=(100_000,))
+    client = mock_client(server, sync=True)
+    with pytest.raises(httpx.WriteError):
+        client.put_resumable(
+            "/up.bin", local_file, segment_size=100_000, max_attempts=1
+        )
+    assert (local_file.parent / "upload.bin.resume").exists()
+    client.put_resumable("/up.bin", local_file, segment_size=100_000)
+    assert bytes(server.stored) == BODY
+    assert [start for start, _ in server.calls] == [0, 100_000, 100_000, 200_000]
+
+
+def test_put_resumable_remote_changed(local_file: Path, mock_client):
+    # another client wrote to the file after the upload was interrupted
+    server = SegmentServer(drop_at=(100_000,))
+    client = mock_client(server, sync=True)
+    with pytest.raises(httpx.WriteError):
+        client.put_resumable(
+            "/up.bin", local_file, segment_size=100_000, max_attempts=1
+        )
+    server.stored[:10] = b"x" * 10
+    server.version += 1
+    client.put_resumable("/up.bin", local_file, segment_size=100_000)
+    assert bytes(server.stored) == BODY
+    assert server.calls[-3:] == [(0, None), (100_000, '"v3"'), (200_000, '"v4"')]
+
+
+@pytest.mark.parametrize("stale", [bytes(len(BODY)), BODY[:1000] + bytes(1000)])
+def test_put_resumable_stale_remote(local_file: Path, stale: bytes, mock_client):
+    # a file of the same size, or a shorter one, left by someone else is overwritten
+    server = SegmentServer(stale)
+    client = mock_client(server, sync=True)
+    res = client.put_resumable("/up.bin", local_file, segment_size=100_000)
+    assert res.status_code == 204
+    assert bytes(server.stored) == BODY
+    assert server.calls[0] == (0, None)
+
+
+def test_put_resumable_content_range_ignored(local_file: Path, mock_client):
+    # the server answers partial PUTs with success, but each replaces the whole file
+    stored = bytearray()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "HEAD":
+            if not stored:
+                return httpx.Response(404)
+            return httpx.Response(200, headers={"Content-Length": str(len(stored))})
+        stored[:] = request.read()
+        return httpx.Response(204)
+
+    client = mock_client(handler, sync=True)
+    res = client.put_resumable("/up.bin", local_file, segment_size=100_000)
+    assert res is not None and res.status_code == 204
+    assert bytes(stored) == BODY
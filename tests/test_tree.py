@@ -0,0 +1,364 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+import httpx
+import pytest
+
+from pywebdav.shell_client import ShellDAVClient
+from pywebdav.sync import SyncState
+
+
+class TreeServer:
+    """A minimal in-memory WebDAV server: MKCOL, PUT, GET, DELETE and Depth: 1 PROPFIND."""
+
+    def __init__(self) -> None:
+        self.collections = {"/dav"}
+        self.files = {}
+        self.mtimes = {}
+        self.report_sizes = False  # report the size of collections, as oc:size
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = unquote(request.url.path).rstrip("/")
+        with self.lock:
+            self.requests.append((request.method, path))
+            if request.method == "MKCOL":
+                if path in self.collections or path in self.files:
+                    return httpx.Response(405)
+                if path.rsplit("/", 1)[0] not in self.collections:
+                    return httpx.Response(409)
+                self.collections.add(path)
+                return httpx.Response(201)
+            if request.method == "PUT":
+                if path.rsplit("/", 1)[0] not in self.collections:
+                    return httpx.Response(409)
+                self.files[path] = request.read()
+                self.mtimes[path] = time.time()
+                return httpx.Response(201, headers={"ETag": self.etag(path)})
+            if request.method == "DELETE":
+                self.files.pop(path, None)
+                for name in [
+                    c for c in self.collections if (c + "/").startswith(path + "/")
+                ]:
+                    self.collections.discard(name)
+                for name in [f for f in self.files if f.startswith(path + "/")]:
+                    del self.files[name]
+                return httpx.Response(204)
+            if request.method == "GET":
+                if path not in self.files:
+                    return httpx.Response(404)
+                return httpx.Response(200, content=self.files[path])
+            if request.method == "PROPFIND":
+                if path not in self.collections:
+                    return httpx.Response(404)
+                return httpx.Response(207, content=self.listing(path))
+        return httpx.Response(405)
+
+    def etag(self, path: str) -> str:
+        return '"' + hashlib.sha1(self.files[path]).hexdigest() + '"'
+
+    def listing(self, path: str) -> bytes:
+        def entry(href: str, is_collection: bool) -> str:
+            if is_collection:
+                props = "<d:resourcetype><d:collection/></d:resourcetype>"
+                if self.report_sizes:
+                    size = sum(
+                        len(body)
+                        for f, body in self.files.items()
+                        if f.startswith(href)
+                    )
+                    props += f"<oc:size>{size}</oc:size>"
+                mtime = 1654941600.0
+            else:
+                body = self.files[href]
+                props = (
+                    f"<d:resourcetype/><d:getcontentlength>{len(body)}</d:getcontentlength>"
+                    f"<d:getetag>{self.etag(href)}</d:getetag><oc:checksums><oc:checksum>"
+                    f"SHA1:{hashlib.sha1(body).hexdigest()}</oc:checksum></oc:checksums>"
+                )
+                mtime = self.mtimes.get(href, 1654941600.0)
+            return (
+                f"<d:response><d:href>{quote(href)}</d:href><d:propstat><d:prop>"
+                f"<d:getlastmodified>{formatdate(mtime, usegmt=True)}</d:getlastmodified>"
+                f"{props}</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat>"
+                "</d:response>"
+            )
+
+        entries = [entry(path + "/", True)]
+        for child in sorted(self.collections):
+            if child.rsplit("/", 1)[0] == path:
+                entries.append(entry(child + "/", True))
+        for child in sorted(self.files):
+            if child.rsplit("/", 1)[0] == path:
+                entries.append(entry(child, False))
+        return (
+            '<d:multistatus xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns">'
+            + "".join(entries)
+            + "</d:multistatus>"
+        ).encode()
+
+
+def make_tree(root: Path) -> None:
+    (root / "docs" / "old notes").mkdir(parents=True)
+    (root / "empty").mkdir()
+    (root / "a.txt").write_bytes(b"a" * 10)
+    (root / "docs" / "b.txt").write_bytes(b"b" * 20)
+    (root / "docs" / "old notes" / "c.txt").write_bytes(b"c" * 30)
+
+
+def read_tree(root: Path):
+    return {
+        fp.relative_to(root).as_posix(): fp.read_bytes() if fp.is_file() else None
+        for fp in root.rglob("*")
+    }
+
+
+@pytest.mark.asyncio
+async def test_upload_and_download_tree(tmp_path: Path, mock_client):
+    server = TreeServer()
+    client = mock_client(server)
+    make_tree(tmp_path / "src")
+
+    results = await client.upload_tree(
+        tmp_path / "src", "/backup/", concurrency=4, max_bytes_in_flight=25
+    )
+    assert all(r.ok for r in results) and len(results) == 3
+    assert server.files["/dav/backup/docs/old notes/c.txt"] == b"c" * 30
+    assert "/dav/backup/empty" in server.collections
+    # parents are created before their children
+    mkcols = [path for method, path in server.requests if method == "MKCOL"]
+    assert mkcols.index("/dav/backup") < mkcols.index("/dav/backup/docs")
+    assert mkcols.index("/dav/backup/docs") < mkcols.index("/dav/backup/docs/old notes")
+
+    # uploading again is fine; the existing collections are kept
+    results = await client.upload_tree(tmp_path / "src", "/backup")
+    assert all(r.ok for r in results)
+
+    results = await client.download_tree("/backup", tmp_path / "dst", concurrency=4)
+    assert all(r.ok for r in results) and len(results) == 3
+    assert read_tree(tmp_path / "dst") == read_tree(tmp_path / "src")
+
+
+@pytest.mark.asyncio
+async def test_tree_transfer_errors(tmp_path: Path, mock_client):
+    server = TreeServer()
+    server.collections.add("/dav/remote")
+    server.files["/dav/remote/ok.txt"] = b"ok"
+    server.files["/dav/remote/gone.txt"] = b"gone"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET" and request.url.path.endswith("gone.txt"):
+            return httpx.Response(404)  # removed after the listing
+        return server(request)
+
+    client = mock_client(handler)
+    results = await client.download_tree("/remote", tmp_path)
+    assert sorted((Path(r.target).name, r.ok) for r in results) == [
+        ("gone.txt", False),
+        ("ok.txt", True),
+    ]
+    assert (tmp_path / "ok.txt").read_bytes() == b"ok"
+
+
+HOSTILE_HREFS = ["/dav/remote/inner/%2E%2E/%2E%2E/escaped.txt", "/dav/elsewhere.txt"]
+
+
+def hostile(server: TreeServer):
+    """Lists HOSTILE_HREFS as members of /dav/remote, and serves anything that isn't found."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        res = server(request)
+        if request.method == "PROPFIND" and request.url.path == "/dav/remote/":
+            extra = "".join(
+                f"<d:response><d:href>{href}</d:href><d:propstat><d:prop>"
+                "<d:resourcetype/><d:getcontentlength>4</d:getcontentlength>"
+                "</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+                for href in HOSTILE_HREFS
+            )
+            end = b"</d:multistatus>"
+            content = res.read().replace(end, extra.encode() + end)
+            return httpx.Response(207, content=content)
+        if res.status_code == 404:
+            return httpx.Response(200, content=b"evil")
+        return res
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_download_tree_hostile_hrefs(tmp_path: Path, mock_client):
+    server = TreeServer()
+    server.collections.add("/dav/remote")
+    server.files["/dav/remote/ok.txt"] = b"ok"
+    client = mock_client(hostile(server))
+    local_dir = tmp_path / "out" / "inner"
+    results = await client.download_tree("/remote", local_dir)
+    assert sorted((r.source, r.ok) for r in results) == [
+        ("/elsewhere.txt", False),
+        ("/remote/inner/../../escaped.txt", False),
+        ("/remote/ok.txt", True),
+    ]
+    assert [fp for fp in tmp_path.rglob("*") if fp.is_file()] == [local_dir / "ok.txt"]
+
+
+@pytest.mark.asyncio
+async def test_sync_hostile_hrefs(tmp_path: Path, mock_client):
+    server = TreeServer()
+    server.collections.add("/dav/remote")
+    server.files["/dav/remote/ok.txt"] = b"ok"
+    client = mock_client(hostile(server))
+    local_dir = tmp_path / "out" / "inner"
+    plan = await client.sync(local_dir, "/remote", direction="download")
+    assert plan.ok and [a.path for a in plan.actions] == ["ok.txt"]
+    assert [fp for fp in tmp_path.rglob("*") if fp.is_file()] == [local_dir / "ok.txt"]
+
+
+def test_sync_tree(tmp_path: Path, mock_client):
+    server = TreeServer()
+    client = mock_client(server, sync=True)
+    make_tree(tmp_path / "src")
+    assert all(r.ok for r in client.upload_tree(tmp_path / "src", "/"))
+    assert all(r.ok for r in client.download_tree("/", tmp_path / "dst"))
+    assert read_tree(tmp_path / "dst") == read_tree(tmp_path / "src")
+
+
+@pytest.mark.asyncio
+async def test_sync_upload(tmp_path: Path, mock_client):
+    server = TreeServer()
+    client = mock_client(server)
+    make_tree(tmp_path / "src")
+    state_file = tmp_path / "state.json"
+
+    plan = await client.sync(tmp_path / "src", "/mirror", dry_run=True)
+    assert plan.bytes_to_transfer == 60 and not server.files
+    plan = await client.sync(tmp_path / "src", "/mirror", state_file=state_file)
+    assert plan.ok and len(plan.transfers) == 3
+    assert server.files["/dav/mirror/docs/old notes/c.txt"] == b"c" * 30
+
+    # nothing changed: nothing is transferred
+    server.requests.clear()
+    plan = await client.sync(tmp_path / "src", "/mirror", state_file=state_file)
+    assert plan.actions == [] and len(plan.unchanged) == 3
+    assert {method for method, _ in server.requests} == {"PROPFIND"}
+
+    # a changed file, a new one, and a deleted one
+    (tmp_path / "src" / "a.txt").write_bytes(b"A" * 10)
+    (tmp_path / "src" / "new.txt").write_bytes(b"new")
+    (tmp_path / "src" / "docs" / "b.txt").unlink()
+    plan = await client.sync(
+        tmp_path / "src", "/mirror", state_file=state_file, delete=True
+    )
+    assert sorted((a.kind, a.path, a.reason) for a in plan.actions) == [
+        ("delete_remote", "docs/b.txt", "extra"),
+        ("upload", "a.txt", "changed"),
+        ("upload", "new.txt", "missing"),
+    ]
+    assert server.files["/dav/mirror/a.txt"] == b"A" * 10
+    assert "/dav/mirror/docs/b.txt" not in server.files
+    assert "docs/b.txt" not in SyncState(state_file).entries
+
+
+@pytest.mark.asyncio
+async def test_sync_download_without_state(tmp_path: Path, mock_client):
+    server = TreeServer()
+    client = mock_client(server)
+    make_tree(tmp_path / "src")
+    await client.upload_tree(tmp_path / "src", "/remote")
+
+    plan = await client.sync(tmp_path / "dst", "/remote", direction="download")
+    assert plan.ok and len(plan.transfers) == 3
+    assert read_tree(tmp_path / "dst") == read_tree(tmp_path / "src")
+
+    # downloaded files get the remote mtime, so they compare as unchanged
+    plan = await client.sync(tmp_path / "dst", "/remote", direction="download")
+    assert plan.actions == []
+
+    # same size and a newer local mtime, but different contents: only checksums catch it
+    fp = tmp_path / "dst" / "a.txt"
+    fp.write_bytes(b"x" * 10)
+    os.utime(fp, (time.time() + 60, time.time() + 60))
+    plan = await client.sync(tmp_path / "dst", "/remote", direction="download")
+    assert plan.actions == []
+    plan = await client.sync(
+        tmp_path / "dst", "/remote", direction="download", checksums=True
+    )
+    assert [(a.path, a.reason) for a in plan.actions] == [("a.txt", "checksum")]
+    assert fp.read_bytes() == b"a" * 10
+
+
+@pytest.mark.asyncio
+async def test_walk(mock_client):
+    server = TreeServer()
+    in_flight = max_in_flight = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        assert request.headers["Depth"] == "1"
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return server(request)
+
+    for i in range(6):
+        server.collections.add(f"/dav/root/{i}")
+        server.collections.add(f"/dav/root/{i}/sub")
+        server.files[f"/dav/root/{i}/sub/file.txt"] = b"x"
+    server.collections.add("/dav/root")
+    client = mock_client(handler)
+    resources = [r async for r in client.walk("/root", max_concurrency=3)]
+    hrefs = [r.href for r in resources]
+    assert len(hrefs) == len(set(hrefs)) == 18
+    assert max_in_flight == 3
+    # breadth-first: the direct members come before anything below them
+    assert all(href.count("/") == 4 for href in hrefs[:6])
+
+    # stopping early is fine
+    async for resource in client.walk("/root", max_concurrency=3):
+        break
+
+
+def test_sync_walk(mock_client):
+    server = TreeServer()
+    server.collections.update({"/dav/a", "/dav/a/b"})
+    server.files["/dav/a/b/c.txt"] = b"c"
+    client = mock_client(server, sync=True)
+    assert [r.basename for r in client.walk("/", max_concurrency=2)] == [
+        "a",
+        "b",
+        "c.txt",
+    ]
+
+
+@pytest.mark.parametrize("report_sizes", [False, True])
+def test_shell_du_and_tree(tmp_path: Path, report_sizes: bool, mock_client):
+    server = TreeServer()
+    make_tree(tmp_path)
+    shell = ShellDAVClient("example.com", 443, scheme="https", auth=None, path="dav")
+    shell.dav_client = mock_client(server, sync=True)
+    shell.dav_client.upload_tree(tmp_path, "/")
+    server.report_sizes = report_sizes
+    server.requests.clear()
+
+    root = shell.du()
+    assert root.size == 60
+    assert {name: node.size for name, node in root.children.items()} == {
+        "a.txt": 10,
+        "docs": 50,
+        "empty": 0,
+    }
+    # with folder sizes from the server, one listing is enough
+    assert len(server.requests) == (1 if report_sizes else 4)
+
+    root = shell.tree(max_depth=2)
+    docs = root.children["docs"]
+    assert docs.size == 50 and docs.children["old notes"].size == 30
+    assert docs.children["old notes"].children == {}  # deeper than max_depth
+    assert not docs.children["b.txt"].is_collection